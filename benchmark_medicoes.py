@@ -0,0 +1,276 @@
+from datetime import datetime, timedelta
+import argparse
+import os
+import random
+import shutil
+import tempfile
+
+from openpyxl import Workbook # type: ignore
+from openpyxl.styles import Font, PatternFill # type: ignore
+from openpyxl.utils import get_column_letter # type: ignore
+
+import leitura_planilhas
+import processa_medicoes as pm
+import gera_relatorio_gestores as rg
+from cadastro_controles import clear_controles_cache
+from conversores import MESES_PT
+from perfil_execucao import StageProfiler
+
+# Benchmark de ponta a ponta com planilhas sintéticas: gera BASE, ANALITICA,
+# AUXILIAR, COMISSÕES, CONTROLES e o modelo MEDIÇÕES.xlsx no tamanho pedido
+# (quantidade de contratos e de meses), com as mesmas peculiaridades das
+# planilhas reais, e roda processa_medicoes.main() e o relatório de gestores
+# medindo cada etapa (ver perfil_execucao).
+#
+# Exemplo:
+#     python benchmark_medicoes.py --contratos 1000 10000 --meses 12 60
+
+MESES_NOME = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho",
+              "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
+REGIOES = {
+    # região no AUXILIAR -> (aba no COMISSÕES, sigla no CONTROLES, título do bloco no CONTROLES)
+    "BAIXADA": ("BAIXADA", "BX", "BAIXADA"),
+    "METROPOLITANA": ("ESPECIAIS", "MT", "METROPOLITANA"),
+    "SUL FLUMINENSE": ("SUL", "SL", "SUL"),
+    "NORTE": ("NORTE", "NT", "NORTE"),
+}
+FASES = ["EXECUÇÃO"] * 5 + ["CONCLUÍDA"] * 4 + ["NÃO CONCLUÍDA", "ATA DE REGISTRO", "SUSPENSA"]
+STATUS_COMISSOES = ["EXECUÇÃO", "CONCLUIDA", "#CONCLUIDA", "ACEITE PROVISORIO", "ACEITE DEFINITIVO", "DISTRATO"]
+COLUNAS_MODELO = ["Nº", "SEI", "LOCAL", "PRAZO\nEXECUÇÃO", "ORDEM\nDE INÍCIO", "DATA FINAL",
+                  "VLR.CONTRATO\nC/ADITIVO", "STATUS", "GESTOR", "REGIÃO", "MUNICIPIO", "CONTRATADA",
+                  "MEDIÇÕES 2025", "MEDIÇÕES 2026", "MEDIÇÕES\nACUMULADAS", "% EXEC.", "SALDO DO\nCONTRATO"]
+ANO_FINAL = 2026
+
+
+def _meses(quantidade):
+    """(ano, mês) dos `quantidade` meses que terminam em DEZ do ANO_FINAL."""
+    out = []
+    ano, mes = ANO_FINAL, 12
+    for _ in range(quantidade):
+        out.append((ano, mes))
+        mes -= 1
+        if mes == 0:
+            ano, mes = ano - 1, 12
+    return out[::-1]
+
+
+def _moeda_texto(valor):
+    # "R$ 1.234.567,89", como vem de planilhas digitadas à mão
+    inteiro, centavos = f"{valor:.2f}".split(".")
+    grupos = []
+    while inteiro:
+        grupos.insert(0, inteiro[-3:])
+        inteiro = inteiro[:-3]
+    return f"R$ {'.'.join(grupos)},{centavos}"
+
+
+def gerar_planilhas(pasta, contratos=1000, meses=24, densidade=0.25, seed=0):
+    """Grava as seis planilhas de entrada em `pasta` e devolve os caminhos (chave = nome do arquivo)."""
+    rnd = random.Random(seed)
+    os.makedirs(pasta, exist_ok=True)
+    periodo = _meses(meses)
+
+    municipios = {reg: [f"{reg.title()} {i}" for i in range(1, 16)] for reg in REGIOES}
+    empresas = [f"CONSTRUTORA {i:03d} LTDA" for i in range(max(10, contratos // 20))]
+    pessoas = [f"PESSOA {i:03d}" for i in range(max(8, contratos // 15))]
+
+    obras = []
+    for i in range(contratos):
+        regiao = rnd.choice(list(REGIOES))
+        valor = round(rnd.uniform(1e5, 5e7), 2)
+        inicio = datetime(ANO_FINAL - 5, 1, 1) + timedelta(days=rnd.randrange(365 * 5))
+        obras.append({
+            "sei": f"{rnd.choice(['330018', '170026', '330001'])}/{i:06d}/{rnd.randrange(2019, ANO_FINAL)}",
+            "regiao": regiao,
+            "municipio": rnd.choice(municipios[regiao]) if rnd.random() > 0.02 else "Município Sem Região",
+            "empresa": rnd.choice(empresas),
+            "valor": valor,
+            "executado": rnd.random(),
+            "inicio": inicio,
+            "fim": inicio + timedelta(days=rnd.randrange(90, 900)),
+            "fase": rnd.choice(FASES),
+            "gestor": rnd.choice(pessoas),
+            "fiscal": " / ".join(rnd.sample(pessoas, rnd.choice([1, 2]))),
+        })
+
+    caminhos = {}
+
+    # BASE.xlsx: uma linha por (SEI, mês) medido; valores às vezes em texto "R$ ..."
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("MyWorkSheet-1")
+    ws.append(["Processo SEI", "Mês Num", "Mês", "Ano", "Valor"])
+    for obra in obras:
+        for ano, mes in periodo:
+            if rnd.random() >= densidade:
+                continue
+            valor = round(obra["valor"] * rnd.uniform(0.005, 0.08), 2)
+            nome_mes = MESES_NOME[mes - 1]
+            if rnd.random() < 0.05:
+                nome_mes = nome_mes.upper()
+            ws.append([obra["sei"], mes, nome_mes, ano, _moeda_texto(valor) if rnd.random() < 0.05 else valor])
+    caminhos["BASE.xlsx"] = os.path.join(pasta, "BASE.xlsx")
+    wb.save(caminhos["BASE.xlsx"])
+
+    # ANALITICA.xlsx: uma linha por contrato (alguns repetidos); % com "-" e datas em texto
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("MyWorkSheet-1")
+    ws.append(["Municipio", "Processo SEI", "Nº do contrato", "Fase", "Objeto", "Contratada",
+               "Acumulado atual (%)", "Valor contrato (Atual)", "Acumulado", "Saldo Atual do Contrato",
+               "Ordem de Início", "Prazo Final"])
+    for i, obra in enumerate(obras):
+        acumulado = round(obra["valor"] * obra["executado"], 2)
+        pct = round(obra["executado"], 4) if rnd.random() > 0.02 else "-"
+        inicio = obra["inicio"] if rnd.random() > 0.03 else "-"
+        linha = [obra["municipio"], obra["sei"] + (" " if rnd.random() < 0.02 else ""), f"{i:03d}/{obra['inicio'].year}",
+                 obra["fase"], f"OBRA SINTÉTICA {i}", obra["empresa"] + ("." if rnd.random() < 0.1 else ""),
+                 pct, obra["valor"], acumulado, round(obra["valor"] - acumulado, 2), inicio, obra["fim"]]
+        ws.append(linha)
+        if rnd.random() < 0.01:
+            ws.append(linha)
+    caminhos["ANALITICA.xlsx"] = os.path.join(pasta, "ANALITICA.xlsx")
+    wb.save(caminhos["ANALITICA.xlsx"])
+
+    # AUXILIAR.xlsx: municípios por região (colunas separadas por colunas vazias),
+    # CONTRATADA -> RESUMIDO e a lista de SEIs concluídos
+    concluidas = [o["sei"] for o in obras if rnd.random() < 0.03]
+    colunas_aux = []
+    for reg in REGIOES:
+        colunas_aux += [None, reg]
+    colunas_aux += [None, "CONTRATADA", "RESUMIDO", None, "SEI", "STATUS"]
+    altura = max(len(empresas), len(concluidas), max(len(m) for m in municipios.values()))
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("AUXILIAR")
+    ws.append(colunas_aux)
+    for r in range(altura):
+        linha = []
+        for reg in REGIOES:
+            linha += [None, municipios[reg][r] if r < len(municipios[reg]) else None]
+        empresa = empresas[r] if r < len(empresas) else None
+        linha += [None, empresa, f"CONST. {empresa.split()[1]}" if empresa else None, None,
+                  concluidas[r] if r < len(concluidas) else None, None]
+        ws.append(linha)
+    caminhos["AUXILIAR.xlsx"] = os.path.join(pasta, "AUXILIAR.xlsx")
+    wb.save(caminhos["AUXILIAR.xlsx"])
+
+    # COMISSÕES POR REGIAO.xlsx: título, cabeçalho com quebra de linha e linhas
+    # numeradas em cada aba regional; aba AUXILIAR com STATUS/LOCAL
+    wb = Workbook(write_only=True)
+    abas = {"BAIXADA": [], "NORTE": [], "SUL": [], "CONTIGENCIA": [], "ESPECIAIS": []}
+    for obra in obras:
+        aba = "CONTIGENCIA" if rnd.random() < 0.05 else REGIOES[obra["regiao"]][0]
+        abas[aba].append(obra)
+    for aba, lista in abas.items():
+        ws = wb.create_sheet(aba)
+        ws.append([None, f"OBRAS REGIÃO - {aba}"])
+        ws.append([None, "SEI", "FISCAL NOMEADO", "GESTOR(A)\nATUANTE", "STATUS", "MUNICIPIO", "EMPRESA"])
+        for n, obra in enumerate(lista, start=1):
+            ws.append([n, obra["sei"], obra["fiscal"], obra["gestor"] if rnd.random() > 0.05 else None,
+                       rnd.choice(STATUS_COMISSOES), obra["municipio"].upper(), obra["empresa"].split()[-2]])
+    ws = wb.create_sheet("AUXILIAR")
+    ws.append(["SEI", "GESTOR", "REGIAO", "Coluna1", "STATUS", "LOCAL"])
+    for obra in obras:
+        if rnd.random() < 0.5:
+            local = "ESPECIAIS" if rnd.random() < 0.1 else "CIVIS"
+            ws.append([obra["sei"], rnd.choice(pessoas), obra["regiao"], None, rnd.choice(STATUS_COMISSOES), local])
+    caminhos["COMISSÕES POR REGIAO.xlsx"] = os.path.join(pasta, "COMISSÕES POR REGIAO.xlsx")
+    wb.save(caminhos["COMISSÕES POR REGIAO.xlsx"])
+
+    # CONTROLES POR COMISSÃO E GESTORES.xlsx: vários blocos empilhados na mesma
+    # aba (título de região, cabeçalho, dados, linha Total e contagem por gestor)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Planilha1")
+    cabecalho = ["SEI", "GESTOR(A)\nATUANTE", "GESTOR SUPLENTE", "FISCAL NOMEADO", "MUNICIPIO", "EMPRESA",
+                 "%EXEC", "STATUS", "FISCAL SUPLENTE", "ADM", "ADM SUPLENTE"]
+    for b, (reg, (_, sigla, titulo)) in enumerate(REGIOES.items()):
+        lista = [o for o in obras if o["regiao"] == reg and rnd.random() < 0.6]
+        if b > 0:
+            ws.append([titulo])
+        ws.append(cabecalho + ["REGIÃO" if b % 2 == 0 else "REGIAO"])
+        for obra in lista:
+            ws.append([obra["sei"], obra["gestor"], rnd.choice(pessoas), obra["fiscal"], obra["municipio"].upper(),
+                       obra["empresa"], round(obra["executado"], 4), obra["fase"] if rnd.random() > 0.05 else None,
+                       rnd.choice(pessoas), rnd.choice(pessoas), rnd.choice(pessoas), sigla])
+        ws.append([None, "Total", None, None, None, len(lista)])
+        for pessoa in sorted({o["gestor"] for o in lista})[:3]:
+            ws.append([None, pessoa, sum(1 for o in lista if o["gestor"] == pessoa)])
+        ws.append([])
+    caminhos["CONTROLES POR COMISSÃO E GESTORES.xlsx"] = os.path.join(pasta, "CONTROLES POR COMISSÃO E GESTORES.xlsx")
+    wb.save(caminhos["CONTROLES POR COMISSÃO E GESTORES.xlsx"])
+
+    # MEDIÇÕES.xlsx: modelo com o cabeçalho (linha 2), cores e larguras
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Medições"
+    cinza = PatternFill(start_color="E6E6E6", end_color="E6E6E6", fill_type="solid")
+    colunas = COLUNAS_MODELO + [f"{MESES_PT[mes]}/{str(ano)[-2:]}" for ano, mes in periodo]
+    for idx, nome in enumerate(colunas, start=1):
+        cell = ws.cell(row=2, column=idx, value=nome)
+        cell.font = Font(bold=True, color="FF000000")
+        if nome in COLUNAS_MODELO:
+            cell.fill = cinza
+        ws.column_dimensions[get_column_letter(idx)].width = 18 if nome in COLUNAS_MODELO else 9.5
+    caminhos["MEDIÇÕES.xlsx"] = os.path.join(pasta, "MEDIÇÕES.xlsx")
+    wb.save(caminhos["MEDIÇÕES.xlsx"])
+    return caminhos
+
+
+def executar_cenario(pasta, perfil_saida=None, usar_cache=False, workers=None):
+    """Roda processa_medicoes.main() e o relatório de gestores sobre as planilhas de `pasta`."""
+    leitura_planilhas.CACHE_ENABLED = usar_cache
+    leitura_planilhas.CACHE_DIR = os.path.join(pasta, ".cache_planilhas")
+    leitura_planilhas.clear_sheet_cache()
+
+    pm.FILE_BASE = os.path.join(pasta, "BASE.xlsx")
+    pm.FILE_ANALITICA = os.path.join(pasta, "ANALITICA.xlsx")
+    pm.FILE_AUXILIAR = os.path.join(pasta, "AUXILIAR.xlsx")
+    pm.FILE_COMISSOES = os.path.join(pasta, "COMISSÕES POR REGIAO.xlsx")
+    pm.FILE_CONTROLES = os.path.join(pasta, "CONTROLES POR COMISSÃO E GESTORES.xlsx")
+    pm.FILE_OUTPUT = os.path.join(pasta, "MEDIÇÕES_CONSOLIDADO.xlsx")
+    pm.main(workers=workers, profile=perfil_saida or True)
+
+    prof = StageProfiler(enabled=True, output=perfil_saida or os.path.join(pasta, "relatorio.perfil.jsonl"),
+                         label=os.path.basename(pasta))
+    rg.OUTPUT_FILE = os.path.join(pasta, "RELATORIO DE OBRAS POR GESTORES E FISCAIS.xlsx")
+    # pm.main() já deixou os registros de CONTROLES em memória: descartados para
+    # a etapa medir a leitura do relatório (com o cache em disco, se usar_cache)
+    clear_controles_cache()
+    with prof.stage("relatorio_leitura") as info:
+        df = rg.load_data(pm.FILE_CONTROLES)
+        info['linhas'] = 0 if df is None else len(df)
+    with prof.stage("relatorio_geracao"):
+        rg.generate_report(df)
+    print(prof.summary())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta com planilhas sintéticas.")
+    parser.add_argument("--contratos", type=int, nargs="+", default=[1000],
+                        help="quantidades de contratos (um cenário por valor; ex.: 1000 10000 100000)")
+    parser.add_argument("--meses", type=int, nargs="+", default=[24],
+                        help="quantidades de colunas mensais (ex.: 12 60)")
+    parser.add_argument("--densidade", type=float, default=0.25,
+                        help="fração dos meses com medição em cada contrato (padrão: 0.25)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pasta", default=None,
+                        help="onde gerar os cenários (padrão: diretório temporário, removido no fim)")
+    parser.add_argument("--perfil", default=None,
+                        help="arquivo JSON lines que acumula as medições de todos os cenários")
+    parser.add_argument("--cache", action="store_true", help="mantém o cache de leitura (padrão: leitura a frio)")
+    parser.add_argument("--workers", type=int, default=None, help="processos de leitura paralela")
+    args = parser.parse_args()
+
+    raiz = args.pasta or tempfile.mkdtemp(prefix="benchmark_medicoes_")
+    try:
+        for contratos in args.contratos:
+            for meses in args.meses:
+                pasta = os.path.join(raiz, f"{contratos}_contratos_{meses}_meses")
+                print(f"=== {contratos} contratos, {meses} meses ===")
+                gerar_planilhas(pasta, contratos, meses, args.densidade, args.seed)
+                executar_cenario(pasta, args.perfil, args.cache, args.workers)
+    finally:
+        if args.pasta is None:
+            shutil.rmtree(raiz, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+from collections import namedtuple
+from functools import lru_cache
+import warnings
+
+import pandas as pd # type: ignore
+
+from leitura_planilhas import HEADER_FOOTER_WARNING, load_cached, load_workbook_ignoring_header_footer_warning
+
+# Leitura em streaming (openpyxl read_only) das planilhas com várias tabelas
+# empilhadas na mesma aba: linha de região/título, cabeçalho (SEI, GESTOR...),
+# dados e, ao final, linhas de TOTAL. Nenhum DataFrame é montado: cada linha é
+# lida uma única vez e agrupada no bloco do cabeçalho mais recente.
+
+
+def _clean_value(v):
+    # Mesmo tratamento do pd.read_excel: texto vazio é célula vazia e
+    # números inteiros gravados como float voltam a ser int
+    if v == "":
+        return None
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def _iter_rows(ws):
+    # Em read_only o XML é interpretado sob demanda, então o aviso de
+    # header/footer surge durante a iteração e precisa ser filtrado aqui
+    it = ws.iter_rows(values_only=True)
+    while True:
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message=HEADER_FOOTER_WARNING)
+            row = next(it, None)
+        if row is None:
+            return
+        yield tuple(_clean_value(v) for v in row)
+
+
+def iter_workbook_sheets(path):
+    """Abre o XLSX uma vez em modo somente leitura e gera (nome_da_aba, linhas) para cada aba."""
+    wb = load_workbook_ignoring_header_footer_warning(path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            yield ws.title, _iter_rows(ws)
+    finally:
+        wb.close()
+
+
+def iter_sheet_rows(path, sheet_name=None):
+    """Linhas de uma aba (a primeira, por padrão) como tuplas de valores."""
+    for name, rows in iter_workbook_sheets(path):
+        if sheet_name is None or name == sheet_name:
+            yield from rows
+            return
+
+
+def cell_at(values, idx):
+    """Valor da coluna idx, ou None se a linha for mais curta (read_only não completa linhas)."""
+    return values[idx] if idx is not None and idx < len(values) else None
+
+
+def cell_text(v):
+    """Texto da célula sem espaços nas pontas; célula vazia vira ""."""
+    return "" if v is None else str(v).strip()
+
+
+def normalize_header(v):
+    """Texto de cabeçalho comparável: sem quebras de linha, sem espaços nas pontas, maiúsculo."""
+    return "" if v is None else str(v).replace("\n", " ").strip().upper()
+
+
+# Colunas reconhecidas nos cabeçalhos: (nome canônico, variações exatas em ordem
+# de prioridade, trecho aceito como último recurso). O nome canônico é o usado
+# pelos chamadores; variações como "REGIAO" ou "GESTOR ATUANTE" caem nele.
+DEFAULT_ALIASES = (
+    ("SEI", ("SEI", "PROCESSO SEI"), None),
+    ("GESTOR(A) ATUANTE", ("GESTOR(A) ATUANTE", "GESTOR ATUANTE", "GESTOR(A)", "GESTOR"), "GESTOR"),
+    ("FISCAL NOMEADO", ("FISCAL NOMEADO", "FISCAL", "FISCAL(A)"), None),
+    ("STATUS", ("STATUS",), None),
+    ("REGIÃO", ("REGIÃO", "REGIAO"), None),
+)
+
+# Nomes de região que, na primeira coluna, indicam o início do próximo bloco
+REGION_NAMES = ("BAIXADA", "SUL", "NORTE", "METROPOLITANA", "CENTRO")
+
+# required: colunas canônicas que precisam estar na linha para ela ser cabeçalho
+#           (a primeira é a chave do registro, normalmente o SEI);
+# header_limit: procura cabeçalho só nas N primeiras linhas (None = aba toda);
+# first_only: o primeiro cabeçalho vale até o fim da aba;
+# stop_on_blank_key: chave vazia encerra o bloco (senão a linha só é ignorada);
+# region_names: textos na primeira coluna que encerram o bloco.
+TableSpec = namedtuple(
+    "TableSpec",
+    ["required", "aliases", "header_limit", "first_only", "stop_on_blank_key", "region_names"],
+    defaults=(DEFAULT_ALIASES, None, False, True, ()),
+)
+
+# Blocos de CONTROLES POR COMISSÃO E GESTORES.xlsx (várias tabelas por aba)
+CONTROLES_SPEC = TableSpec(required=("SEI", "GESTOR(A) ATUANTE"), region_names=REGION_NAMES)
+# Abas regionais de COMISSÕES POR REGIAO.xlsx (um cabeçalho nas 10 primeiras linhas)
+COMISSOES_SPEC = TableSpec(required=("SEI", "GESTOR(A) ATUANTE"), header_limit=10,
+                           first_only=True, stop_on_blank_key=False)
+# Os mesmos blocos de CONTROLES para o relatório de gestores: SEI vazio só pula
+# a linha (o cadastro do processa_medicoes fica com as linhas antes dela, ver gap)
+CONTROLES_RELATORIO_SPEC = CONTROLES_SPEC._replace(stop_on_blank_key=False)
+
+# index: linha (0-based) do cabeçalho; end: linha onde o bloco terminou (exclusiva);
+# above: valores da linha acima do cabeçalho (título/região, ou None);
+# header: {texto do cabeçalho: coluna}, com as variações trocadas pelo nome canônico;
+# columns: {nome canônico: coluna} das colunas de DEFAULT_ALIASES encontradas;
+# rows: lista de (linha, valores) só com registros válidos (chave preenchida, sem TOTAL);
+# gap: primeira linha do bloco com chave vazia (None se não houver), mesmo quando
+#      ela não encerra o bloco
+TableBlock = namedtuple("TableBlock", ["index", "end", "above", "header", "columns", "rows", "gap"],
+                        defaults=(None,))
+
+
+@lru_cache(maxsize=None)
+def _compile_aliases(aliases):
+    exact = {}
+    contains = []
+    for canonical, variants, fragment in aliases:
+        for priority, variant in enumerate(variants):
+            exact.setdefault(variant, (canonical, priority))
+        if fragment:
+            contains.append((canonical, fragment))
+    return exact, tuple(contains)
+
+
+def _match_header(values, exact, contains):
+    # Só células de texto podem ser cabeçalho; cada uma é normalizada uma vez
+    found = {}
+    for idx, v in enumerate(values):
+        if not isinstance(v, str):
+            continue
+        text = v.replace("\n", " ").strip().upper()
+        hit = exact.get(text)
+        if hit is not None:
+            canonical, priority = hit
+            # Mesma prioridade repetida: vale a última coluna
+            if canonical not in found or priority <= found[canonical][0]:
+                found[canonical] = (priority, idx)
+            continue
+        for canonical, fragment in contains:
+            if fragment in text and canonical not in found:
+                found[canonical] = (len(exact), idx)
+    return {canonical: idx for canonical, (_, idx) in found.items()}
+
+
+def scan_tables(rows, spec):
+    """Detecta os blocos de tabela de uma aba numa única passada pelas linhas."""
+    exact, contains = _compile_aliases(spec.aliases)
+    key_field = spec.required[0]
+    blocks = []
+    current = None  # bloco aberto recebendo linhas de dados
+    previous = None
+    last_index = -1
+    for i, values in enumerate(rows):
+        last_index = i
+        can_start = (spec.header_limit is None or i < spec.header_limit) and not (spec.first_only and blocks)
+        if can_start:
+            columns = _match_header(values, exact, contains)
+            if all(field in columns for field in spec.required):
+                if current is not None:
+                    blocks[-1] = current._replace(end=i)
+                chosen = {idx: canonical for canonical, idx in columns.items()}
+                header = {}
+                for idx, v in enumerate(values):
+                    name = chosen.get(idx) or normalize_header(v)
+                    if name:
+                        header[name] = idx
+                current = TableBlock(i, None, previous, header, columns, [])
+                blocks.append(current)
+                previous = values
+                continue
+
+        if current is not None:
+            key = cell_text(cell_at(values, current.columns[key_field])).upper()
+            first_col = cell_text(cell_at(values, 0)).upper()
+            if first_col in spec.region_names and i > current.index + 1:
+                # Nome de região na primeira coluna: começa o próximo bloco
+                blocks[-1] = current._replace(end=i)
+                current = None
+            elif not key or key == "NAN":
+                if current.gap is None:
+                    current = blocks[-1] = current._replace(gap=i)
+                if spec.stop_on_blank_key:
+                    blocks[-1] = current._replace(end=i)
+                    current = None
+            elif "TOTAL" not in key and key != key_field:
+                current.rows.append((i, values))
+        previous = values
+
+    if current is not None:
+        blocks[-1] = current._replace(end=last_index + 1)
+    return blocks
+
+
+# Versão do formato de TableBlock no cache: blocos gravados antes de uma mudança
+# nos campos são descartados
+TABLES_VERSION = 2
+
+
+def _tables_tag(spec, sheet_name):
+    return f"tabelas:v{TABLES_VERSION}:{sheet_name!r}:{tuple(spec)!r}"
+
+
+def detect_tables(path, spec=CONTROLES_SPEC, sheet_name=None):
+    """Blocos de tabela de uma aba (a primeira, por padrão).
+
+    O resultado fica no cache em disco de leitura_planilhas, associado à
+    versão exata do arquivo: enquanto ele não mudar, nada é relido.
+    """
+    return load_cached(path, _tables_tag(spec, sheet_name),
+                       lambda: scan_tables(iter_sheet_rows(path, sheet_name), spec))
+
+
+def _scan_workbook(path, spec, frame_sheet):
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message=HEADER_FOOTER_WARNING)
+        xl = pd.ExcelFile(path)
+    with xl:
+        frame = None
+        tables = {}
+        for name in xl.sheet_names:
+            if frame is None and frame_sheet is not None and name.upper() == frame_sheet.upper():
+                with warnings.catch_warnings():
+                    warnings.filterwarnings("ignore", message=HEADER_FOOTER_WARNING)
+                    frame = xl.parse(name)
+            else:
+                tables[name] = scan_tables(_iter_rows(xl.book[name]), spec)
+    return frame, tables
+
+
+def read_workbook_tables(path, spec=COMISSOES_SPEC, frame_sheet=None):
+    """(DataFrame, {aba: blocos}) com uma única abertura do XLSX.
+
+    A aba frame_sheet (comparada sem diferenciar maiúsculas; a primeira que
+    casar) vem como DataFrame, exatamente como o pd.read_excel a leria; as
+    demais passam pela detecção de tabelas, na ordem das abas no arquivo.
+    Sem frame_sheet, ou se ela não existir, o DataFrame é None.
+    """
+    return load_cached(path, f"{_tables_tag(spec, '*')}:frame={frame_sheet!r}",
+                       lambda: _scan_workbook(path, spec, frame_sheet))
@@ -0,0 +1,145 @@
+import os
+
+import pandas as pd # type: ignore
+
+from blocos_planilha import CONTROLES_RELATORIO_SPEC, cell_at, cell_text, detect_tables
+from dados_consolidados import load_snapshot, snapshot_manifest
+from leitura_planilhas import file_fingerprint
+
+# Leitura única de CONTROLES POR COMISSÃO E GESTORES.xlsx, compartilhada pelo
+# processa_medicoes (cadastro gestor/fiscal/status por SEI) e pelo relatório de
+# gestores (linhas por região). Os dois partem dos mesmos blocos, mas cada um
+# mantém sua regra para linhas sem SEI no meio de um bloco:
+# - o relatório só pula a linha e continua lendo o bloco (controles_records)
+# - o cadastro para nela, como sempre fez (cadastro_records: linhas antes do
+#   TableBlock.gap)
+# - no mesmo processo, cada versão do arquivo é interpretada uma vez só
+#   (os registros ficam em memória, indexados pelo hash do conteúdo)
+# - entre processos, os blocos detectados vêm do cache em disco de
+#   leitura_planilhas (detect_tables)
+# - o processa_medicoes com --dados grava os registros na tabela "controles" de
+#   <saída>.dados/; load_controles(..., snapshot=<saída>) usa essa cópia quando
+#   ela foi gerada a partir da mesma versão do arquivo e nem abre o XLSX
+CONTROLES_TABLE = "controles"
+
+# (caminho absoluto, sha256) -> (registros do relatório, registros do cadastro)
+_RECORDS = {}
+
+
+def block_region(block, current_region):
+    """Região do bloco: texto da linha acima do cabeçalho (coluna 0 ou 1), ou a do bloco anterior."""
+    if block.above is None:
+        return current_region
+    possible_region = cell_text(cell_at(block.above, 0))
+    if not possible_region:
+        possible_region = cell_text(cell_at(block.above, 1))
+    # Título vazio ou TOTAL mantém a região anterior
+    if possible_region.upper() not in ['NAN', '', 'TOTAL']:
+        return possible_region.upper()
+    return current_region
+
+
+def record_columns(block):
+    """{cabeçalho: coluna} que vira campo do registro.
+
+    Só o trecho contíguo de cabeçalhos em volta do SEI (anotações soltas à
+    direita da tabela, como um nome ou um número, ficam de fora) e as colunas
+    reconhecidas (block.columns), mesmo que estejam além de uma célula vazia.
+    """
+    filled = set(block.header.values())
+    first = last = block.columns["SEI"]
+    while first - 1 in filled:
+        first -= 1
+    while last + 1 in filled:
+        last += 1
+    known = set(block.columns.values())
+    return {head: idx for head, idx in block.header.items() if first <= idx <= last or idx in known}
+
+
+def parse_controles(path):
+    """(registros do relatório, registros do cadastro) de CONTROLES.
+
+    Um dict por linha de dados: 'REGIÃO' + {cabeçalho: valor da célula} do
+    bloco (record_columns). Os cabeçalhos reconhecidos usam o nome canônico
+    (SEI, GESTOR(A) ATUANTE, FISCAL NOMEADO, STATUS); colunas que o bloco não
+    tem ficam fora do dict. O cadastro tem os mesmos dicts, só das linhas antes
+    da primeira linha sem SEI de cada bloco.
+    """
+    records = []
+    cadastro = []
+    current_region = None
+    for block in detect_tables(path, CONTROLES_RELATORIO_SPEC):
+        current_region = block_region(block, current_region)
+        columns = record_columns(block)
+        for i, d_row in block.rows:
+            record = {'REGIÃO': current_region}
+            for head, col_idx in columns.items():
+                record[head] = cell_at(d_row, col_idx)
+            records.append(record)
+            if block.gap is None or i < block.gap:
+                cadastro.append(record)
+    return records, cadastro
+
+
+def _parsed(path):
+    key = (os.path.abspath(path), file_fingerprint(path))
+    if key not in _RECORDS:
+        _RECORDS[key] = parse_controles(path)
+    return _RECORDS[key]
+
+
+def controles_records(path):
+    """Registros do relatório (parse_controles), interpretados uma vez por versão do arquivo neste processo.
+
+    A lista é compartilhada entre os chamadores: não deve ser alterada.
+    """
+    return _parsed(path)[0]
+
+
+def cadastro_records(path):
+    """Registros do cadastro gestor/fiscal/status do processa_medicoes (mesma leitura de controles_records).
+
+    A lista é compartilhada entre os chamadores: não deve ser alterada.
+    """
+    return _parsed(path)[1]
+
+
+def clear_controles_cache():
+    """Descarta os registros já interpretados neste processo (ex.: para medir a leitura de novo)."""
+    _RECORDS.clear()
+
+
+def snapshot_source(path):
+    """Identificação do arquivo de origem gravada no manifesto dos dados consolidados."""
+    return {"arquivo": os.path.basename(path), "sha256": file_fingerprint(path)}
+
+
+def controles_snapshot(path):
+    """({tabela: DataFrame}, extra do manifesto) para save_snapshot, ou ({}, {}) sem o arquivo."""
+    if not os.path.exists(path):
+        return {}, {}
+    return ({CONTROLES_TABLE: pd.DataFrame(controles_records(path))},
+            {CONTROLES_TABLE: snapshot_source(path)})
+
+
+def _snapshot_frame(path, snapshot):
+    manifest = snapshot_manifest(snapshot)
+    if manifest is None or CONTROLES_TABLE not in manifest.get("tabelas", {}):
+        return None
+    source = manifest.get(CONTROLES_TABLE) or {}
+    if source.get("sha256") != file_fingerprint(path):
+        return None
+    return load_snapshot(snapshot, [CONTROLES_TABLE])[CONTROLES_TABLE]
+
+
+def load_controles(path, snapshot=None):
+    """DataFrame com os registros de CONTROLES (uma cópia nova a cada chamada).
+
+    snapshot: saída do processa_medicoes (MEDIÇÕES_CONSOLIDADO.xlsx) cujos dados
+    consolidados são aproveitados se vierem desta mesma versão de `path`.
+    """
+    if snapshot is not None:
+        df = _snapshot_frame(path, snapshot)
+        if df is not None:
+            return df
+    return pd.DataFrame(controles_records(path))
@@ -0,0 +1,194 @@
+import argparse
+import os
+
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+
+from conversores import clean_sei_series
+from dados_consolidados import load_snapshot
+from escrita_planilha import streaming_workbook, write_frame
+import gera_relatorio_gestores as rg
+from leitura_planilhas import read_sheet_cached
+from processa_medicoes import FILE_OUTPUT, MONEY_FORMAT, PERCENT_FORMAT
+
+# Carga de trabalho de fiscais e gestores: as mesmas linhas por pessoa do
+# relatório de gestores (explode_people), cruzadas por SEI com os valores do
+# MEDIÇÕES_CONSOLIDADO (valor do contrato, saldo e % executado).
+#
+# Contratos divididos entre várias pessoas ("A / B") contam inteiros em OBRAS
+# e pela fração de cada uma (1/2, 1/3...) nas colunas *_EQUIV/*_PONDERADO, que
+# são as usadas para medir desequilíbrio. EXCESSO_* é a diferença para a média
+# da região: positivo = acima da média, candidato a ceder contratos.
+OUTPUT_FILE = os.path.join(rg.CWD, "CARGA DE TRABALHO POR GESTORES E FISCAIS.xlsx")
+VALUE_COLUMNS = ("VLR.CONTRATO C/ADITIVO", "SALDO DO CONTRATO", "% EXEC.")
+# Métricas de desequilíbrio: contratos equivalentes e saldo em aberto ponderado
+BALANCE_METRICS = ("OBRAS_EQUIV", "SALDO_PONDERADO")
+OVERALL_REGION = "GERAL"
+NUMBER_FORMAT = '#,##0.00'
+
+
+def load_consolidated(output_path=None):
+    """Contratos consolidados (SEI + VALUE_COLUMNS) de uma execução de processa_medicoes.
+
+    Usa os dados tipados de <saída>.dados/ quando existem (--dados); senão lê as
+    abas Medições e PROBLEMAS do XLSX.
+    """
+    output_path = output_path or FILE_OUTPUT
+    try:
+        return load_snapshot(output_path, ['df_all'])['df_all']
+    except FileNotFoundError:
+        sheets = read_sheet_cached(output_path, sheet_name=None)
+        frames = [sheets[name] for name in ('Medições', 'PROBLEMAS') if name in sheets]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['SEI', *VALUE_COLUMNS])
+
+
+def contract_values(consolidado):
+    """Uma linha por SEI limpo com VALOR_CONTRATO, SALDO e EXEC numéricos."""
+    values = pd.DataFrame({'SEI_CLEAN': clean_sei_series(consolidado['SEI']).values})
+    for col, name in zip(VALUE_COLUMNS, ("VALOR_CONTRATO", "SALDO", "EXEC")):
+        source = consolidado[col] if col in consolidado.columns else pd.Series(np.nan, index=consolidado.index)
+        values[name] = pd.to_numeric(source, errors='coerce').values
+    return values[values['SEI_CLEAN'] != ""].drop_duplicates('SEI_CLEAN')
+
+
+def attach_contract_values(df_people, name_col, values):
+    """Linhas por pessoa + valores do contrato (junção vetorizada por SEI) e a fração de cada pessoa."""
+    # Quantas pessoas dividem o contrato (mesmo índice da linha original antes do explode)
+    share = 1.0 / df_people.groupby(level=0)[name_col].transform('size')
+    people = pd.DataFrame({
+        'REGIÃO': df_people['REGIÃO'].values,
+        'NOME': df_people[name_col].values,
+        'SEI_CLEAN': clean_sei_series(df_people['SEI']).values,
+        'PARTICIPACAO': share.values,
+    })
+    return people.merge(values, on='SEI_CLEAN', how='left', validate='many_to_one', indicator='_origem')
+
+
+def _aggregate(people, keys):
+    d = people.assign(
+        SEM=(people['_origem'] != 'both').astype(int),
+        VALOR=people['VALOR_CONTRATO'].fillna(0.0),
+        SALDO_ABERTO=people['SALDO'].fillna(0.0),
+        SALDO_POND=people['SALDO'].fillna(0.0) * people['PARTICIPACAO'],
+        VALOR_POND=people['VALOR_CONTRATO'].fillna(0.0) * people['PARTICIPACAO'],
+        # % executado médio ponderado pelo valor (só contratos com os dois campos)
+        PESO_EXEC=people['VALOR_CONTRATO'].where(people['EXEC'].notna(), 0.0).fillna(0.0),
+        EXEC_X_PESO=(people['VALOR_CONTRATO'] * people['EXEC']).fillna(0.0),
+    )
+    load = d.groupby(keys, sort=True).agg(
+        OBRAS=('SEI_CLEAN', 'size'),
+        OBRAS_EQUIV=('PARTICIPACAO', 'sum'),
+        SEM_DADOS=('SEM', 'sum'),
+        VALOR_CONTRATOS=('VALOR', 'sum'),
+        VALOR_PONDERADO=('VALOR_POND', 'sum'),
+        SALDO_ABERTO=('SALDO_ABERTO', 'sum'),
+        SALDO_PONDERADO=('SALDO_POND', 'sum'),
+        _peso=('PESO_EXEC', 'sum'),
+        _exec=('EXEC_X_PESO', 'sum'),
+    ).reset_index()
+    load['EXEC_MEDIO'] = (load['_exec'] / load['_peso'].where(load['_peso'] != 0)).fillna(0.0)
+    return load.drop(columns=['_peso', '_exec'])
+
+
+def person_load(people):
+    """Carga por (REGIÃO, NOME) e, com REGIÃO = GERAL, por pessoa em todas as regiões."""
+    by_region = _aggregate(people, ['REGIÃO', 'NOME'])
+    overall = _aggregate(people, ['NOME'])
+    overall.insert(0, 'REGIÃO', OVERALL_REGION)
+    load = pd.concat([by_region, overall], ignore_index=True)
+    for metric in BALANCE_METRICS:
+        load[f"EXCESSO_{metric}"] = load[metric] - load.groupby('REGIÃO')[metric].transform('mean')
+    return load
+
+
+def top_n(load, n=10, metric="SALDO_PONDERADO"):
+    """As n pessoas com maior `metric` em cada região (RANK 1 = mais carregada)."""
+    ranked = load.sort_values(['REGIÃO', metric, 'NOME'], ascending=[True, False, True], kind='mergesort')
+    top = ranked.groupby('REGIÃO', sort=False).head(n).copy()
+    top.insert(1, 'RANK', top.groupby('REGIÃO', sort=False).cumcount() + 1)
+    return top.reset_index(drop=True)
+
+
+def imbalance(load, metrics=BALANCE_METRICS):
+    """Por região e métrica: total, média, extremos, máximo/média e coeficiente de variação."""
+    tables = []
+    for metric in metrics:
+        grouped = load.groupby('REGIÃO', sort=True)[metric]
+        table = grouped.agg(PESSOAS='size', TOTAL='sum', MEDIA='mean', MINIMO='min', MAXIMO='max',
+                            DESVIO='std').reset_index()
+        table['DESVIO'] = table['DESVIO'].fillna(0.0)  # região com uma pessoa só
+        mean = table['MEDIA'].where(table['MEDIA'] != 0)
+        table['RAZAO_MAX_MEDIA'] = (table['MAXIMO'] / mean).fillna(0.0)
+        table['COEF_VARIACAO'] = (table['DESVIO'] / mean).fillna(0.0)
+        extremes = load.sort_values([metric, 'NOME'], ascending=[False, True], kind='mergesort')
+        table['MAIS_CARREGADO'] = table['REGIÃO'].map(extremes.groupby('REGIÃO')['NOME'].first())
+        table['MENOS_CARREGADO'] = table['REGIÃO'].map(extremes.groupby('REGIÃO')['NOME'].last())
+        table.insert(1, 'METRICA', metric)
+        tables.append(table)
+    return pd.concat(tables, ignore_index=True)
+
+
+def workload_tables(df_controles, consolidado, top=10):
+    """{aba: DataFrame} com carga, top-N e desequilíbrio de fiscais e de gestores."""
+    _, df_f, df_g = rg.explode_people(df_controles.copy())
+    values = contract_values(consolidado)
+    tables = {}
+    for role, frame, name_col in (("fiscais", df_f, 'FISCAL_INDIVIDUAL'), ("gestores", df_g, 'GESTOR_INDIVIDUAL')):
+        load = person_load(attach_contract_values(frame, name_col, values))
+        tables[f"Carga {role}"] = load
+        tables[f"Top {role}"] = top_n(load, top)
+        tables[f"Desequilíbrio {role}"] = imbalance(load)
+    return tables
+
+
+def _number_format(fmt):
+    return lambda value, _fmt: (value, None, fmt)
+
+
+def write_workload(tables, output_file=None):
+    """Grava cada tabela numa aba (valores em R$, % executado em porcentagem)."""
+    output_file = output_file or OUTPUT_FILE
+    wb = streaming_workbook()
+    money, percent = _number_format(MONEY_FORMAT), _number_format(PERCENT_FORMAT)
+    number = _number_format(NUMBER_FORMAT)
+    for title, df in tables.items():
+        formatters = []
+        for col in df.columns:
+            if col.startswith(("VALOR", "SALDO", "EXCESSO_SALDO")):
+                formatters.append(money)
+            elif col in ("OBRAS_EQUIV", "EXCESSO_OBRAS_EQUIV", "TOTAL", "MEDIA", "MINIMO", "MAXIMO", "DESVIO",
+                         "RAZAO_MAX_MEDIA", "COEF_VARIACAO"):
+                # Desequilíbrio mistura métricas (obras e R$) nas mesmas colunas
+                formatters.append(number)
+            elif col == "EXEC_MEDIO":
+                formatters.append(percent)
+            else:
+                formatters.append(None)
+        widths = [max(12, min(40, len(str(col)) + 4)) for col in df.columns]
+        write_frame(wb, title, df, column_formatters=formatters, widths=widths)
+    wb.save(output_file)
+    print(f"Carga de trabalho: {output_file}")
+    return output_file
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Carga de trabalho de fiscais e gestores por região.")
+    parser.add_argument("controles", nargs="?", default=rg.INPUT_FILE,
+                        help="planilha CONTROLES (padrão: a do relatório de gestores)")
+    parser.add_argument("--consolidado", default=FILE_OUTPUT,
+                        help="MEDIÇÕES_CONSOLIDADO.xlsx de origem dos valores e, se gravados com --dados, "
+                             "dos registros de CONTROLES (usa <saída>.dados/ se existir)")
+    parser.add_argument("--top", type=int, default=10, help="pessoas por região nas abas Top (padrão: 10)")
+    parser.add_argument("--saida", default=OUTPUT_FILE, help="arquivo XLSX de saída")
+    args = parser.parse_args(argv)
+
+    df = rg.load_data(args.controles, snapshot=args.consolidado)
+    if df is None or df.empty:
+        print("Nenhum dado de CONTROLES para analisar.")
+        return 1
+    write_workload(workload_tables(df, load_consolidated(args.consolidado), top=args.top), args.saida)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
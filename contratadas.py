@@ -0,0 +1,211 @@
+import hashlib
+import json
+import math
+import os
+import unicodedata
+
+import leitura_planilhas
+
+# Resolução CONTRATADA (ANALITICA) -> RESUMIDO (AUXILIAR) tolerante a variações
+# de grafia ("CONSTRUÇÕES" x "CONSTRUCOES", "SERVIÇO" x "SERVIÇOS"...).
+#
+# O nome normalizado idêntico continua valendo primeiro. Sem ele, o núcleo do
+# nome (sem forma jurídica e conectivos: LTDA, ME, EIRELI, E, DE...) é comparado
+# por trigramas (Dice) com os do AUXILIAR através de um índice invertido: só os
+# nomes que compartilham algum dos trigramas mais raros da consulta são
+# avaliados, sem varrer a lista inteira.
+#
+# Similaridade alta não basta: as palavras que diferem entre os dois nomes
+# precisam ser variações da mesma palavra (plural, "CONSTR" x "CONSTRUCOES").
+# Números diferentes ("CONSTRUTORA 001" x "007") ou palavras diferentes ("SAO
+# JOAO" x "SAO JOSE") indicam outra empresa, por mais parecido que seja o texto.
+#
+# - MEDICOES_CONTRATADA_LIMIAR define a similaridade mínima (padrão 0.9; 1 = só
+#   nomes iguais depois de tirar acentos, pontuação, forma jurídica e plurais)
+# - as consultas aproximadas ficam memorizadas em contratadas.json no diretório
+#   do cache de planilhas (MEDICOES_CACHE=0 desliga), invalidado quando o
+#   mapeamento ou o limiar mudam
+SIMILARITY_THRESHOLD = float(os.environ.get("MEDICOES_CONTRATADA_LIMIAR", "0.9"))
+MEMO_FILE = "contratadas.json"
+MEMO_VERSION = 2
+# Forma jurídica e conectivos: ignorados na comparação
+NOISE_TOKENS = frozenset({"LTDA", "LIMITADA", "ME", "EPP", "MEI", "EIRELI", "SA", "S", "A", "CIA",
+                          "E", "DE", "DA", "DO", "DAS", "DOS"})
+# Plurais em português reduzidos ao singular antes de comparar palavras
+PLURAL_SUFFIXES = (("OES", "AO"), ("AES", "AO"), ("AIS", "AL"), ("EIS", "EL"), ("S", ""))
+MIN_ABBREVIATION = 4
+
+
+def fold_name(name):
+    """Chave de comparação: sem acentos, só letras/dígitos e espaços simples."""
+    decomposed = unicodedata.normalize("NFKD", name.upper())
+    chars = [c if c.isalnum() else " " for c in decomposed if not unicodedata.combining(c)]
+    return " ".join("".join(chars).split())
+
+
+def trigrams(key):
+    """Conjunto de trigramas da chave (com bordas, para valorizar início e fim das palavras)."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def dice(a, b):
+    return 2 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+
+def core_tokens(key):
+    """Palavras da chave sem forma jurídica e conectivos (todas, se só houver essas)."""
+    tokens = key.split()
+    core = [t for t in tokens if t not in NOISE_TOKENS]
+    return core or tokens
+
+
+def _singular(token):
+    for suffix, replacement in PLURAL_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)] + replacement
+    return token
+
+
+def _compare_key(tokens):
+    # Texto comparado por trigramas: núcleo do nome com as palavras no singular
+    return " ".join(_singular(t) for t in tokens)
+
+
+def same_word(a, b):
+    """a e b são a mesma palavra: iguais no singular ou uma é abreviação da outra.
+
+    Palavras com dígitos só valem iguais.
+    """
+    if a == b:
+        return True
+    if any(c.isdigit() for c in a + b):
+        return False
+    if _singular(a) == _singular(b):
+        return True
+    short, long_ = sorted((a, b), key=len)
+    return len(short) >= MIN_ABBREVIATION and long_.startswith(short)
+
+
+def tokens_compatible(query, candidate):
+    """Toda palavra que sobra de um lado casa com uma palavra que sobra do outro (same_word)."""
+    left = list(query)
+    right = list(candidate)
+    for t in query:
+        if t in right:
+            left.remove(t)
+            right.remove(t)
+    for t in left:
+        match = next((r for r in right if same_word(t, r)), None)
+        if match is None:
+            return False
+        right.remove(match)
+    return not right
+
+
+class ContractorResolver:
+    """Mapeamento nome normalizado -> RESUMIDO com busca aproximada por trigramas."""
+
+    def __init__(self, mapping, threshold=None):
+        self.mapping = mapping
+        self.threshold = SIMILARITY_THRESHOLD if threshold is None else threshold
+        # Um registro por chave sem acento; a primeira ocorrência do AUXILIAR vence
+        self.names, self.values, self.tokens, self.grams = [], [], [], []
+        seen = set()
+        for name, resumido in mapping.items():
+            key = fold_name(name)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            tokens = core_tokens(key)
+            self.names.append(name)
+            self.values.append(resumido)
+            self.tokens.append(tokens)
+            self.grams.append(trigrams(_compare_key(tokens)))
+        self.postings = {}
+        for idx, grams in enumerate(self.grams):
+            for g in grams:
+                self.postings.setdefault(g, []).append(idx)
+        self._memo = None
+        self._memo_dirty = False
+
+    def memo_key(self):
+        """Identifica mapeamento + limiar: memo de outra combinação é descartado."""
+        payload = json.dumps([MEMO_VERSION, self.threshold, sorted(self.mapping.items())], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def best_match(self, name):
+        """(RESUMIDO, similaridade, nome no AUXILIAR) do nome mais parecido aceito.
+
+        Aceito = similaridade >= limiar e palavras compatíveis (tokens_compatible).
+        Sem nenhum aceito: (None, maior similaridade encontrada, None).
+        """
+        tokens = core_tokens(fold_name(name))
+        query = trigrams(_compare_key(tokens)) if tokens else set()
+        if not query:
+            return None, 0.0, None
+        t = self.threshold
+        # Limites do filtro: tamanho mínimo do candidato e interseção mínima para chegar ao limiar
+        min_size = math.ceil(t / (2 - t) * len(query)) if t < 2 else len(query)
+        min_overlap = max(1, math.ceil(t * (len(query) + min_size) / 2))
+        # Quem atinge o limiar compartilha ao menos um dos (|consulta| - mínimo + 1) trigramas mais raros
+        rare_first = sorted(query, key=lambda g: (len(self.postings.get(g, ())), g))
+        prefix = rare_first[:max(1, len(query) - min_overlap + 1)]
+        candidates = set()
+        for g in prefix:
+            candidates.update(self.postings.get(g, ()))
+
+        # Do mais parecido para o menos; empate fica com o primeiro do AUXILIAR
+        scored = sorted(((dice(query, self.grams[idx]), idx) for idx in candidates), key=lambda x: (-x[0], x[1]))
+        for score, idx in scored:
+            if score < t:
+                break
+            if tokens_compatible(tokens, self.tokens[idx]):
+                return self.values[idx], round(score, 4), self.names[idx]
+        return None, round(scored[0][0], 4) if scored else 0.0, None
+
+    def resolve(self, name):
+        """RESUMIDO do nome já normalizado (normalize_name), ou None se não houver correspondência."""
+        if name in self.mapping:
+            return self.mapping[name]
+        if not name:
+            return None
+        memo = self._load_memo()
+        if name not in memo:
+            memo[name] = list(self.best_match(name))
+            self._memo_dirty = True
+        return memo[name][0]
+
+    def memo_path(self):
+        """Arquivo JSON com as consultas aproximadas memorizadas."""
+        return os.path.join(leitura_planilhas.CACHE_DIR, MEMO_FILE)
+
+    def _load_memo(self):
+        if self._memo is None:
+            self._memo = {}
+            if leitura_planilhas.CACHE_ENABLED:
+                try:
+                    with open(self.memo_path(), encoding="utf-8") as fh:
+                        stored = json.load(fh)
+                    if stored.get("chave") == self.memo_key():
+                        self._memo = stored.get("nomes", {})
+                except (OSError, ValueError):
+                    pass
+        return self._memo
+
+    def save_memo(self):
+        """Grava as consultas aproximadas novas (sem efeito se nada mudou ou sem cache)."""
+        if not (self._memo_dirty and leitura_planilhas.CACHE_ENABLED):
+            return
+        payload = {"chave": self.memo_key(), "nomes": self._memo}
+        try:
+            os.makedirs(leitura_planilhas.CACHE_DIR, exist_ok=True)
+            leitura_planilhas._atomic_write(
+                self.memo_path(), json.dumps(payload, ensure_ascii=False, indent=1).encode("utf-8"))
+            self._memo_dirty = False
+        except OSError as e:
+            print(f"  Aviso: não foi possível gravar a memória de contratadas: {e}")
+
+    def fuzzy_matches(self):
+        """{nome: (RESUMIDO, similaridade, nome no AUXILIAR)} resolvidos por aproximação nesta memória."""
+        return {name: tuple(v) for name, v in self._load_memo().items() if v[0] is not None}
@@ -0,0 +1,238 @@
+from functools import lru_cache
+import re
+
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+
+# Conversões de células das planilhas. As versões *_series trabalham em lote
+# e preservam exatamente o resultado da versão escalar equivalente.
+
+
+def clean_sei(val):
+    if pd.isna(val): return ""
+    return str(val).strip()
+
+def to_numeric(val):
+    if pd.isna(val): return 0.0
+    if isinstance(val, (int, float)): return float(val)
+    # Remove R$, espaços, pontos de milhar, troca vírgula por ponto
+    s = str(val).replace("R$", "").replace("\xa0", "").replace(" ", "")
+    # Se houver pontos e vírgulas, assume que ponto é milhar e vírgula é decimal
+    if "," in s and "." in s:
+        s = s.replace(".", "").replace(",", ".")
+    elif "," in s:
+        s = s.replace(",", ".")
+    try:
+        f_val: float = float(s)
+        return float(round(f_val, 2)) # type: ignore
+    except:
+        return 0.0
+
+
+def map_unique(series, func):
+    """Aplica func uma única vez por valor distinto da Series e espalha o resultado.
+
+    Colunas como Município, Contratada e datas repetem muito; avaliar só os
+    valores distintos evita uma chamada Python por célula.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    mapped = np.empty(len(uniques), dtype=object)
+    for k, v in enumerate(uniques):
+        mapped[k] = func(v)
+
+    out = np.empty(len(series), dtype=object)
+    valid = codes >= 0
+    out[valid] = mapped[codes[valid]]
+    if not valid.all():
+        # NaN/None recebem o mesmo tratamento que teriam na chamada escalar
+        out[~valid] = func(series[~valid].iloc[0])
+    return pd.Series(out, index=series.index)
+
+
+def round2(values):
+    """round(x, 2) do Python aplicado a um array inteiro.
+
+    np.round só diverge do round() nativo em valores praticamente empatados
+    (terminados em 5 na terceira casa) ou muito grandes; esses poucos casos
+    são recalculados com round() para o resultado sair idêntico.
+    """
+    arr = np.asarray(values, dtype=float)
+    out = np.round(arr, 2)
+    scaled = arr * 100.0
+    with np.errstate(invalid="ignore"):
+        near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+        suspect = (near_tie | (np.abs(arr) >= 1e13)) & np.isfinite(arr)
+    if suspect.any():
+        out[suspect] = [round(v, 2) for v in arr[suspect].tolist()]
+    return out
+
+
+# Número "puro" depois da limpeza de R$, espaços e separadores: é o caso comum
+# e pode ser convertido em bloco; o restante cai no float() escalar.
+_PLAIN_NUMBER_RE = r'^[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?$'
+
+
+def _parse_float_or_none(s):
+    # None = texto irreconhecível; "nan"/"inf" são números válidos para o float()
+    try:
+        return float(round(float(s), 2))
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+def to_numeric_series(series):
+    """Versão em lote de to_numeric.
+
+    Mesma semântica célula a célula: vazio -> 0.0; int/float -> float(valor);
+    texto como "R$ 1.234,56" -> 1234.56 (arredondado em 2 casas); texto "nan"
+    -> NaN (é o que o float() devolve); texto irreconhecível -> 0.0. Retorna
+    (Series float, quantidade de células não vazias que caíram no 0.0 por não
+    serem reconhecidas).
+    """
+    s = pd.Series(series)
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return s.astype(float).fillna(0.0), 0
+
+    out = np.zeros(len(s), dtype=float)
+    na = s.isna().to_numpy()
+    try:
+        # .str.len() é NaN para o que não é texto (números em coluna mista)
+        is_str = s.str.len().notna().to_numpy(dtype=bool)
+    except AttributeError:
+        is_str = np.zeros(len(s), dtype=bool)
+    fallbacks = 0
+
+    # Valores não textuais (números vindos do Excel em coluna mista)
+    other = ~na & ~is_str
+    if other.any():
+        rest = s[other]
+        try:
+            out[other] = rest.astype(float).to_numpy()
+        except (ValueError, TypeError):
+            out[other] = map_unique(rest, to_numeric).to_numpy(dtype=float)
+
+    if is_str.any():
+        txt = s[is_str].astype(object).astype(str)
+        txt = txt.str.replace("R$", "", regex=False).str.replace("\xa0", "", regex=False).str.replace(" ", "", regex=False)
+        has_comma = txt.str.contains(",", regex=False)
+        has_dot = txt.str.contains(".", regex=False)
+        both = has_comma & has_dot
+        txt = txt.where(~both, txt.str.replace(".", "", regex=False))
+        txt = txt.str.replace(",", ".", regex=False)
+
+        plain = txt.str.match(_PLAIN_NUMBER_RE).to_numpy(dtype=bool)
+        vals = np.zeros(len(txt), dtype=float)
+        if plain.any():
+            # float() de cada texto (conversão exata do Python), depois round(x, 2)
+            vals[plain] = round2(txt[plain].to_numpy(dtype=object).astype(float))
+        if not plain.all():
+            parsed = map_unique(txt[~plain], _parse_float_or_none).to_numpy(dtype=object, copy=True)
+            failed = np.array([v is None for v in parsed], dtype=bool)
+            fallbacks = int(failed.sum())
+            parsed[failed] = 0.0
+            vals[~plain] = parsed.astype(float)
+        out[is_str] = vals
+
+    return pd.Series(out, index=s.index), fallbacks
+
+
+def clean_sei_series(series):
+    """Versão em lote de clean_sei: str(valor).strip(), vazio -> ""."""
+    s = pd.Series(series)
+    if pd.api.types.is_string_dtype(s) and s.dtype != object:
+        txt = s
+    elif s.dtype == object or pd.api.types.is_numeric_dtype(s):
+        txt = s.astype(object).where(s.isna(), s.astype(str))
+    else:
+        # Datas, categorias etc.: o astype(str) do pandas formata diferente do
+        # str() de cada valor ("2024-01-01" x "2024-01-01 00:00:00")
+        return map_unique(s, clean_sei).astype(str)
+    if txt.isna().all():
+        # Sem nenhum texto o acessor .str não se aplica
+        return pd.Series("", index=s.index).astype(str)
+    return txt.str.strip().fillna("").astype(str)
+
+
+# Normalização de nomes (contratadas): pontos, traços e barras viram espaço e
+# espaços repetidos são colapsados. Os nomes se repetem muito entre ANALITICA
+# e AUXILIAR, por isso a versão escalar guarda os resultados já calculados.
+NAME_PUNCT_RE = re.compile(r'[\.\-\/]')
+NAME_SPACES_RE = re.compile(r'\s+')
+NAME_CACHE_SIZE = 8192  # folga sobre as poucas centenas de contratadas distintas
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def normalize_name(name):
+    if not name or pd.isna(name): return ""
+    # Remove pontos, traços, barras e espaços múltiplos para comparação
+    n = str(name).upper().strip()
+    n = NAME_PUNCT_RE.sub(' ', n)
+    n = NAME_SPACES_RE.sub(' ', n).strip()
+    return n
+
+
+def normalize_name_series(series):
+    """Versão em lote de normalize_name (Series.str); vazio, NaN e 0 -> ""."""
+    s = pd.Series(series).astype(object)
+    empty = (s.isna() | s.eq("") | s.eq(0)).values
+    n = s.where(empty, s.astype(str)).str.upper().str.strip()
+    n = n.str.replace(NAME_PUNCT_RE, ' ', regex=True)
+    n = n.str.replace(NAME_SPACES_RE, ' ', regex=True).str.strip()
+    return n.where(~empty, "").astype(str)
+
+
+# Mapeamento de meses: número inteiro -> abreviação
+MESES_PT = {1: "JAN", 2: "FEV", 3: "MAR", 4: "ABR", 5: "MAI", 6: "JUN",
+            7: "JUL", 8: "AGO", 9: "SET", 10: "OUT", 11: "NOV", 12: "DEZ"}
+# Mapeamento de nomes completos em português -> abreviação
+MESES_NOME_PT = {
+    "JANEIRO": "JAN", "FEVEREIRO": "FEV", "MARÇO": "MAR", "MARCO": "MAR",
+    "ABRIL": "ABR", "MAIO": "MAI", "JUNHO": "JUN", "JULHO": "JUL",
+    "AGOSTO": "AGO", "SETEMBRO": "SET", "OUTUBRO": "OUT",
+    "NOVEMBRO": "NOV", "DEZEMBRO": "DEZ"
+}
+
+MESES_NUM_PT = {abbr: num for num, abbr in MESES_PT.items()}
+
+
+def month_abbrev(mes_raw):
+    """'Janeiro', 'JANEIRO', 1 ou 1.0 -> 'JAN'. Irreconhecível ou vazio -> 'JAN'."""
+    if pd.isna(mes_raw):
+        return "JAN"
+    mes_val_s = str(mes_raw).strip().upper()
+    if mes_val_s in MESES_NOME_PT:
+        # Nome completo: "Janeiro", "JANEIRO", etc.
+        return MESES_NOME_PT[mes_val_s]
+    # Fallback numérico: 1, 2, ..., 12
+    try:
+        return MESES_PT.get(int(float(mes_val_s)), "JAN")
+    except (ValueError, TypeError, OverflowError):
+        return "JAN"
+
+
+def year_suffix(ano_raw):
+    """2025, 2025.0 ou "2025" -> "25"."""
+    try:
+        ano_s = str(int(float(str(ano_raw))))
+    except (ValueError, TypeError, OverflowError):
+        ano_s = str(ano_raw)
+    return ano_s[-2:] if len(ano_s) >= 2 else ano_s
+
+
+def parse_month_label(label):
+    """'JAN/25' -> (2025, 1); rótulos fora do padrão MMM/AA -> None."""
+    mes, _, ano = str(label).partition("/")
+    if mes not in MESES_NUM_PT or len(ano) != 2 or not ano.isdigit():
+        return None
+    return 2000 + int(ano), MESES_NUM_PT[mes]
+
+
+def month_labels(mes, ano):
+    """Rótulos "MMM/AA" (ex.: "JAN/25") para as colunas Mês e Ano do BASE, em lote.
+
+    Mês e Ano têm poucos valores distintos, então cada um é convertido uma vez
+    por valor e os rótulos são montados por concatenação de colunas.
+    """
+    mes_s = map_unique(pd.Series(mes), month_abbrev)
+    ano_s = map_unique(pd.Series(ano), year_suffix)
+    return (mes_s + "/" + ano_s.values).astype(str)
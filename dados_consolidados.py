@@ -0,0 +1,159 @@
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+
+try:
+    import pyarrow # type: ignore # noqa: F401
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+# Cópia tipada dos dados consolidados, gravada ao lado do MEDIÇÕES_CONSOLIDADO.xlsx
+# (pasta <saída>.dados/) para que o relatório de gestores, o servidor MCP e
+# análises avulsas leiam DataFrames prontos em vez de reinterpretar o XLSX
+# formatado ou as planilhas de entrada.
+#
+# Cada tabela é gravada numa cópia tipada (typed_frame: os "" de preenchimento
+# viram nulos e as colunas numéricas, Int64/Float64) como arquivo Parquet, que
+# pode ser lido com memory_map. Sem o pyarrow instalado, a mesma cópia vai para
+# um pickle do pandas, com aviso. manifest.json registra o formato, as linhas e
+# os tipos de cada tabela.
+# MEDICOES_DADOS=1 liga a gravação sem precisar do --dados.
+SAVE_SNAPSHOT = os.environ.get("MEDICOES_DADOS", "0") != "0"
+SNAPSHOT_SUFFIX = ".dados"
+SNAPSHOT_MANIFEST = "manifest.json"
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_dir(output_path):
+    """Pasta dos dados consolidados de uma saída (ex.: MEDIÇÕES_CONSOLIDADO.dados)."""
+    return os.path.splitext(output_path)[0] + SNAPSHOT_SUFFIX
+
+
+def gestores_frame(comissoes_idx):
+    """Cadastro SEI -> gestor/fiscal/local/status_aux (indice_sei.SeiIndex) como DataFrame."""
+    frame = comissoes_idx.to_frame()
+    frame.columns = [str(c).upper() for c in frame.columns]
+    return frame
+
+
+def _is_number(v):
+    return isinstance(v, (int, float, np.number)) and not isinstance(v, (bool, np.bool_))
+
+
+def _typed_column(s, numeric):
+    if pd.api.types.is_numeric_dtype(s) or pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    blank = (s.isna() | s.astype(object).eq("")).to_numpy(dtype=bool)
+    filled = s[~blank].tolist()
+    if (filled or numeric) and all(_is_number(v) for v in filled):
+        # Números com "" no lugar dos vazios (ex.: PRAZO EXECUÇÃO, MEDIÇÕES ACUMULADAS)
+        integral = bool(filled) and all(isinstance(v, (int, np.integer)) for v in filled)
+        values = pd.Series([None if b else v for v, b in zip(s.tolist(), blank)], index=s.index, dtype=object)
+        return values.astype("Int64" if integral else "Float64")
+    if filled and all(isinstance(v, (datetime, pd.Timestamp)) for v in filled):
+        return pd.to_datetime(s.where(~blank))
+    if s.dtype == object and not all(isinstance(v, str) for v in filled):
+        # Tipos misturados (ex.: data e "-"): texto, mantendo os nulos
+        return s.astype("string")
+    return s
+
+
+def typed_frame(df, numeric_columns=()):
+    """Cópia de df com tipos que o Parquet aceita.
+
+    Colunas de texto só com números e "" (ou só com "", se estiverem em
+    numeric_columns) viram Int64/Float64 com nulos; só com datas e "", datetime;
+    as demais com tipos misturados viram texto.
+    """
+    numeric_columns = set(numeric_columns)
+    return pd.DataFrame({col: _typed_column(df[col], col in numeric_columns) for col in df.columns},
+                        index=df.index, columns=df.columns)
+
+
+def _write_table(folder, name, df):
+    if HAS_PARQUET:
+        path = os.path.join(folder, f"{name}.parquet")
+        df.to_parquet(path, index=False)
+        return "parquet", os.path.basename(path)
+    path = os.path.join(folder, f"{name}.pkl")
+    df.to_pickle(path)
+    return "pickle", os.path.basename(path)
+
+
+def save_snapshot(output_path, tables, extra=None, numeric_columns=()):
+    """Grava {nome: DataFrame} em <saída>.dados/, substituindo a versão anterior de uma vez.
+
+    As tabelas passam por typed_frame(df, numeric_columns). Devolve o caminho
+    da pasta. `extra` entra no manifesto (ex.: contagens).
+    """
+    if not HAS_PARQUET:
+        print("  Aviso: pyarrow não instalado — dados consolidados gravados em pickle "
+              "(sem Parquet nem memory_map).")
+    folder = snapshot_dir(output_path)
+    tmp_folder = f"{folder}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_folder, ignore_errors=True)
+    os.makedirs(tmp_folder)
+
+    manifest = {
+        "versao": SNAPSHOT_VERSION,
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "saida": os.path.basename(output_path),
+        "tabelas": {},
+    }
+    if extra:
+        manifest.update(extra)
+    for name, df in tables.items():
+        df = typed_frame(df, numeric_columns)
+        fmt, filename = _write_table(tmp_folder, name, df)
+        manifest["tabelas"][name] = {
+            "arquivo": filename,
+            "formato": fmt,
+            "linhas": int(len(df)),
+            "colunas": {str(c): str(t) for c, t in df.dtypes.items()},
+        }
+    with open(os.path.join(tmp_folder, SNAPSHOT_MANIFEST), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, ensure_ascii=False, indent=1)
+
+    # Troca a pasta inteira: leitores nunca veem tabelas de execuções diferentes misturadas
+    old_folder = f"{folder}.{os.getpid()}.old"
+    if os.path.exists(folder):
+        os.replace(folder, old_folder)
+    os.replace(tmp_folder, folder)
+    shutil.rmtree(old_folder, ignore_errors=True)
+    return folder
+
+
+def snapshot_manifest(output_path):
+    """Manifesto dos dados consolidados, ou None se ainda não foram gravados."""
+    try:
+        with open(os.path.join(snapshot_dir(output_path), SNAPSHOT_MANIFEST), encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("versao") == SNAPSHOT_VERSION else None
+
+
+def load_snapshot(output_path, names=None):
+    """{nome: DataFrame} gravados por save_snapshot (todas as tabelas, ou só `names`).
+
+    Levanta FileNotFoundError se não houver dados consolidados para a saída.
+    """
+    manifest = snapshot_manifest(output_path)
+    if manifest is None:
+        raise FileNotFoundError(f"Dados consolidados não encontrados em {snapshot_dir(output_path)}")
+    folder = snapshot_dir(output_path)
+    tables = {}
+    for name, info in manifest["tabelas"].items():
+        if names is not None and name not in names:
+            continue
+        path = os.path.join(folder, info["arquivo"])
+        if info["formato"] == "parquet":
+            tables[name] = pd.read_parquet(path, memory_map=True)
+        else:
+            tables[name] = pd.read_pickle(path)
+    return tables
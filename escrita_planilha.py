@@ -0,0 +1,127 @@
+import datetime
+from decimal import Decimal
+
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+from openpyxl import Workbook # type: ignore
+from openpyxl.cell import WriteOnlyCell # type: ignore
+from openpyxl.styles import NamedStyle # type: ignore
+from openpyxl.styles.fonts import DEFAULT_FONT # type: ignore
+from openpyxl.worksheet.cell_range import CellRange # type: ignore
+from openpyxl.utils import get_column_letter # type: ignore
+
+# Gravação de XLSX numa única passada (openpyxl write_only): cada linha sai com
+# o valor e o estilo definitivos, sem gravar, reabrir e formatar de novo.
+# Os estilos são NamedStyles registrados uma vez no workbook e apenas
+# referenciados pelas células.
+
+# Formatos que o pd.ExcelWriter usa por padrão para datas
+DATETIME_FORMAT = "YYYY-MM-DD HH:MM:SS"
+DATE_FORMAT = "YYYY-MM-DD"
+
+
+def excel_value(v):
+    """(valor, formato) como o DataFrame.to_excel gravaria a célula.
+
+    Vazio/NaN/NaT -> ""; inf -> "inf"; tipos numpy -> Python; datas recebem o
+    formato padrão do pandas; objetos não reconhecidos viram texto.
+    """
+    if isinstance(v, str):
+        return v, None
+    if isinstance(v, (bool, np.bool_)):
+        return bool(v), None
+    if isinstance(v, (int, np.integer)):
+        return int(v), None
+    if isinstance(v, (float, np.floating)):
+        if v != v:
+            return "", None
+        if v in (float("inf"), float("-inf")):
+            return ("inf" if v > 0 else "-inf"), None
+        return float(v), None
+    if v is None or (pd.api.types.is_scalar(v) and pd.isna(v)):
+        return "", None
+    if isinstance(v, Decimal):
+        return v, None
+    if isinstance(v, datetime.datetime):
+        if v.tzinfo is not None:
+            raise ValueError("Excel não suporta datas com fuso horário.")
+        return v, DATETIME_FORMAT
+    if isinstance(v, datetime.date):
+        return v, DATE_FORMAT
+    if isinstance(v, datetime.timedelta):
+        return v.total_seconds() / 86400, "0"
+    return str(v), None
+
+
+def streaming_workbook():
+    """Workbook write_only: as linhas vão para o arquivo à medida que são adicionadas."""
+    return Workbook(write_only=True)
+
+
+def add_named_style(wb, name, font=None, fill=None, border=None, alignment=None, number_format=None):
+    """Registra o NamedStyle no workbook (uma vez por nome) e devolve o nome.
+
+    Sem fonte explícita vale a fonte padrão do workbook, como numa célula que
+    só recebeu borda ou formato numérico.
+    """
+    if name not in wb.named_styles:
+        wb.add_named_style(NamedStyle(
+            name=name, font=font or DEFAULT_FONT, fill=fill, border=border,
+            alignment=alignment, number_format=number_format,
+        ))
+    return name
+
+
+def styled_cell(ws, value, style=None, fmt=None):
+    """Célula para ws.append: o próprio valor se não houver estilo nem formato."""
+    if style is None and fmt is None:
+        return value
+    cell = WriteOnlyCell(ws, value=value)
+    if style is not None:
+        cell.style = style
+    if fmt is not None:
+        cell.number_format = fmt
+    return cell
+
+
+def merge_range(ws, start_row, start_column, end_row, end_column):
+    """Mescla o intervalo numa aba write_only (gravado junto com a aba, sem formatar as células).
+
+    Vai direto para o conjunto de intervalos: MultiCellRange.add compara o novo
+    intervalo com todos os já mesclados (quadrático em relatórios longos), e as
+    linhas gravadas em sequência nunca geram intervalos sobrepostos.
+    """
+    ws.merged_cells.ranges.add(CellRange(min_row=start_row, min_col=start_column,
+                                         max_row=end_row, max_col=end_column))
+
+
+def write_frame(wb, title, df, header_styles=None, column_formatters=None, widths=None):
+    """Grava df como uma nova aba de um workbook write_only, linha a linha.
+
+    header_styles: nome do estilo de cada célula do cabeçalho (None = sem estilo);
+    column_formatters: por coluna, função (valor, formato) -> (valor, estilo,
+        formato), chamada com o valor já convertido por excel_value; None mantém
+        a célula como o DataFrame.to_excel a gravaria;
+    widths: largura de cada coluna (None = padrão do Excel).
+    """
+    ws = wb.create_sheet(title)
+    columns = [str(c) for c in df.columns]
+    for idx, width in enumerate(widths or [], start=1):
+        if width is not None:
+            ws.column_dimensions[get_column_letter(idx)].width = width
+
+    header_styles = header_styles or [None] * len(columns)
+    ws.append([styled_cell(ws, name, style) for name, style in zip(columns, header_styles)])
+
+    formatters = column_formatters or [None] * len(columns)
+    values = [df.iloc[:, j].tolist() for j in range(len(columns))]
+    for row in zip(*values):
+        out = []
+        for v, formatter in zip(row, formatters):
+            value, fmt = excel_value(v)
+            style = None
+            if formatter is not None:
+                value, style, fmt = formatter(value, fmt)
+            out.append(styled_cell(ws, value, style, fmt))
+        ws.append(out)
+    return ws
@@ -1,111 +1,44 @@
 
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import glob
+import os
+
 import pandas as pd
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
+from openpyxl.styles import Font, Alignment, Border, Side
+
+from cadastro_controles import load_controles
+from escrita_planilha import add_named_style, merge_range, streaming_workbook, styled_cell
+import leitura_planilhas
+
+# Define paths (default input/output next to the script, as in processa_medicoes)
+CWD = os.path.dirname(os.path.abspath(__file__))
+INPUT_FILE = os.path.join(CWD, "CONTROLES POR COMISSÃO E GESTORES.xlsx")
+OUTPUT_FILE = os.path.join(CWD, "RELATORIO DE OBRAS POR GESTORES E FISCAIS.xlsx")
+ROLLUP_SUFFIX = "CONSOLIDADO"
 
-# Define paths
-INPUT_FILE = r"d:\APRENDIZADO APP\MEDICOES\CONTROLES POR COMISSÃO E GESTORES.xlsx"
-OUTPUT_FILE = r"d:\APRENDIZADO APP\MEDICOES\RELATORIO DE OBRAS POR GESTORES E FISCAIS.xlsx"
+def load_data(file_path, snapshot=None):
+    """One row per CONTROLES record (REGIÃO + the block's columns), or None if it can't be read.
 
-def load_data(file_path):
+    Parsing (region rows, headers, Total rows) is shared with processa_medicoes through
+    cadastro_controles: the workbook is read once per process, and `snapshot` (a
+    processa_medicoes output saved with --dados) skips it when it came from the same file.
+    """
     print(f"Reading {file_path}...")
-    # Load the entire sheet to parse manually due to multi-header structure
     try:
-        df_raw = pd.read_excel(file_path, header=None)
+        df = load_controles(file_path, snapshot=snapshot)
     except Exception as e:
         print(f"Error reading Excel: {e}")
         return None
+    print(f"Records found: {len(df)}")
+    return df
 
-    data_rows = []
-    current_region = None
-    
-    # Iterate rows to find blocks
-    # Structure:
-    # Row N: Region Name (BAIXADA, etc)
-    # Row N+1: Headers (SEI, GESTOR, etc)
-    # Row N+M: Data...
-    
-    # We look for the "SEI" header to identify start of data
-    header_row_idx = -1
-    cols_map = {}
-    
-    # Standard headers we expect
-    expected_headers = ['SEI', 'GESTOR(A) ATUANTE', 'FISCAL NOMEADO', 'MUNICIPIO', 'EMPRESA', '%EXEC', 'STATUS']
-    
-    i = 0
-    while i < len(df_raw):
-        row = df_raw.iloc[i].astype(str).tolist()
-        # Clean row values: handle newlines and strip
-        row_clean = [str(v).replace('\n', ' ').strip().upper() for v in row]
-        
-        # Check if this is a header row
-        # Relaxed check: Look for "SEI" and "GESTOR" part
-        has_sei = "SEI" in row_clean
-        has_gestor = any("GESTOR" in c for c in row_clean)
-        
-        if has_sei and has_gestor:
-            # Found a header row
-            print(f"DEBUG: Found header at row {i}")
-            # The region should be in the row above (i-1) in column 0 or 1
-            if i > 0:
-                possible_region = str(df_raw.iloc[i-1, 0]).strip()
-                if possible_region.lower() == 'nan' or not possible_region:
-                     possible_region = str(df_raw.iloc[i-1, 1]).strip()
-                
-                # If valid region text, use it. Otherwise keep previous or default.
-                if possible_region.upper() not in ['NAN', '', 'TOTAL']:
-                     current_region = possible_region.upper()
-            
-            # Map columns
-            cols_map = {}
-            for idx, val in enumerate(row_clean):
-                 if val:
-                    cols_map[val] = idx
-            
-            print(f"DEBUG: Columns found: {list(cols_map.keys())}")
-
-            # Process data lines until empty line or "Total"
-            j = i + 1
-            while j < len(df_raw):
-                d_row = df_raw.iloc[j]
-                d_row_str = [str(v).strip() for v in d_row]
-                
-                # Check for end of block
-                first_val = d_row_str[0].upper() if len(d_row_str)>0 else ""
-                second_val = d_row_str[1].upper() if len(d_row_str)>1 else ""
-                
-                if not first_val and 'TOTAL' in second_val:
-                    break # End of block
-                if first_val in ['BAIXADA', 'SUL', 'NORTE', 'METROPOLITANA', 'CENTRO'] and j > i+1: 
-                    # If we encounter a region name in col 0, it's likely a header for next block
-                    break 
-                
-                # Check if it has data (SEI usually)
-                if 'SEI' in cols_map:
-                    sei_idx = cols_map['SEI']
-                    sei_val = str(d_row[sei_idx]).strip()
-                    
-                    if sei_val and sei_val.lower() != 'nan' and sei_val.upper() != 'SEI' and "TOTAL" not in sei_val.upper():
-                        # Extract values
-                        record = {'REGIÃO': current_region}
-                        for head, col_idx in cols_map.items():
-                            val = d_row[col_idx]
-                            record[head] = val
-                        data_rows.append(record)
-                
-                j += 1
-            i = j # Move outer loop
-        else:
-            i += 1
-            
-    return pd.DataFrame(data_rows)
-
-def generate_report(df):
-    if df is None or df.empty:
-        print("No data found to generate report.")
-        return
+def explode_people(df):
+    """(df limpo, uma linha por FISCAL_INDIVIDUAL, uma linha por GESTOR_INDIVIDUAL).
 
+    Nomes e região são padronizados (maiúsculas, vazios como NÃO DEFINIDO /
+    SEM REGIÃO) e cada pessoa de um campo "A / B" vira uma linha própria.
+    """
     # Clean Data
     df['GESTOR(A) ATUANTE'] = df['GESTOR(A) ATUANTE'].fillna('NÃO DEFINIDO').astype(str).str.strip().str.upper()
     df['FISCAL NOMEADO'] = df['FISCAL NOMEADO'].fillna('NÃO DEFINIDO').astype(str).str.strip().str.upper()
@@ -119,186 +52,271 @@ def generate_report(df):
     df_g = df.assign(GESTOR_INDIVIDUAL=df['GESTOR(A) ATUANTE'].str.split('/')).explode('GESTOR_INDIVIDUAL')
     df_g['GESTOR_INDIVIDUAL'] = df_g['GESTOR_INDIVIDUAL'].str.strip()
     df_g = df_g[~df_g['GESTOR_INDIVIDUAL'].isin(['', 'NAN'])]
+    return df, df_f, df_g
 
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Resumo Obras"
+def count_by_region(df_x, name_col):
+    """Obras por (REGIÃO, nome) numa única passada de groupby, mais o total geral por nome.
 
-    # Styles
-    title_font = Font(bold=True, size=14)
-    header_font = Font(bold=True, size=12)
-    bold_font = Font(bold=True)
-    
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-    
-    # Title
-    ws.merge_cells("A1:G2")
-    cell = ws.cell(row=1, column=1, value="RELATÓRIO DE OBRAS POR GESTORES E FISCAIS")
-    cell.font = title_font
-    cell.alignment = Alignment(horizontal='center', vertical='center')
-    
-    # Title border
-    for r in range(1, 3):
-        for c in range(1, 8):
-            if c != 4:  # col D is spacing
-                ws.cell(row=r, column=c).border = thin_border
-            
+    Devolve ({região: [(nome, obras), ...]}, [(nome, obras), ...] geral), ordenados por nome.
+    """
+    by_region = df_x.groupby(['REGIÃO', name_col], sort=True).size()
+    overall = by_region.groupby(level=1, sort=True).sum()
+
+    def _table(counts):
+        return list(zip(counts.index.tolist(), counts.astype(int).tolist()))
+
+    per_region = {region: _table(counts.droplevel(0)) for region, counts in by_region.groupby(level=0, sort=False)}
+    return per_region, _table(overall)
+
+# Report layout: two side-by-side tables (FISCAL in A:C, GESTOR in E:G, D is spacing)
+THIN_BORDER = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+REPORT_STYLES = {
+    "Relatório título": dict(font=Font(bold=True, size=14), border=THIN_BORDER,
+                              alignment=Alignment(horizontal='center', vertical='center')),
+    "Relatório cabeçalho": dict(font=Font(bold=True, size=12), border=THIN_BORDER,
+                                 alignment=Alignment(horizontal='center')),
+    "Relatório borda": dict(border=THIN_BORDER),
+    "Relatório centro": dict(border=THIN_BORDER, alignment=Alignment(horizontal='center')),
+    "Relatório esquerda": dict(border=THIN_BORDER, alignment=Alignment(horizontal='left')),
+}
+COLUMN_WIDTHS = {'A': 5, 'B': 45, 'C': 12, 'D': 5, 'E': 5, 'F': 45, 'G': 12}
+SIDES = (1, 5)  # first column of the FISCAL and GESTOR tables
+
+def _side_by_side(ws, left, right, render):
+    """Cells of one row: render(item) for each side, None (no cell) in the spacing column."""
+    row = []
+    for item in (left, right):
+        row.extend(render(item))
+        row.append(None)
+    return row[:-1]
+
+def _region_rows(ws, region, fiscal_counts, gestor_counts):
+    """Header + numbered (nome, obras) rows for one region; empty slots keep the border."""
+    def header(label):
+        return [styled_cell(ws, f"{region} - Obras por {label}", "Relatório cabeçalho"),
+                styled_cell(ws, None, "Relatório borda"), styled_cell(ws, None, "Relatório borda")]
+
+    yield header("FISCAL") + [None] + header("GESTOR")
+
+    def entry(item):
+        if item is None:
+            return [styled_cell(ws, None, "Relatório borda")] * 3
+        i, (name, count) = item
+        return [styled_cell(ws, i, "Relatório centro"), styled_cell(ws, name, "Relatório borda"),
+                styled_cell(ws, count, "Relatório centro")]
+
+    numbered_f = list(enumerate(fiscal_counts, start=1))
+    numbered_g = list(enumerate(gestor_counts, start=1))
+    for i in range(max(len(numbered_f), len(numbered_g))):
+        yield _side_by_side(ws, numbered_f[i] if i < len(numbered_f) else None,
+                            numbered_g[i] if i < len(numbered_g) else None, entry)
+
+def _summary_rows(ws, overall_fiscal, overall_gestor):
+    """Header + (nome, obras) rows of the overall table (names span two merged columns)."""
+    def header(label):
+        return [styled_cell(ws, label, "Relatório cabeçalho"), styled_cell(ws, None, "Relatório borda"),
+                styled_cell(ws, "OBRAS", "Relatório cabeçalho")]
+
+    yield header("FISCAL") + [None] + header("GESTOR")
+
+    def entry(item):
+        if item is None:
+            return [styled_cell(ws, None, "Relatório borda")] * 3
+        name, count = item
+        return [styled_cell(ws, name, "Relatório esquerda"), styled_cell(ws, None, "Relatório borda"),
+                styled_cell(ws, count, "Relatório centro")]
+
+    for i in range(max(len(overall_fiscal), len(overall_gestor))):
+        yield _side_by_side(ws, overall_fiscal[i] if i < len(overall_fiscal) else None,
+                            overall_gestor[i] if i < len(overall_gestor) else None, entry)
+
+def generate_report(df, output_file=None):
+    """Writes the report for df to output_file (default: OUTPUT_FILE); returns the path written."""
+    output_file = output_file or OUTPUT_FILE
+    if df is None or df.empty:
+        print("No data found to generate report.")
+        return
+
+    df, df_f, df_g = explode_people(df)
+
+    # Contagens por região e gerais a partir de um único groupby de cada lista
+    fiscal_by_region, overall_fiscal = count_by_region(df_f, 'FISCAL_INDIVIDUAL')
+    gestor_by_region, overall_gestor = count_by_region(df_g, 'GESTOR_INDIVIDUAL')
+
+    # Write-only workbook: rows are streamed in order, styles are shared named styles
+    wb = streaming_workbook()
+    for name, style in REPORT_STYLES.items():
+        add_named_style(wb, name, **style)
+    ws = wb.create_sheet("Resumo Obras")
+    for col, width in COLUMN_WIDTHS.items():
+        ws.column_dimensions[col].width = width
+
+    # Title (A1:G2, bordered except the spacing column)
+    merge_range(ws, 1, 1, 2, 7)
+    title_row = [styled_cell(ws, None, "Relatório borda")] * 3 + [None] + [styled_cell(ws, None, "Relatório borda")] * 3
+    ws.append([styled_cell(ws, "RELATÓRIO DE OBRAS POR GESTORES E FISCAIS", "Relatório título")] + title_row[1:])
+    ws.append(title_row)
+    ws.append([])
     current_row = 4
-    
+
     regions = df['REGIÃO'].unique()
     regions = sorted([r for r in regions if r.upper() not in ['NAN', '', 'SEM REGIÃO']])
     if 'SEM REGIÃO' in df['REGIÃO'].unique():
         regions.append('SEM REGIÃO')
         
     for region in regions:
-        # Get data for region
-        rf = df_f[df_f['REGIÃO'] == region]
-        rg = df_g[df_g['REGIÃO'] == region]
-        
-        # Aggregate Fiscais
-        fiscal_counts = rf['FISCAL_INDIVIDUAL'].value_counts().reset_index()
-        fiscal_counts.columns = ['Nome', 'Count']
-        fiscal_counts = fiscal_counts.sort_values(by='Nome')
-        
-        # Aggregate Gestores
-        gestor_counts = rg['GESTOR_INDIVIDUAL'].value_counts().reset_index()
-        gestor_counts.columns = ['Nome', 'Count']
-        gestor_counts = gestor_counts.sort_values(by='Nome')
-        
+        fiscal_counts = fiscal_by_region.get(region, [])
+        gestor_counts = gestor_by_region.get(region, [])
+
         # Skip if no data
-        if fiscal_counts.empty and gestor_counts.empty:
+        if not fiscal_counts and not gestor_counts:
             continue
-            
-        # Region Header for Fiscais
-        ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=3)
-        h_f = ws.cell(row=current_row, column=1, value=f"{region} - Obras por FISCAL")
-        h_f.font = header_font
-        h_f.alignment = Alignment(horizontal='center')
-        
-        for c in range(1, 4):
-            ws.cell(row=current_row, column=c).border = thin_border
-            
-        # Region Header for Gestores
-        ws.merge_cells(start_row=current_row, start_column=5, end_row=current_row, end_column=7)
-        h_g = ws.cell(row=current_row, column=5, value=f"{region} - Obras por GESTOR")
-        h_g.font = header_font
-        h_g.alignment = Alignment(horizontal='center')
-        for c in range(5, 8):
-            ws.cell(row=current_row, column=c).border = thin_border
-        
-        current_row += 1
-        
-        max_rows = max(len(fiscal_counts), len(gestor_counts))
-        
-        for i in range(max_rows):
-            # Fiscais Columns
-            if i < len(fiscal_counts):
-                f_row = fiscal_counts.iloc[i]
-                ws.cell(row=current_row + i, column=1, value=i+1).border = thin_border
-                ws.cell(row=current_row + i, column=2, value=f_row['Nome']).border = thin_border
-                ws.cell(row=current_row + i, column=3, value=int(f_row['Count'])).border = thin_border
-                
-                # Alignments
-                ws.cell(row=current_row + i, column=1).alignment = Alignment(horizontal='center')
-                ws.cell(row=current_row + i, column=3).alignment = Alignment(horizontal='center')
-            else:
-                # Fill empty cells with border to keep table rectangular
-                for c in range(1, 4):
-                    ws.cell(row=current_row + i, column=c).border = thin_border
-            
-            # Gestores Columns
-            if i < len(gestor_counts):
-                g_row = gestor_counts.iloc[i]
-                ws.cell(row=current_row + i, column=5, value=i+1).border = thin_border
-                ws.cell(row=current_row + i, column=6, value=g_row['Nome']).border = thin_border
-                ws.cell(row=current_row + i, column=7, value=int(g_row['Count'])).border = thin_border
-                
-                ws.cell(row=current_row + i, column=5).alignment = Alignment(horizontal='center')
-                ws.cell(row=current_row + i, column=7).alignment = Alignment(horizontal='center')
-            else:
-                # Fill empty cells with border
-                for c in range(5, 8):
-                    ws.cell(row=current_row + i, column=c).border = thin_border
-                
-        current_row += max_rows
-        
-        current_row += 3  # Add spacing before next region
-        
-    # --- QUADRO RESUMO GERAL ---
-    current_row += 1
-    
-    # Calcular contagem global (ignorando região)
-    overall_fiscal = df_f['FISCAL_INDIVIDUAL'].value_counts().reset_index()
-    overall_fiscal.columns = ['Nome', 'Count']
-    overall_fiscal = overall_fiscal.sort_values(by='Nome')
-    
-    overall_gestor = df_g['GESTOR_INDIVIDUAL'].value_counts().reset_index()
-    overall_gestor.columns = ['Nome', 'Count']
-    overall_gestor = overall_gestor.sort_values(by='Nome')
-    
-    # Headers do Quadro Geral
-    ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=2)
-    h_f = ws.cell(row=current_row, column=1, value="FISCAL")
-    h_f.font = header_font
-    h_f.alignment = Alignment(horizontal='center')
-    ws.cell(row=current_row, column=3, value="OBRAS").font = header_font
-    ws.cell(row=current_row, column=3).alignment = Alignment(horizontal='center')
-    
-    ws.merge_cells(start_row=current_row, start_column=5, end_row=current_row, end_column=6)
-    h_g = ws.cell(row=current_row, column=5, value="GESTOR")
-    h_g.font = header_font
-    h_g.alignment = Alignment(horizontal='center')
-    ws.cell(row=current_row, column=7, value="OBRAS").font = header_font
-    ws.cell(row=current_row, column=7).alignment = Alignment(horizontal='center')
-    
-    for c in list(range(1, 4)) + list(range(5, 8)):
-        ws.cell(row=current_row, column=c).border = thin_border
+
+        for side in SIDES:
+            merge_range(ws, current_row, side, current_row, side + 2)
+        for row in _region_rows(ws, region, fiscal_counts, gestor_counts):
+            ws.append(row)
+            current_row += 1
+
+        for _ in range(3):  # Add spacing before next region
+            ws.append([])
+        current_row += 3
         
+    # --- QUADRO RESUMO GERAL (contagem global, ignorando região) ---
+    ws.append([])
     current_row += 1
-    
-    max_overall = max(len(overall_fiscal), len(overall_gestor))
-    
-    for i in range(max_overall):
-        # Lado Esquerdo (Fiscal)
-        ws.merge_cells(start_row=current_row + i, start_column=1, end_row=current_row + i, end_column=2)
-        if i < len(overall_fiscal):
-            f_row = overall_fiscal.iloc[i]
-            c_f = ws.cell(row=current_row + i, column=1, value=f_row['Nome'])
-            c_f.alignment = Alignment(horizontal='left')
-            ws.cell(row=current_row + i, column=3, value=int(f_row['Count'])).alignment = Alignment(horizontal='center')
-            
-        for c in range(1, 4):
-            ws.cell(row=current_row + i, column=c).border = thin_border
-            
-        # Lado Direito (Gestor)
-        ws.merge_cells(start_row=current_row + i, start_column=5, end_row=current_row + i, end_column=6)
-        if i < len(overall_gestor):
-            g_row = overall_gestor.iloc[i]
-            c_g = ws.cell(row=current_row + i, column=5, value=g_row['Nome'])
-            c_g.alignment = Alignment(horizontal='left')
-            ws.cell(row=current_row + i, column=7, value=int(g_row['Count'])).alignment = Alignment(horizontal='center')
-            
-        for c in range(5, 8):
-            ws.cell(row=current_row + i, column=c).border = thin_border
-
-    current_row += max_overall
-    
-    current_row += 3
+    for i, row in enumerate(_summary_rows(ws, overall_fiscal, overall_gestor)):
+        for side in SIDES:
+            merge_range(ws, current_row + i, side, current_row + i, side + 1)
+        ws.append(row)
     # --- FIM QUADRO RESUMO GERAL ---
 
-    # Set fixed column widths for the layout
-    ws.column_dimensions['A'].width = 5
-    ws.column_dimensions['B'].width = 45
-    ws.column_dimensions['C'].width = 12
-    ws.column_dimensions['D'].width = 5   # Spacing column
-    ws.column_dimensions['E'].width = 5
-    ws.column_dimensions['F'].width = 45
-    ws.column_dimensions['G'].width = 12
-        
-    wb.save(OUTPUT_FILE)
-    print(f"Report generated: {OUTPUT_FILE}")
+    wb.save(output_file)
+    print(f"Report generated: {output_file}")
+    return output_file
+
+def expand_inputs(patterns):
+    """Input paths from files, directories (their *.xlsx) and glob patterns, in order, without repeats.
+
+    Excel lock files (~$...) are skipped.
+    """
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, "*.xlsx")))
+        else:
+            matches = sorted(glob.glob(pattern)) or [pattern]
+        for path in matches:
+            path = os.path.abspath(path)
+            if not os.path.basename(path).startswith("~$") and path not in paths:
+                paths.append(path)
+    return paths
+
+def report_paths(inputs, output_dir=None):
+    """Output path of each input's report: "<OUTPUT_FILE name> - <input name>.xlsx".
+
+    A single input keeps OUTPUT_FILE's name (and, without output_dir, its folder).
+    Reports go to output_dir, or next to each input.
+    """
+    if len(inputs) == 1 and not output_dir:
+        return {inputs[0]: OUTPUT_FILE}
+    base = os.path.splitext(os.path.basename(OUTPUT_FILE))[0]
+    paths, used = {}, set()
+    for path in inputs:
+        folder = output_dir or os.path.dirname(path)
+        if len(inputs) == 1:
+            name = os.path.basename(OUTPUT_FILE)
+        else:
+            name = f"{base} - {os.path.splitext(os.path.basename(path))[0]}.xlsx"
+        out = os.path.join(folder, name)
+        # Same file name from different folders: number the repeats
+        n = 2
+        while out in used:
+            out = os.path.join(folder, f"{os.path.splitext(name)[0]} ({n}).xlsx")
+            n += 1
+        used.add(out)
+        paths[path] = out
+    return paths
+
+def _report_job(input_path, output_path, snapshot=None):
+    # Runs in a worker process: one input workbook -> one report; the frame goes back for the roll-up
+    df = load_data(input_path, snapshot)
+    if df is None:
+        return None, None
+    return generate_report(df.copy(), output_path), df
+
+def run_batch(inputs, output_dir=None, workers=None, rollup_file=None, rollup=True, snapshot=None):
+    """One report per CONTROLES workbook in `inputs` plus, with more than one input, a combined roll-up.
+
+    Inputs are processed in `workers` processes (default: MEDICOES_WORKERS). The roll-up
+    counts the works of all inputs together and goes to rollup_file (default:
+    "<OUTPUT_FILE name> - CONSOLIDADO.xlsx" in output_dir or next to the first input).
+    `snapshot` is passed to load_data for every input.
+    Returns {input: report path (None if it failed)} and the roll-up path.
+    """
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    outputs = report_paths(inputs, output_dir)
+    workers = leitura_planilhas.WORKERS if workers is None else workers
+    results = {}
+    if workers > 1 and len(inputs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(inputs))) as pool:
+            futures = {path: pool.submit(_report_job, path, outputs[path], snapshot) for path in inputs}
+            for path, future in futures.items():
+                try:
+                    results[path] = future.result()
+                except Exception as e:
+                    print(f"Error generating report for {path}: {e}")
+                    results[path] = (None, None)
+    else:
+        for path in inputs:
+            try:
+                results[path] = _report_job(path, outputs[path], snapshot)
+            except Exception as e:
+                print(f"Error generating report for {path}: {e}")
+                results[path] = (None, None)
+
+    rollup_path = None
+    frames = [df for _, df in results.values() if df is not None and not df.empty]
+    if rollup and len(inputs) > 1 and frames:
+        base = os.path.splitext(os.path.basename(OUTPUT_FILE))[0]
+        rollup_path = rollup_file or os.path.join(output_dir or os.path.dirname(inputs[0]),
+                                                  f"{base} - {ROLLUP_SUFFIX}.xlsx")
+        generate_report(pd.concat(frames, ignore_index=True), rollup_path)
+    return {path: out for path, (out, _) in results.items()}, rollup_path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Relatório de obras por gestores e fiscais a partir de planilhas CONTROLES.")
+    parser.add_argument("inputs", nargs="*", metavar="ENTRADA",
+                        help="planilhas CONTROLES (arquivos, pastas ou padrões como '*.xlsx'; "
+                             f"padrão: {os.path.basename(INPUT_FILE)} ao lado do script)")
+    parser.add_argument("--output-dir", default=None,
+                        help="pasta dos relatórios (padrão: a pasta de cada entrada)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processos gerando relatórios em paralelo (padrão: MEDICOES_WORKERS ou 1)")
+    parser.add_argument("--rollup", default=None, metavar="ARQUIVO",
+                        help=f"caminho do relatório consolidado de todas as entradas "
+                             f"(padrão: '... - {ROLLUP_SUFFIX}.xlsx' na pasta de saída)")
+    parser.add_argument("--no-rollup", action="store_true",
+                        help="não gera o relatório consolidado quando há várias entradas")
+    parser.add_argument("--dados", default=None, metavar="CONSOLIDADO",
+                        help="MEDIÇÕES_CONSOLIDADO.xlsx gerado com --dados: usa os registros de CONTROLES "
+                             "já interpretados em <saída>.dados/ quando vêm da mesma versão da entrada")
+    args = parser.parse_args(argv)
+
+    inputs = expand_inputs(args.inputs or [INPUT_FILE])
+    if not inputs:
+        parser.error("nenhuma planilha de entrada encontrada")
+    reports, rollup_path = run_batch(inputs, output_dir=args.output_dir, workers=args.workers,
+                                     rollup_file=args.rollup, rollup=not args.no_rollup,
+                                     snapshot=args.dados)
+    failed = [path for path, out in reports.items() if out is None]
+    if len(inputs) > 1:
+        print(f"{len(reports) - len(failed)} of {len(inputs)} reports generated")
+        if rollup_path:
+            print(f"Roll-up: {rollup_path}")
+    return 1 if failed else 0
 
 if __name__ == "__main__":
-    df = load_data(INPUT_FILE)
-    if df is not None:
-        generate_report(df)
+    raise SystemExit(main())
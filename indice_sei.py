@@ -0,0 +1,63 @@
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+
+# Índice compacto do cadastro de gestor/fiscal por SEI. Em vez de um dict de
+# dicts (um objeto por contrato e por campo), cada SEI vira um código inteiro e
+# cada campo é um array de códigos apontando para a lista dos valores distintos
+# (há poucos gestores, locais e status para milhares de contratos). Juntar o
+# cadastro a uma coluna de SEIs é então uma busca de códigos e um take em arrays.
+
+
+class SeiIndex:
+    """SEI -> gestor/fiscal/local/status_aux em arrays alinhados pelo código do SEI."""
+
+    FIELDS = ('gestor', 'fiscal', 'local', 'status_aux')
+    # Registro de um SEI fora do cadastro
+    DEFAULTS = {'gestor': '', 'fiscal': '', 'local': 'CIVIS', 'status_aux': ''}
+
+    def __init__(self, seis, codes, categories):
+        self.seis = pd.Index(seis, dtype=object)
+        self.codes = codes            # campo -> np.ndarray int32 (um código por SEI)
+        self.categories = categories  # campo -> np.ndarray object (valores distintos)
+
+    @classmethod
+    def from_map(cls, mapping):
+        """Índice a partir do dict SEI -> {'gestor', 'fiscal', 'local', 'status_aux'}.
+
+        Campos ausentes num registro (ex.: 'fiscal' só com COMISSÕES) ficam "".
+        """
+        codes, categories = {}, {}
+        for field in cls.FIELDS:
+            values = [rec.get(field, "") for rec in mapping.values()]
+            field_codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+            codes[field] = field_codes.astype(np.int32)
+            categories[field] = np.asarray(uniques, dtype=object)
+        return cls(list(mapping.keys()), codes, categories)
+
+    def __len__(self):
+        return len(self.seis)
+
+    def __contains__(self, sei):
+        return sei in self.seis
+
+    def positions(self, seis):
+        """Código de cada SEI no índice (-1 para os que não estão cadastrados)."""
+        return self.seis.get_indexer(pd.Index(seis, dtype=object))
+
+    def lookup(self, seis):
+        """DataFrame (colunas FIELDS, dtype object) alinhado a `seis`; ausentes recebem DEFAULTS."""
+        pos = self.positions(seis)
+        found = pos >= 0
+        out = {}
+        for field in self.FIELDS:
+            col = np.full(len(pos), self.DEFAULTS[field], dtype=object)
+            col[found] = self.categories[field][self.codes[field][pos[found]]]
+            out[field] = pd.Series(col, dtype=object)
+        return pd.DataFrame(out, columns=list(self.FIELDS))
+
+    def to_frame(self):
+        """Uma linha por SEI cadastrado (SEI + FIELDS), na ordem do cadastro."""
+        out = {'SEI': pd.Series(np.asarray(self.seis, dtype=object), dtype=object)}
+        for field in self.FIELDS:
+            out[field] = pd.Series(self.categories[field][self.codes[field]], dtype=object)
+        return pd.DataFrame(out)
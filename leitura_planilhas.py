@@ -0,0 +1,244 @@
+import pandas as pd # type: ignore
+import openpyxl # type: ignore
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
+import pickle
+import warnings
+
+HEADER_FOOTER_WARNING = "Cannot parse header or footer so it will be ignored"
+
+# Cache em disco das planilhas já interpretadas.
+# - MEDICOES_CACHE=0 desliga o cache persistente (o cache em memória continua ativo)
+# - MEDICOES_CACHE_DIR muda o diretório (padrão: .cache_planilhas ao lado do script)
+# - MEDICOES_CACHE_MAX_MB limita o tamanho total; as entradas menos usadas são removidas
+CACHE_ENABLED = os.environ.get("MEDICOES_CACHE", "1") != "0"
+CACHE_DIR = os.environ.get(
+    "MEDICOES_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache_planilhas"),
+)
+CACHE_MAX_BYTES = int(float(os.environ.get("MEDICOES_CACHE_MAX_MB", "512")) * 1024 * 1024)
+# Leitura paralela (prefetch): MEDICOES_WORKERS define quantos processos leem as
+# planilhas de entrada ao mesmo tempo (padrão 1 = leitura sequencial, sob demanda)
+WORKERS = int(os.environ.get("MEDICOES_WORKERS", "1"))
+CACHE_SUFFIX = ".pkl"
+MANIFEST_FILE = "manifest.json"
+
+# Cache em memória: cada par (arquivo, aba, opções de leitura) é lido uma única
+# vez por processo e o DataFrame resultante é compartilhado entre os mapeamentos.
+_SHEET_CACHE = {}
+# Impressões digitais já calculadas: caminho -> {'size', 'mtime_ns', 'sha256'}
+_FINGERPRINTS = None
+# Resultados lidos pelos processos de prefetch(), entregues (uma vez) à próxima
+# chamada de load_cached com a mesma entrada
+_PREFETCHED = {}
+# Nos processos de prefetch(): entradas carregadas pela tarefa em execução
+_CAPTURE = None
+
+
+def read_excel_ignoring_header_footer_warning(*args, **kwargs):
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message=HEADER_FOOTER_WARNING)
+        return pd.read_excel(*args, **kwargs)
+
+
+def load_workbook_ignoring_header_footer_warning(*args, **kwargs):
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message=HEADER_FOOTER_WARNING)
+        return openpyxl.load_workbook(*args, **kwargs)
+
+
+def _atomic_write(path, payload):
+    # Grava em arquivo temporário e troca de uma vez: leitores nunca veem arquivo pela metade
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(payload)
+    os.replace(tmp_path, path)
+
+
+def _load_manifest():
+    global _FINGERPRINTS
+    if _FINGERPRINTS is None:
+        _FINGERPRINTS = {}
+        try:
+            with open(os.path.join(CACHE_DIR, MANIFEST_FILE), encoding="utf-8") as fh:
+                _FINGERPRINTS = json.load(fh)
+        except (OSError, ValueError):
+            pass
+    return _FINGERPRINTS
+
+
+def file_fingerprint(path):
+    """Hash SHA-256 do conteúdo do arquivo.
+
+    Tamanho e mtime funcionam como atalho: se não mudaram desde a última vez,
+    reaproveita o hash registrado no manifesto sem reler o arquivo.
+    """
+    abs_path = os.path.abspath(path)
+    st = os.stat(abs_path)
+    manifest = _load_manifest()
+    entry = manifest.get(abs_path)
+    if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+        return entry["sha256"]
+
+    digest = hashlib.sha256()
+    with open(abs_path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    sha = digest.hexdigest()
+    manifest[abs_path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha}
+    if CACHE_ENABLED:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            _atomic_write(os.path.join(CACHE_DIR, MANIFEST_FILE),
+                          json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8"))
+        except OSError:
+            pass
+    return sha
+
+
+def _entry_path(path, tag):
+    # A versão do pandas entra na chave: objetos serializados por outra versão são descartados
+    raw = "|".join([os.path.abspath(path), file_fingerprint(path), tag, pd.__version__])
+    return os.path.join(CACHE_DIR, hashlib.sha256(raw.encode("utf-8")).hexdigest() + CACHE_SUFFIX)
+
+
+def evict_cache(max_bytes=None):
+    """Remove as entradas menos usadas até o cache caber em max_bytes."""
+    limit = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    try:
+        entries = []
+        for name in os.listdir(CACHE_DIR):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            full = os.path.join(CACHE_DIR, name)
+            st = os.stat(full)
+            entries.append((st.st_mtime, st.st_size, full))
+    except OSError:
+        return
+    total = sum(size for _, size, _ in entries)
+    # mtime é atualizado a cada acerto, então o mais antigo é o menos usado
+    for _, size, full in sorted(entries):
+        if total <= limit:
+            break
+        try:
+            os.remove(full)
+            total -= size
+        except OSError:
+            pass
+
+
+def _load_entry(entry, path, loader):
+    if not CACHE_ENABLED:
+        return loader()
+
+    if os.path.exists(entry):
+        try:
+            with open(entry, "rb") as fh:
+                value = pickle.load(fh)
+            os.utime(entry)
+            return value
+        except Exception as e:
+            print(f"  Aviso: entrada de cache inválida para '{os.path.basename(path)}' ({e}) — relendo.")
+            try:
+                os.remove(entry)
+            except OSError:
+                pass
+
+    value = loader()
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        _atomic_write(entry, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        evict_cache()
+    except OSError as e:
+        print(f"  Aviso: não foi possível gravar cache de '{os.path.basename(path)}': {e}")
+    return value
+
+
+def load_cached(path, tag, loader):
+    """Devolve loader() guardado em disco para esta versão exata do arquivo.
+
+    A chave combina caminho, conteúdo (hash) e `tag`, que deve descrever o que
+    loader() extrai do arquivo. Se o arquivo mudar, a entrada antiga deixa de
+    ser encontrada e acaba removida pela política de tamanho. Resultados já
+    lidos por prefetch() são usados sem nova leitura.
+    """
+    if not (CACHE_ENABLED or _PREFETCHED or _CAPTURE is not None):
+        return loader()
+
+    entry = _entry_path(path, tag)
+    if entry in _PREFETCHED:
+        return _PREFETCHED.pop(entry)
+    value = _load_entry(entry, path, loader)
+    if _CAPTURE is not None:
+        _CAPTURE[entry] = value
+    return value
+
+
+def _prefetch_job(func, args):
+    # Executado no processo filho: roda a leitura e devolve tudo o que passou
+    # por load_cached, junto com as impressões digitais calculadas
+    global _CAPTURE
+    _CAPTURE = {}
+    try:
+        func(*args)
+        return _CAPTURE, _load_manifest()
+    finally:
+        _CAPTURE = None
+
+
+def prefetch(jobs, workers=None):
+    """Executa as leituras `jobs` ([(função, args), ...]) em processos paralelos.
+
+    As funções devem ler via load_cached (read_sheet_cached, detect_tables...).
+    Os resultados voltam serializados com pickle e ficam à espera da chamada
+    equivalente neste processo, que então não relê o arquivo. Com workers <= 1
+    nada é feito e cada leitura acontece normalmente, sob demanda. Uma tarefa
+    que falhe é apenas avisada: a leitura sob demanda refaz e trata o erro.
+    """
+    workers = WORKERS if workers is None else workers
+    if workers <= 1 or len(jobs) < 2:
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        futures = [(pool.submit(_prefetch_job, func, args), func) for func, args in jobs]
+        for future, func in futures:
+            try:
+                values, fingerprints = future.result()
+            except Exception as e:
+                print(f"  Aviso: leitura paralela ({func.__name__}) falhou: {e}")
+                continue
+            _load_manifest().update(fingerprints)
+            _PREFETCHED.update(values)
+
+
+def _cache_key(path, sheet_name, kwargs):
+    # repr() permite opções não "hashable" (ex.: usecols como lista)
+    return (os.path.abspath(path), repr(sheet_name), repr(sorted(kwargs.items())))
+
+
+def read_sheet_cached(path, sheet_name=0, **kwargs):
+    """Lê uma aba do XLSX uma única vez por processo e devolve uma cópia do DataFrame.
+
+    Entre execuções, o resultado fica no cache em disco enquanto o arquivo não mudar.
+    A cópia evita que um chamador que altere colunas/linhas contamine os demais.
+    """
+    key = _cache_key(path, sheet_name, kwargs)
+    if key not in _SHEET_CACHE:
+        _SHEET_CACHE[key] = load_cached(
+            path, f"read_excel:{key[1]}:{key[2]}",
+            lambda: read_excel_ignoring_header_footer_warning(path, sheet_name=sheet_name, **kwargs),
+        )
+    cached = _SHEET_CACHE[key]
+    # sheet_name=None (ou lista) devolve um dict {aba: DataFrame}
+    if isinstance(cached, dict):
+        return {name: df.copy() for name, df in cached.items()}
+    return cached.copy()
+
+
+def clear_sheet_cache():
+    """Descarta todas as abas lidas (ex.: entre duas execuções no mesmo processo)."""
+    global _FINGERPRINTS
+    _SHEET_CACHE.clear()
+    _PREFETCHED.clear()
+    _FINGERPRINTS = None
@@ -0,0 +1,92 @@
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+
+from conversores import parse_month_label
+
+# Medições do BASE como matriz esparsa SEI x mês (formato CSR). Cada contrato
+# só tem medição em alguns meses do histórico; o pivot_table denso alocava uma
+# célula para cada par SEI x mês de todos os anos. Aqui só os pares com
+# lançamento são guardados e as colunas de mês do modelo são extraídas em bloco.
+
+
+class MonthMatrix:
+    """Somas de valor por (SEI, mês) em CSR: linhas = SEIs, colunas = rótulos MMM/AA."""
+
+    def __init__(self, seis, months, indptr, indices, data):
+        self.index = pd.Index(seis, dtype=object)   # SEIs, ordenados como no pivot_table
+        self.columns = pd.Index(months, dtype=object)  # rótulos de mês, ordenados
+        self.indptr = indptr    # linha i ocupa indices/data[indptr[i]:indptr[i+1]]
+        self.indices = indices  # coluna (mês) de cada valor guardado
+        self.data = data        # soma dos valores do BASE naquele SEI/mês
+
+    @classmethod
+    def from_frame(cls, df, index='SEI_CLEAN', columns='MesAno', values='Valor'):
+        """Agrupa df numa única passada (mesma soma por grupo que o pivot_table(aggfunc='sum'))."""
+        sums = df.groupby([index, columns], sort=True)[values].sum()
+        sei_codes, seis = pd.factorize(sums.index.get_level_values(0), sort=True)
+        month_codes, months = pd.factorize(sums.index.get_level_values(1), sort=True)
+        # Grupos já saem ordenados por SEI: o ponteiro de cada linha é uma contagem acumulada
+        indptr = np.zeros(len(seis) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sei_codes, minlength=len(seis)), out=indptr[1:])
+        return cls(seis, months, indptr, month_codes.astype(np.int32),
+                   sums.to_numpy(dtype=float, na_value=0.0))
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def nnz(self):
+        """Quantidade de pares SEI/mês com lançamento."""
+        return len(self.data)
+
+    def take(self, seis, months):
+        """Matriz densa len(seis) x len(months); SEIs ou meses sem lançamento valem 0.0."""
+        out = np.zeros((len(seis), len(months)))
+        rows = self.index.get_indexer(pd.Index(seis, dtype=object))
+        col_map = np.full(len(self.columns), -1, dtype=np.int64)
+        wanted = self.columns.get_indexer(pd.Index(months, dtype=object))
+        col_map[wanted[wanted >= 0]] = np.flatnonzero(wanted >= 0)
+
+        found = np.flatnonzero(rows >= 0)
+        starts = self.indptr[rows[found]]
+        lengths = self.indptr[rows[found] + 1] - starts
+        # Posições de todos os valores das linhas pedidas, sem laço por SEI
+        out_rows = np.repeat(found, lengths)
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        pos = np.repeat(starts, lengths) + offsets
+        out_cols = col_map[self.indices[pos]]
+        keep = out_cols >= 0
+        out[out_rows[keep], out_cols[keep]] = self.data[pos[keep]]
+        return out
+
+    def year_totals(self, seis):
+        """{ano: total por SEI} para cada ano com lançamento no BASE.
+
+        Somado direto dos valores guardados, sem montar a matriz densa: os
+        meses de cada ano são acumulados em ordem cronológica (JAN..DEZ), a
+        mesma ordem das colunas do modelo, para o arredondamento sair igual.
+        """
+        dated = sorted((ym, j) for j, label in enumerate(self.columns)
+                       if (ym := parse_month_label(label)) is not None)
+        entry_rows = np.repeat(np.arange(len(self.index)), np.diff(self.indptr))
+        # Valores agrupados por coluna; cada SEI aparece no máximo uma vez por coluna
+        by_col = np.argsort(self.indices, kind='stable')
+        bounds = np.searchsorted(self.indices[by_col], np.arange(len(self.columns) + 1))
+        sums = {}
+        for (year, _), j in dated:
+            seg = by_col[bounds[j]:bounds[j + 1]]
+            total = sums.setdefault(year, np.zeros(len(self.index)))
+            total[entry_rows[seg]] += self.data[seg]
+
+        rows = self.index.get_indexer(pd.Index(seis, dtype=object))
+        found = rows >= 0
+        out = {}
+        for year, total in sums.items():
+            out[year] = np.zeros(len(rows))
+            out[year][found] = total[rows[found]]
+        return out
+
+    def to_frame(self):
+        """Versão densa (equivalente ao pivot_table(...).fillna(0)), para inspeção."""
+        return pd.DataFrame(self.take(self.index, self.columns), index=self.index, columns=self.columns)
+
@@ -0,0 +1,116 @@
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource # type: ignore
+except ImportError:  # Windows: sem getrusage, o pico de RSS fica de fora
+    resource = None
+
+# Medição por etapa de uma execução: tempo de parede, tempo de CPU, pico de
+# memória e quantidade de linhas. Cada etapa vira uma linha JSON (acrescentada
+# ao arquivo de perfil, para comparar execuções ao longo dos meses) e, no fim,
+# uma tabela-resumo é impressa.
+#
+# MEDICOES_PROFILE=1 liga o perfil com o arquivo padrão; outro valor é usado
+# como caminho do arquivo JSON lines. MEDICOES_PROFILE_TRACEMALLOC=1 mede também
+# o pico de memória alocada pelo Python em cada etapa (tracemalloc deixa o
+# código Python várias vezes mais lento, por isso fica desligado por padrão).
+PROFILE_ENV = os.environ.get("MEDICOES_PROFILE", "")
+TRACEMALLOC_ENV = os.environ.get("MEDICOES_PROFILE_TRACEMALLOC", "0") != "0"
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class StageProfiler:
+    """Cronometra as etapas de um pipeline; desligado, stage() não mede nada."""
+
+    def __init__(self, enabled=False, output=None, label=None, trace_memory=None):
+        self.enabled = enabled
+        self.output = output
+        self.run_id = datetime.now().isoformat(timespec="seconds")
+        self.label = label
+        self.records = []
+        self.trace_memory = enabled and (TRACEMALLOC_ENV if trace_memory is None else trace_memory)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        """Mede o bloco; o chamador pode preencher info['linhas'] (e outros campos)."""
+        info = {}
+        if not self.enabled:
+            yield info
+            return
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield info
+        finally:
+            record = {
+                "execucao": self.run_id,
+                "entrada": self.label,
+                "etapa": name,
+                "tempo_s": round(time.perf_counter() - wall0, 4),
+                "cpu_s": round(time.process_time() - cpu0, 4),
+                "pico_tracemalloc_mb": (round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+                                        if self.trace_memory else None),
+                "pico_rss_mb": _peak_rss_mb(),
+            }
+            record.update(info)
+            self.records.append(record)
+            self._emit(record)
+
+    def _emit(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        if not self.output:
+            print(line)
+            return
+        try:
+            with open(self.output, "a", encoding="utf-8") as fh:
+                fh.write(line + "\n")
+        except OSError as e:
+            print(f"  Aviso: não foi possível gravar o perfil em '{self.output}': {e}")
+            self.output = None
+            print(line)
+
+    def summary(self):
+        """Tabela com as etapas medidas (vazia se o perfil estiver desligado)."""
+        if not self.records:
+            return ""
+        total_wall = sum(r["tempo_s"] for r in self.records) or 1.0
+        lines = [f"{'etapa':<22}{'tempo (s)':>11}{'%':>7}{'cpu (s)':>10}{'tracemalloc MB':>16}{'RSS MB':>9}{'linhas':>9}"]
+        for r in self.records:
+            rss = "-" if r["pico_rss_mb"] is None else f"{r['pico_rss_mb']:.1f}"
+            traced = "-" if r["pico_tracemalloc_mb"] is None else f"{r['pico_tracemalloc_mb']:.1f}"
+            rows = r.get("linhas", "")
+            lines.append(
+                f"{r['etapa']:<22}{r['tempo_s']:>11.3f}{100 * r['tempo_s'] / total_wall:>7.1f}"
+                f"{r['cpu_s']:>10.3f}{traced:>16}{rss:>9}{rows!s:>9}"
+            )
+        lines.append(f"{'total':<22}{total_wall:>11.3f}")
+        return "\n".join(lines)
+
+
+def profiler_from_env(flag=None, default_output=None, label=None):
+    """StageProfiler a partir do argumento --profile (flag) ou de MEDICOES_PROFILE.
+
+    flag/ambiente "1" (ou flag True) usam default_output; outro texto é o
+    caminho do arquivo JSON lines. Sem nenhum dos dois, o perfil fica desligado.
+    """
+    value = flag if flag not in (None, False) else PROFILE_ENV
+    if not value or value == "0":
+        return StageProfiler(enabled=False)
+    output = default_output if value in (True, "1") else value
+    return StageProfiler(enabled=True, output=output, label=label)
@@ -1,12 +1,46 @@
 from typing import Any # type: ignore
+import numpy as np # type: ignore
 import pandas as pd # type: ignore
-import openpyxl # type: ignore
 from openpyxl.styles import PatternFill, Font, Alignment, Border, Side # type: ignore
 from openpyxl.utils import get_column_letter # type: ignore
-from datetime import datetime
+import argparse
+import hashlib
 import os
+import pickle
 import re
-import warnings
+
+from leitura_planilhas import (
+    load_workbook_ignoring_header_footer_warning,
+    load_cached,
+    prefetch,
+    read_sheet_cached,
+)
+from blocos_planilha import (
+    COMISSOES_SPEC,
+    CONTROLES_RELATORIO_SPEC,
+    cell_at,
+    cell_text,
+    detect_tables,
+    read_workbook_tables,
+)
+from escrita_planilha import (
+    DATE_FORMAT,
+    DATETIME_FORMAT,
+    add_named_style,
+    streaming_workbook,
+    write_frame,
+)
+from perfil_execucao import profiler_from_env
+from indice_sei import SeiIndex
+from contratadas import ContractorResolver
+from matriz_medicoes import MonthMatrix
+from dados_consolidados import SAVE_SNAPSHOT, gestores_frame, save_snapshot
+from cadastro_controles import cadastro_records, controles_snapshot, load_controles
+import gera_relatorio_gestores
+from conversores import (
+    clean_sei, clean_sei_series, to_numeric_series, map_unique, round2, month_labels,
+    normalize_name, normalize_name_series,
+)
 
 # Caminhos dos arquivos
 # Usa o diretório do próprio script para funcionar tanto no Windows quanto aqui.
@@ -18,43 +52,14 @@ FILE_COMISSOES = os.path.join(CWD, "COMISSÕES POR REGIAO.xlsx")
 FILE_CONTROLES = os.path.join(CWD, "CONTROLES POR COMISSÃO E GESTORES.xlsx")
 FILE_OUTPUT = os.path.join(CWD, "MEDIÇÕES_CONSOLIDADO.xlsx")
 
-HEADER_FOOTER_WARNING = "Cannot parse header or footer so it will be ignored"
-
-
-def read_excel_ignoring_header_footer_warning(*args, **kwargs):
-    with warnings.catch_warnings():
-        warnings.filterwarnings("ignore", message=HEADER_FOOTER_WARNING)
-        return pd.read_excel(*args, **kwargs)
-
-
-def load_workbook_ignoring_header_footer_warning(*args, **kwargs):
-    with warnings.catch_warnings():
-        warnings.filterwarnings("ignore", message=HEADER_FOOTER_WARNING)
-        return openpyxl.load_workbook(*args, **kwargs)
-
-def clean_sei(val):
-    if pd.isna(val): return ""
-    return str(val).strip()
-
-def to_numeric(val):
-    if pd.isna(val): return 0.0
-    if isinstance(val, (int, float)): return float(val)
-    # Remove R$, espaços, pontos de milhar, troca vírgula por ponto
-    s = str(val).replace("R$", "").replace("\xa0", "").replace(" ", "")
-    # Se houver pontos e vírgulas, assume que ponto é milhar e vírgula é decimal
-    if "," in s and "." in s:
-        s = s.replace(".", "").replace(",", ".")
-    elif "," in s:
-        s = s.replace(",", ".")
-    try:
-        f_val: float = float(s)
-        return float(round(f_val, 2)) # type: ignore
-    except:
-        return 0.0
+def load_auxiliar():
+    # AUXILIAR.xlsx é compartilhado por vários mapeamentos: lido uma vez por processo
+    return read_sheet_cached(FILE_AUXILIAR, sheet_name="AUXILIAR")
 
-def get_region_mapping():
+def get_region_mapping(df_aux=None):
     # Lê AUXILIAR.xlsx para mapear Município -> Região
-    df_aux = pd.read_excel(FILE_AUXILIAR, sheet_name="AUXILIAR")
+    if df_aux is None:
+        df_aux = load_auxiliar()
     mapping = {}
     siglas = {
         "BAIXADA": "BX",
@@ -72,47 +77,61 @@ def get_region_mapping():
                 mapping[str(muni).strip().upper()] = sigla
     return mapping
 
-def normalize_name(name):
-    if not name or pd.isna(name): return ""
-    # Remove pontos, traços, barras e espaços múltiplos para comparação
-    n = str(name).upper().strip()
-    n = re.sub(r'[\.\-\/]', ' ', n)
-    n = re.sub(r'\s+', ' ', n).strip()
-    return n
-
-def get_contractor_mapping():
+def get_contractor_mapping(df_aux=None):
     # Lê AUXILIAR.xlsx para mapear CONTRATADA -> RESUMIDO
-    df_aux = pd.read_excel(FILE_AUXILIAR, sheet_name="AUXILIAR")
+    if df_aux is None:
+        df_aux = load_auxiliar()
     mapping = {}
     if 'CONTRATADA' in df_aux.columns and 'RESUMIDO' in df_aux.columns:
-        for _, row in df_aux[['CONTRATADA', 'RESUMIDO']].dropna(subset=['CONTRATADA', 'RESUMIDO']).iterrows():
-            orig = normalize_name(row['CONTRATADA'])
-            res = str(row['RESUMIDO']).strip()
+        pares = df_aux[['CONTRATADA', 'RESUMIDO']].dropna(subset=['CONTRATADA', 'RESUMIDO'])
+        # Normalização em lote; repetições de CONTRATADA ficam com o último RESUMIDO
+        originais = normalize_name_series(pares['CONTRATADA'])
+        for orig, res in zip(originais.tolist(), pares['RESUMIDO'].tolist()):
             if orig:
-                mapping[orig] = res
+                mapping[orig] = str(res).strip()
     return mapping
 
-def get_concluidas_sei() -> Any:
+def get_concluidas_sei(df_aux=None) -> Any:
     # Lê AUXILIAR.xlsx para obter lista de SEIs que devem ser tratados como CONCLUÍDOS
     # (Tabela "CONCLUIDAS" mencionada - coluna SEI no arquivo AUXILIAR)
     try:
-        df_aux = pd.read_excel(FILE_AUXILIAR, sheet_name="AUXILIAR")
+        if df_aux is None:
+            df_aux = load_auxiliar()
         if 'SEI' in df_aux.columns:
             # Pega todos os SEIs da coluna, limpa e retorna como um set
-            concluidas = df_aux['SEI'].dropna().apply(clean_sei).unique()
+            concluidas = clean_sei_series(df_aux['SEI'].dropna()).unique()
             return set(concluidas)
     except Exception as e:
         print(f"Erro ao ler SEIs concluídos de AUXILIAR.xlsx: {e}")
     return set()
 
-def get_comissoes_data():
-    xl = pd.ExcelFile(FILE_COMISSOES)
+def read_comissoes_workbook(path=None):
+    """COMISSÕES POR REGIAO.xlsx numa única abertura: (aba AUXILIAR ou None, {aba regional: blocos})."""
+    return read_workbook_tables(path or FILE_COMISSOES, COMISSOES_SPEC, frame_sheet="AUXILIAR")
+
+def _comissoes_columns(block):
+    """(coluna do SEI, coluna do gestor) de uma aba regional.
+
+    Com colunas repetidas vale a última: "SEI"/"PROCESSO SEI" e a última cujo
+    cabeçalho contém GESTOR, como na leitura original das abas regionais (o
+    TableBlock.columns prefere a variação de maior prioridade).
+    """
+    sei_idx = max(idx for name, idx in block.header.items() if name in ("SEI", "PROCESSO SEI"))
+    gestor_idx = max(idx for name, idx in block.header.items() if "GESTOR" in name)
+    return sei_idx, gestor_idx
+
+def merge_comissoes(df_aux, regional_tables):
+    """SEI -> {'gestor', 'status_aux', 'local'} a partir das duas fontes do COMISSÕES POR REGIAO.
+
+    A AUXILIAR entra primeiro (STATUS, LOCAL e gestor de fallback); as abas
+    regionais, na ordem em que aparecem no arquivo, sobrescrevem LOCAL e o
+    gestor preenchido. Com as mesmas entradas o resultado é sempre o mesmo.
+    """
     data = {}
 
     # --- PASSO 1: Lê a aba AUXILIAR para STATUS e LOCAL (gestor aqui é apenas fallback) ---
-    aux_sheet = next((s for s in xl.sheet_names if s.upper() == "AUXILIAR"), None)
-    if aux_sheet:
-        df_aux = pd.read_excel(FILE_COMISSOES, sheet_name=aux_sheet)
+    if df_aux is not None:
+        df_aux = df_aux.copy()
         df_aux.columns = [str(c).replace("\n", " ").upper().strip() for c in df_aux.columns]
         if 'SEI' in df_aux.columns:
             for _, row in df_aux.iterrows():
@@ -133,7 +152,7 @@ def get_comissoes_data():
                 }
 
     # --- PASSO 2: Abas regionais — fonte primária do GESTOR(A) ATUANTE por SEI ---
-    for sheet in xl.sheet_names:
+    for sheet, blocks in regional_tables.items():
         if sheet.upper() == "AUXILIAR":
             continue
 
@@ -143,41 +162,17 @@ def get_comissoes_data():
         elif sheet.upper() == "ESPECIAIS":
             local_val = "ESPECIAIS"
 
-        df = pd.read_excel(FILE_COMISSOES, sheet_name=sheet, header=None)
-
-        sei_idx    = None
-        gestor_idx = None
-        start_row  = 0
-
-        # Detecta linha de cabeçalho e índices das colunas SEI e GESTOR(A) ATUANTE
-        for i in range(min(10, len(df))):
-            row_vals = df.iloc[i].fillna("").astype(str).str.upper().tolist()
-            s, g = None, None
-            for j, val in enumerate(row_vals):
-                v = val.replace("\n", " ").strip()
-                if v in ("SEI", "PROCESSO SEI"):
-                    s = j
-                # Aceita qualquer variação: GESTOR(A) ATUANTE, GESTOR ATUANTE, GESTOR(A), GESTOR
-                if any(x in v for x in ["GESTOR(A) ATUANTE", "GESTOR ATUANTE", "GESTOR(A)", "GESTOR"]):
-                    g = j
-            if s is not None and g is not None:
-                sei_idx, gestor_idx, start_row = s, g, i + 1
-                break
-
-        if sei_idx is None:
+        if not blocks:
             print(f"  Aviso: coluna SEI não encontrada na aba '{sheet}' — pulando.")
             continue
+        block = blocks[0]
+        sei_idx, gestor_idx = _comissoes_columns(block)
 
-        for i in range(start_row, len(df)):
-            row = df.iloc[i]
-            sei = clean_sei(row[sei_idx])
-            if not sei or sei.upper() == "NAN":
-                continue
+        for _, values in block.rows:
+            sei = clean_sei(cell_at(values, sei_idx))
 
             # Lê o GESTOR(A) ATUANTE da aba regional
-            gestor_regional = ""
-            if gestor_idx is not None and pd.notna(row[gestor_idx]):
-                gestor_regional = str(row[gestor_idx]).strip()
+            gestor_regional = cell_text(cell_at(values, gestor_idx))
 
             if sei not in data:
                 # Novo registro: cria com dados da aba regional
@@ -195,6 +190,11 @@ def get_comissoes_data():
 
     return data
 
+def get_comissoes_data():
+    # Aba AUXILIAR e abas regionais (cabeçalho nas 10 primeiras linhas) lidas de uma vez
+    df_aux, regional_tables = read_comissoes_workbook(FILE_COMISSOES)
+    return merge_comissoes(df_aux, regional_tables)
+
 def get_gestor_fiscal_data():
     """Unifica dados de GESTOR e FISCAL dos dois arquivos de controles/comissões."""
     # 1. Dados do COMISSÕES POR REGIAO.xlsx (Fonte tradicional)
@@ -206,220 +206,210 @@ def get_gestor_fiscal_data():
     # 2. Dados do CONTROLES POR COMISSÃO E GESTORES.xlsx (Fonte mais atualizada/detalhada)
     if os.path.exists(FILE_CONTROLES):
         try:
-            # Lê todas as tabelas ou o sheet Planilha1
-            df_ctrl_raw = read_excel_ignoring_header_footer_warning(FILE_CONTROLES, header=None)
-            
-            # Percorre o arquivo buscando blocos de dados (SEI e GESTOR)
-            for i in range(len(df_ctrl_raw)): # type: ignore
-                # Limpa novos nomes de colunas (remove \n e espaços extras)
-                row_vals = [str(v).replace("\n", " ").strip().upper() for v in df_ctrl_raw.iloc[i].fillna("").astype(str)] # type: ignore
-                if "SEI" in row_vals and any("GESTOR" in v for v in row_vals):
-                    # Achou cabeçalho
-                    cols = {v: idx for idx, v in enumerate(row_vals) if v}
-                    
-                    # Identifica índices exatos para evitar fallback para 0 (SEI)
-                    sei_idx = cols.get("SEI")
-                    gestor_idx = None
-                    for gk in ["GESTOR(A) ATUANTE", "GESTOR ATUANTE", "GESTOR(A)", "GESTOR"]:
-                        if gk in cols:
-                            gestor_idx = cols[gk]
-                            break
-                    
-                    if sei_idx is None or gestor_idx is None:
-                        continue
-
-                    # Processa linhas abaixo até encontrar vazio
-                    for j in range(i + 1, len(df_ctrl_raw)):
-                        d_row = df_ctrl_raw.iloc[j]
-                        sei_orig = str(d_row[sei_idx]).strip()
-                        sei = clean_sei(sei_orig)
-                        if not sei or sei.upper() == "NAN" or "TOTAL" in sei.upper():
-                            if not sei_orig or sei_orig.upper() == "NAN": break
-                            else: continue
-                        
-                        gestor = str(d_row[gestor_idx]).strip()
-                        fiscal = ""
-                        for fk in ["FISCAL NOMEADO", "FISCAL", "FISCAL(A)"]:
-                            if fk in cols:
-                                fiscal = str(d_row[cols[fk]]).strip()
-                                break
-                        
-                        status_val = ""
-                        if "STATUS" in cols:
-                            status_val = str(d_row[cols["STATUS"]]).strip().upper().replace("#", "")
-
-                        if sei not in data:
-                            data[sei] = {'gestor': gestor, 'fiscal': fiscal, 'local': 'CIVIS', 'status_aux': status_val} # type: ignore
-                        else:
-                            # Prioriza dados do arquivo de CONTROLES se preenchidos
-                            if gestor and gestor.upper() != "NAN": data[sei]['gestor'] = gestor # type: ignore
-                            if fiscal and fiscal.upper() != "NAN": data[sei]['fiscal'] = fiscal # type: ignore
-                            if status_val: data[sei]['status_aux'] = status_val # type: ignore
+            # Registros dos blocos (cabeçalho com SEI e GESTOR), já sem TOTAL e até a
+            # primeira linha sem SEI de cada bloco; mesma leitura do relatório de gestores
+            for record in cadastro_records(FILE_CONTROLES):
+                sei = clean_sei(record.get("SEI"))
+                gestor = cell_text(record.get("GESTOR(A) ATUANTE"))
+                fiscal = cell_text(record.get("FISCAL NOMEADO"))
+                status_val = cell_text(record.get("STATUS")).upper().replace("#", "")
+
+                if sei not in data:
+                    data[sei] = {'gestor': gestor, 'fiscal': fiscal, 'local': 'CIVIS', 'status_aux': status_val} # type: ignore
+                else:
+                    # Prioriza dados do arquivo de CONTROLES se preenchidos
+                    if gestor and gestor.upper() != "NAN": data[sei]['gestor'] = gestor # type: ignore
+                    if fiscal and fiscal.upper() != "NAN": data[sei]['fiscal'] = fiscal # type: ignore
+                    if status_val: data[sei]['status_aux'] = status_val # type: ignore
         except Exception as e:
             print(f"Erro ao ler arquivo de controles: {e}")
 
     return data
 
-def apply_sheet_formatting(ws, col_map, header, all_months, model_widths, model_header_style,
-                           h_vlr_contr, h_med_acum, h_saldo, h_inicio):
-    """Aplica formatação idêntica (cabeçalhos, cores, bordas, larguras) a uma worksheet."""
-    
-    # Border style
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    # Fill colors
-    fill_header = PatternFill(start_color="E6E6E6", end_color="E6E6E6", fill_type="solid")
-
-    # Colors for LOCAL (vibrantes conforme imagem)
-    fills_local = {
-        "CIVIS": PatternFill(start_color="F4B084", end_color="F4B084", fill_type="solid"),        # Laranja
-        "CONTINGENCIA": PatternFill(start_color="FFFF99", end_color="FFFF99", fill_type="solid"),  # Amarelo
-        "ESPECIAIS": PatternFill(start_color="C6E0B4", end_color="C6E0B4", fill_type="solid")     # Verde Água
-    }
+# Estilos das abas Medições/PROBLEMAS
+THIN_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+FILL_HEADER = PatternFill(start_color="E6E6E6", end_color="E6E6E6", fill_type="solid")
+HEADER_ALIGNMENT = Alignment(wrapText=True, horizontal='center', vertical='center')
+
+# Colors for LOCAL (vibrantes conforme imagem)
+FILLS_LOCAL = {
+    "CIVIS": PatternFill(start_color="F4B084", end_color="F4B084", fill_type="solid"),        # Laranja
+    "CONTINGENCIA": PatternFill(start_color="FFFF99", end_color="FFFF99", fill_type="solid"),  # Amarelo
+    "ESPECIAIS": PatternFill(start_color="C6E0B4", end_color="C6E0B4", fill_type="solid")     # Verde Água
+}
+
+FILLS_REGIAO = {
+    "SL": PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid"),
+    "NT": PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid"),
+    "BX": PatternFill(start_color="FCE4D6", end_color="FCE4D6", fill_type="solid"),
+    "MT": PatternFill(start_color="00B0F0", end_color="00B0F0", fill_type="solid")
+}
+
+MONEY_FORMAT = '_-R$ * #,##0.00_-;_-R$ * -#,##0.00_-;_-R$ * "-"??_-;_-@_-'
+DATE_FORMAT_BR = 'DD/MM/YYYY'
+PERCENT_FORMAT = '0.00%'
+MONEY_KEYWORDS = ("VLR", "VALOR", "SALDO", "MEDIÇÕES", "MEDICOES")
+DATE_COLUMNS = ("ORDEM DE INÍCIO", "DATA FINAL", "Prazo Final", "Ordem de Início")
+
+
+def is_money_column(name):
+    """Meses (JAN/25) e colunas de valor (VLR, SALDO, MEDIÇÕES...) recebem formato de moeda."""
+    # Evita "MEDIÇÕES 2025" se for só contagem, mas aqui é valor, então ok
+    return bool(MONTH_COL_RE.match(name.replace(" ", ""))) or any(k in name.upper() for k in MONEY_KEYWORDS)
+
+
+def money_cell_value(value):
+    """Valor gravado numa célula de moeda: número arredondado em 2 casas; vazio ou texto inválido -> 0.0."""
+    try:
+        if value is not None:
+            val_clean = str(value).replace('R$', '').replace(' ', '')
+            if ',' in val_clean and '.' not in val_clean:
+                val_clean = val_clean.replace(',', '.')
+            return float(round(float(val_clean), 2))
+        return 0.0
+    except:
+        return 0.0
 
-    fills_regiao = {
-        "SL": PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid"),
-        "NT": PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid"),
-        "BX": PatternFill(start_color="FCE4D6", end_color="FCE4D6", fill_type="solid"),
-        "MT": PatternFill(start_color="00B0F0", end_color="00B0F0", fill_type="solid")
-    }
 
-    # Header format
-    for cell in ws[1]:
-        name_in_cell = str(cell.value).replace('\n', ' ').strip()
+def header_style(name, model_header_style):
+    """(fill, font) do cabeçalho: copiados do modelo quando a coluna existe nele."""
+    if name in model_header_style:
+        style = model_header_style[name]
+        if style['fill'] and style['fill'] != '00000000':
+            fill = PatternFill(start_color=style['fill'], end_color=style['fill'], fill_type="solid")
+        else:
+            fill = FILL_HEADER  # Fallback cinza
+        return fill, Font(bold=style['font_bold'], color=style['font_color'])
+    return FILL_HEADER, Font(bold=True)
+
+
+def column_width(val_header, model_widths):
+    """Largura da coluna: a do modelo, ajustada por tipo de coluna."""
+    # Base width from model or fallback
+    width = model_widths.get(val_header, 15)
+
+    # Sanity checks and adjustments
+    # 1. Currency Columns (Months and Totals)
+    if is_money_column(val_header):
+        # Mantemos 20 para meses normais, mas permitimos exceções abaixo
+        width = max(width, 20)
+
+    # 2. Date Columns
+    if any(k in val_header.upper() for k in ["DATA", "INÍCIO", "FINAL"]):
+        width = max(width, 12)
+
+    # 3. Specific Columns (Refinamento conforme pedido)
+    if val_header == "Nº":
+        width = 4
+    elif val_header == "SEI":
+        width = 19
+    elif "PRAZO" in val_header.upper():
+        width = 11
+    elif val_header == "VLR.CONTRATO C/ADITIVO":
+        width = 18
+    elif val_header == "GESTOR":
+        width = 19
+    elif val_header == "FISCAL":
+        width = 25
+    elif year_total_year(val_header) is not None:
+        width = 18
+    elif val_header == "MEDIÇÕES ACUMULADAS":
+        width = 18
+    elif val_header == "SALDO DO CONTRATO":
+        width = 18
+    elif val_header == "MUNICIPIO":
+        width = min(max(width, 15), 22)
+    elif val_header == "CONTRATADA":
+        width = max(width, 18)
+    elif "%" in val_header:
+        width = 8
+    return width
+
+
+# Rótulos usados nos nomes dos estilos de dados
+_FORMAT_LABELS = {
+    None: "", MONEY_FORMAT: " moeda", DATE_FORMAT_BR: " data", PERCENT_FORMAT: " percentual",
+    DATETIME_FORMAT: " data e hora", DATE_FORMAT: " data ISO", "0": " dias",
+}
+
+
+def _header_style(wb, name, model_header_style):
+    # Um NamedStyle por combinação de fill/fonte do modelo, compartilhado entre colunas e abas
+    fill, font = header_style(name, model_header_style)
+    label = f"Cabeçalho {fill.start_color.rgb} {font.color.rgb if font.color else ''} {'negrito' if font.b else 'normal'}"
+    return add_named_style(wb, label, font=font, fill=fill, border=THIN_BORDER, alignment=HEADER_ALIGNMENT)
+
+
+def _data_style(wb, fill_name, fill, bold, fmt):
+    # Célula de dados: borda fina + preenchimento/negrito/formato conforme a coluna
+    label = ("Medições" + (f" {fill_name}" if fill_name else "")
+             + _FORMAT_LABELS.get(fmt, f" {fmt}"))
+    return add_named_style(wb, label, font=Font(bold=True) if bold else None, fill=fill,
+                           border=THIN_BORDER, number_format=fmt)
+
+
+def _medicoes_formatter(wb, name):
+    """Formatação de uma coluna de Medições/PROBLEMAS, decidida uma vez pelo nome da coluna.
+
+    Devolve formatter(valor, formato) -> (valor, estilo, None): borda em tudo,
+    cores de LOCAL/REGIÃO, moeda (com o valor convertido), datas preenchidas
+    em DD/MM/AAAA e % EXEC. em percentual. `formato` é o formato que a célula
+    já teria (ex.: datas gravadas pelo pandas) e só é mantido nas colunas sem
+    formato próprio.
+    """
+    money = is_money_column(name)
+    date = name in DATE_COLUMNS
+    percent = name == "% EXEC."
+    fills = FILLS_LOCAL if name == "LOCAL" else FILLS_REGIAO if name == "REGIÃO" else None
+    bold = name == "LOCAL"
+    # {fill: {formato: nome do estilo}}, preenchido sob demanda
+    styles = {}
+
+    def formatter(value, fmt):
+        if money:
+            value = money_cell_value(value)
+            fmt = MONEY_FORMAT
+        if date and value:
+            fmt = DATE_FORMAT_BR
+        if percent:
+            fmt = PERCENT_FORMAT
+        fill_name = None
+        if fills is FILLS_LOCAL:
+            fill_name = str(value).strip().upper()
+            if fill_name not in fills:
+                fill_name = None
+        elif fills is not None and value in fills:
+            fill_name = value
+        by_fmt = styles.get(fill_name)
+        if by_fmt is None:
+            by_fmt = styles[fill_name] = {}
+        style = by_fmt.get(fmt)
+        if style is None:
+            if fill_name is None:
+                style = _data_style(wb, None, None, False, fmt)
+            else:
+                style = _data_style(wb, fill_name, fills[fill_name], bold, fmt)
+            by_fmt[fmt] = style
+        return value, style, None
 
-        # Estilo base
-        cell.alignment = Alignment(wrapText=True, horizontal='center', vertical='center')
-        cell.border = thin_border
+    return formatter
 
-        # Tenta aplicar do modelo
-        if name_in_cell in model_header_style:
-            style = model_header_style[name_in_cell]
-            if style['fill'] and style['fill'] != '00000000':
-                cell.fill = PatternFill(start_color=style['fill'], end_color=style['fill'], fill_type="solid")
-            else:
-                cell.fill = fill_header  # Fallback cinza
-            cell.font = Font(bold=style['font_bold'], color=style['font_color'])
-        else:
-            cell.fill = fill_header
-            cell.font = Font(bold=True)
 
-    # Data content
-    money_fmt = '_-R$ * #,##0.00_-;_-R$ * -#,##0.00_-;_-R$ * "-"??_-;_-@_-'
-    ws_any: Any = ws
-    
-    for row in range(2, ws_any.max_row + 1):
-        for col in range(1, len(header) + 1):
-            ws_any.cell(row=row, column=col).border = thin_border
-
-        # Formatação LOCAL
-        if "LOCAL" in col_map:
-            local_cell = ws_any.cell(row=row, column=col_map["LOCAL"])
-            local_val = str(local_cell.value).strip().upper()
-            if local_val in fills_local:
-                local_cell.fill = fills_local[local_val]
-                local_cell.font = Font(bold=True)
-
-        # Formatação REGIÃO
-        if "REGIÃO" in col_map:
-            reg_val = ws_any.cell(row=row, column=col_map["REGIÃO"]).value
-            if reg_val in fills_regiao:
-                ws_any.cell(row=row, column=col_map["REGIÃO"]).fill = fills_regiao[reg_val]
-
-        # Formatação Financeira (heurística + lista passada)
-        # Se o nome da coluna estiver em all_months ou contiver VLR, SALDO, MEDIÇÕES (exceto ano solto)
-        for col_name, col_idx in col_map.items():
-            is_money = False
-            # Verifica meses
-            c_clean = col_name.replace(" ", "")
-            if re.match(r'^[A-Z]{3}/\d{2}$', c_clean):
-                is_money = True
-            elif any(k in col_name.upper() for k in ["VLR", "VALOR", "SALDO", "MEDIÇÕES", "MEDICOES"]):
-                # Evita "MEDIÇÕES 2025" se for só contagem, mas aqui é valor, então ok
-                is_money = True
-            
-            if is_money:
-                cell_val: Any = ws_any.cell(row=row, column=col_idx) # type: ignore
-                cell_val.number_format = money_fmt # type: ignore
-                try:
-                    if cell_val.value is not None: # type: ignore
-                        val_clean = str(cell_val.value).replace('R$', '').replace(' ', '') # type: ignore
-                        if ',' in val_clean and '.' not in val_clean:
-                            val_clean = val_clean.replace(',', '.')
-                        cell_val.value = float(round(float(val_clean), 2)) # type: ignore
-                    else:
-                        cell_val.value = 0.0
-                except:
-                    cell_val.value = 0.0
-
-        # Formatação de Datas
-        for dc in [h_inicio, "DATA FINAL", "Prazo Final", "Ordem de Início"]:
-            if dc in col_map:
-                cell_dt: Any = ws_any.cell(row=row, column=col_map[dc]) # type: ignore
-                if cell_dt.value: # type: ignore
-                    cell_dt.number_format = 'DD/MM/YYYY' # type: ignore
-        
-        if "% EXEC." in col_map:
-            ws_any.cell(row=row, column=col_map["% EXEC."]).number_format = '0.00%' # type: ignore
-
-    # --- Aplicação de Larguras ---
-    for col in ws.columns:
-        column_letter = col[0].column_letter
-        val_header = str(col[0].value).replace('\n', ' ').strip()
-        
-        # Base width from model or fallback
-        width = model_widths.get(val_header, 15)
-        
-        # Sanity checks and adjustments
-        # 1. Currency Columns (Months and Totals)
-        is_money = False
-        if re.match(r'^[A-Z]{3}/\d{2}$', val_header):
-            is_money = True
-        elif any(k in val_header.upper() for k in ["VLR", "VALOR", "SALDO", "MEDIÇÕES", "MEDICOES"]):
-            is_money = True
-        
-        if is_money:
-            # Mantemos 20 para meses normais, mas permitimos exceções abaixo
-            width = max(width, 20)
-        
-        # 2. Date Columns
-        if any(k in val_header.upper() for k in ["DATA", "INÍCIO", "FINAL"]):
-            width = max(width, 12)
-            
-        # 3. Specific Columns (Refinamento conforme pedido)
-        if val_header == "Nº":
-            width = 4
-        elif val_header == "SEI":
-            width = 19
-        elif "PRAZO" in val_header.upper():
-            width = 11
-        elif val_header == "VLR.CONTRATO C/ADITIVO":
-            width = 18
-        elif val_header == "GESTOR":
-            width = 19
-        elif val_header == "FISCAL":
-            width = 25
-        elif val_header == "MEDIÇÕES 2025":
-            width = 18
-        elif val_header == "MEDIÇÕES 2026":
-            width = 18
-        elif val_header == "MEDIÇÕES ACUMULADAS":
-            width = 18
-        elif val_header == "SALDO DO CONTRATO":
-            width = 18
-        elif val_header == "MUNICIPIO":
-            width = min(max(width, 15), 22)
-        elif val_header == "CONTRATADA":
-            width = max(width, 18)
-        elif "%" in val_header:
-            width = 8
-            
-        ws.column_dimensions[column_letter].width = width
+def write_medicoes_sheet(wb, title, df, model_widths, model_header_style):
+    """Grava uma aba no layout de Medições já formatada, numa única passada (ver escrita_planilha)."""
+    header_styles, formatters, widths = [], [], []
+    for col in df.columns:
+        name = str(col).replace('\n', ' ').strip()
+        header_styles.append(_header_style(wb, name, model_header_style))
+        formatters.append(_medicoes_formatter(wb, name))
+        widths.append(column_width(name, model_widths))
+    return write_frame(wb, title, df, header_styles=header_styles,
+                       column_formatters=formatters, widths=widths)
 
 
 def prepare_dataframe(df, keep_execution=True):
@@ -451,38 +441,36 @@ def prepare_dataframe(df, keep_execution=True):
 
     return df_filtered
 
-def get_model_structure():
-    """Lê o arquivo modelo MEDIÇÕES.xlsx para obter a ordem exata das colunas e estilos."""
-    model_path = FILE_BASE.replace("BASE.xlsx", "MEDIÇÕES.xlsx")
+def model_path():
+    """Caminho do modelo MEDIÇÕES.xlsx (na mesma pasta do BASE.xlsx)."""
+    return FILE_BASE.replace("BASE.xlsx", "MEDIÇÕES.xlsx")
+
+def _read_model_structure(path):
     model_widths = {}
     model_header_style = {}
     ordered_columns = []
-    
-    try:
-        wb_mod = load_workbook_ignoring_header_footer_warning(model_path, data_only=False)
-        ws_mod = wb_mod['Medições']
-        
-        # Ler cabeçalhos da linha 2
-        for i in range(1, ws_mod.max_column + 1):
-            cell_mod = ws_mod.cell(row=2, column=i)
-            val_mod = cell_mod.value
-            if val_mod:
-                name_clean = str(val_mod).replace('\n', ' ').strip()
-                ordered_columns.append(name_clean)
-                
-                col_let = get_column_letter(i)
-                w = ws_mod.column_dimensions[col_let].width
-                model_widths[name_clean] = w
-                
-                model_header_style[name_clean] = {
-                    'fill': cell_mod.fill.start_color.rgb if cell_mod.fill else None,
-                    'font_bold': cell_mod.font.bold if cell_mod.font else False,
-                    'font_color': cell_mod.font.color.rgb if cell_mod.font and cell_mod.font.color else None
-                }
-    except Exception as e:
-        print(f"Erro ao ler modelo: {e}")
-        return [], {}, {}
-    
+
+    wb_mod = load_workbook_ignoring_header_footer_warning(path, data_only=False)
+    ws_mod = wb_mod['Medições']
+
+    # Ler cabeçalhos da linha 2
+    for i in range(1, ws_mod.max_column + 1):
+        cell_mod = ws_mod.cell(row=2, column=i)
+        val_mod = cell_mod.value
+        if val_mod:
+            name_clean = str(val_mod).replace('\n', ' ').strip()
+            ordered_columns.append(name_clean)
+
+            col_let = get_column_letter(i)
+            w = ws_mod.column_dimensions[col_let].width
+            model_widths[name_clean] = w
+
+            model_header_style[name_clean] = {
+                'fill': cell_mod.fill.start_color.rgb if cell_mod.fill else None,
+                'font_bold': cell_mod.font.bold if cell_mod.font else False,
+                'font_color': cell_mod.font.color.rgb if cell_mod.font and cell_mod.font.color else None
+            }
+
     # Adicionar FISCAL se não houver no modelo (após GESTOR)
     if "GESTOR" in ordered_columns and "FISCAL" not in ordered_columns:
         idx = ordered_columns.index("GESTOR")
@@ -491,239 +479,493 @@ def get_model_structure():
         # Copia estilo do GESTOR
         if "GESTOR" in model_header_style:
             model_header_style["FISCAL"] = model_header_style["GESTOR"].copy()
-        
+
     return ordered_columns, model_widths, model_header_style
 
-def main():
+def get_model_structure(path=None):
+    """Lê o arquivo modelo MEDIÇÕES.xlsx para obter a ordem exata das colunas e estilos."""
+    path = path or model_path()
+    try:
+        return load_cached(path, "modelo", lambda: _read_model_structure(path))
+    except Exception as e:
+        print(f"Erro ao ler modelo: {e}")
+        return [], {}, {}
+
+# Status forçado manualmente para um SEI específico (exceção pedida pela equipe)
+SEI_FORCA_EXECUCAO = "330018/000567/2021"
+
+MONTH_COL_RE = re.compile(r'^[A-Z]{3}/\d{2}$')
+YEAR_RE = re.compile(r'\d{4}')
+
+
+def year_total_year(col):
+    """Ano de uma coluna de total anual do modelo ("MEDIÇÕES 2025" -> 2025); outras -> None."""
+    col = str(col)
+    if "MEDIÇÕES" not in col or "ACUMULADAS" in col:
+        return None
+    match = YEAR_RE.search(col)
+    return int(match.group()) if match else None
+
+
+def money_column(df, col, origem="ANALITICA.xlsx"):
+    """Converte uma coluna de valores (R$, %, etc.) em lote e avisa sobre células irreconhecíveis."""
+    values, fallbacks = to_numeric_series(df[col])
+    if fallbacks:
+        print(f"  Aviso: {fallbacks} célula(s) de '{col}' ({origem}) não reconhecida(s) como número — usando 0.0.")
+    return values
+
+
+def _resolve_output_source(col, available):
+    """Nome do campo consolidado que alimenta a coluna `col` do modelo (None = vazio)."""
+    if col in available:
+        return col
+    if "PRAZO" in col and "EXECUÇÃO" in col: src = "PRAZO EXECUÇÃO"
+    elif "ORDEM" in col and "INÍCIO" in col: src = "ORDEM DE INÍCIO"
+    elif "VLR" in col and "CONTRATO" in col: src = "VLR.CONTRATO C/ADITIVO"
+    elif "MEDIÇÕES" in col and "ACUMULADAS" in col: src = "MEDIÇÕES ACUMULADAS"
+    elif year_total_year(col) is not None: src = f"MEDIÇÕES {year_total_year(col)}"
+    elif "SALDO" in col and "CONTRATO" in col: src = "SALDO DO CONTRATO"
+    elif "%" in col and "EXEC" in col: src = "% EXEC."
+    else: return None
+    return src if src in available else None
+
+
+def comissoes_index(comissoes_map):
+    """SeiIndex do cadastro de gestor/fiscal (aceita o dict de get_gestor_fiscal_data ou um índice pronto)."""
+    return comissoes_map if isinstance(comissoes_map, SeiIndex) else SeiIndex.from_map(comissoes_map)
+
+
+def _comissoes_info(sei, comissoes_map):
+    """gestor/fiscal/local/status_aux por SEI; SEIs ausentes recebem o registro padrão."""
+    return comissoes_index(comissoes_map).lookup(sei.values)
+
+
+def contractor_resolver(contractor_map):
+    """ContractorResolver do mapeamento CONTRATADA -> RESUMIDO (aceita o dict ou um resolvedor pronto)."""
+    return contractor_map if isinstance(contractor_map, ContractorResolver) else ContractorResolver(contractor_map)
+
+
+def _resolve_contratadas(contratada_str, contractor_map):
+    """RESUMIDO de cada contratada (exato ou aproximado); None onde não há correspondência."""
+    resolver = contractor_resolver(contractor_map)
+    return map_unique(contratada_str, lambda name: resolver.resolve(normalize_name(name)))
+
+
+def _contratadas_faltantes(df_ana, contractor_map):
+    """Registros (SEI, CONTRATADA) cuja contratada não foi encontrada no AUXILIAR."""
+    preenchida = df_ana['Contratada'].notna().values
+    resumido = _resolve_contratadas(map_unique(df_ana['Contratada'], str), contractor_map)
+    faltante = preenchida & resumido.isna().values
+    return (
+        df_ana.loc[faltante, ['Processo SEI', 'Contratada']]
+        .rename(columns={'Processo SEI': 'SEI', 'Contratada': 'CONTRATADA'})
+        .to_dict('records')
+    )
+
+
+def _contratadas_aproximadas(df_ana, contractor_map):
+    """Registros (SEI, CONTRATADA, nome no AUXILIAR, RESUMIDO, similaridade) resolvidos por aproximação."""
+    resolver = contractor_resolver(contractor_map)
+    fuzzy = resolver.fuzzy_matches()
+    preenchida = df_ana['Contratada'].notna().values
+    keys = map_unique(map_unique(df_ana['Contratada'], str), normalize_name)
+    aproximada = preenchida & keys.isin(list(fuzzy)).values & ~keys.isin(list(resolver.mapping)).values
+    matches = [fuzzy[k] for k in keys[aproximada]]
+    return [
+        {'SEI': sei, 'CONTRATADA': nome, 'CONTRATADA AUXILIAR': auxiliar, 'RESUMIDO': resumido,
+         'SIMILARIDADE': score}
+        for sei, nome, (resumido, score, auxiliar) in zip(
+            df_ana.loc[aproximada, 'Processo SEI'], df_ana.loc[aproximada, 'Contratada'], matches)
+    ]
+
+
+def _gestores_faltantes(df_ana, info):
+    """Registros (SEI, CONTRATADA) dos contratos sem gestor definido."""
+    sem_gestor = (info['gestor'] == "").values
+    return (
+        df_ana.loc[sem_gestor, ['Processo SEI', 'Contratada']]
+        .rename(columns={'Processo SEI': 'SEI', 'Contratada': 'CONTRATADA'})
+        .to_dict('records')
+    )
+
+
+def _model_month_columns(ordered_columns, month_matrix):
+    """Pares (coluna do modelo, rótulo MMM/AA) das colunas de mês presentes no BASE."""
+    base_months = set(month_matrix.columns)
+    return [(c, str(c).replace(" ", "")) for c in ordered_columns if str(c).replace(" ", "") in base_months]
+
+
+def _frame_like_records(columns, ordered_columns):
+    """DataFrame com a mesma inferência de tipos de pd.DataFrame(lista de dicts).
+
+    Colunas object passam por lista para serem reinferidas (int, float, data ou texto).
+    """
+    out = {}
+    for col in ordered_columns:
+        s = columns[col]
+        out[col] = s.tolist() if isinstance(s, pd.Series) and s.dtype == object else s
+    return pd.DataFrame(out, columns=ordered_columns)
+
+
+def consolidate(df_ana, month_matrix, ordered_columns, comissoes_map, region_map, contractor_map, concluidas_sei):
+    """Monta uma linha por contrato do ANALITICA na ordem de colunas do modelo.
+
+    Versão vetorizada: junta ANALITICA com comissões, regiões, contratadas e a
+    matriz de medições por coluna inteira, em vez de montar um dict por linha.
+    Retorna (df_all, gestores_faltantes).
+    """
+    df_ana = df_ana.reset_index(drop=True)
+    sei = df_ana['SEI_CLEAN']
+    n = len(df_ana)
+
+    info = _comissoes_info(sei, comissoes_map)
+
+    # Fase do ANALITICA; se vazia, usa o STATUS das planilhas de comissões
+    if 'Fase' in df_ana.columns:
+        fase_raw = df_ana['Fase']
+        fase_str = fase_raw.astype(str).str.strip()
+        has_fase = fase_raw.notna() & (fase_str != "")
+        fase = fase_str.str.upper().astype(object).where(has_fase, info['status_aux'])
+    else:
+        fase = info['status_aux']
+    status = pd.Series(np.select(
+        [sei == SEI_FORCA_EXECUCAO, sei.isin(concluidas_sei)],
+        ["EXECUÇÃO", "CONCLUÍDA"],
+        default=None,
+    ), dtype=object)
+    status = status.where(status.notna(), fase)
+
+    # map_unique(str) reproduz str(valor) do laço, inclusive 'nan' para células vazias
+    municipio_key = map_unique(df_ana['Municipio'], str).str.strip().str.upper()
+    contratada_str = map_unique(df_ana['Contratada'], str)
+    contratada = _resolve_contratadas(contratada_str, contractor_map)
+    contratada = contratada.where(contratada.notna(), contratada_str.str.strip())
+
+    dados = {
+        "SEI": df_ana['Processo SEI'],
+        "LOCAL": info['local'],
+        "STATUS": status,
+        "GESTOR": info['gestor'],
+        "FISCAL": info['fiscal'],
+        "MUNICIPIO": df_ana['Municipio'],
+        "REGIÃO": municipio_key.map(region_map).astype(object).fillna(""),
+        "CONTRATADA": contratada,
+    }
+
+    gestores_faltantes = _gestores_faltantes(df_ana, info)
+
+    # Datas e Prazos (pd.to_datetime avaliado por valor distinto, como no escalar)
+    dt_ini = map_unique(df_ana['Ordem de Início'], lambda v: pd.to_datetime(v, errors='coerce')).infer_objects()
+    dt_fim = map_unique(df_ana['Prazo Final'], lambda v: pd.to_datetime(v, errors='coerce')).infer_objects()
+    both = (dt_ini.notna() & dt_fim.notna()).values
+    dias = pd.to_timedelta(dt_fim - dt_ini, errors='coerce').dt.days.fillna(0).astype('int64')
+    prazo = pd.Series(dias.values.astype(object), dtype=object).where(both, "")
+    dados["ORDEM DE INÍCIO"] = dt_ini
+    dados["DATA FINAL"] = dt_fim
+    dados["PRAZO EXECUÇÃO"] = prazo
+
+    # Financeiro
+    vlr_contr = money_column(df_ana, 'Valor contrato (Atual)')
+    perc_exec = money_column(df_ana, 'Acumulado atual (%)')
+    saldo = money_column(df_ana, 'Saldo Atual do Contrato')
+    dados["VLR.CONTRATO C/ADITIVO"] = vlr_contr
+
+    # Meses: colunas do modelo presentes no BASE, extraídas de uma vez da matriz esparsa
+    model_months = _model_month_columns(ordered_columns, month_matrix)
+    month_cols = sorted({cc for _, cc in model_months})
+    month_values = month_matrix.take(sei.values, month_cols)
+    col_pos = {cc: j for j, cc in enumerate(month_cols)}
+    for col_name, col_clean in model_months:
+        dados[col_name] = pd.Series(round2(month_values[:, col_pos[col_clean]]))
+    # Totais "MEDIÇÕES <ano>" de todos os anos do BASE; o modelo escolhe quais aparecem
+    # (um ano do modelo sem lançamentos no BASE sai zerado)
+    year_totals = month_matrix.year_totals(sei.values)
+    for year in filter(None, map(year_total_year, ordered_columns)):
+        year_totals.setdefault(year, np.zeros(n))
+
+    # Atribui conforme nova regra (ANALITICA.xlsx)
+    dados["% EXEC."] = perc_exec
+    # Se % EXEC. for zero, não exibir o conteúdo de MEDIÇÕES ACUMULADAS
+    dados["MEDIÇÕES ACUMULADAS"] = vlr_contr.astype(object).where(perc_exec != 0, "")
+    for year, total in year_totals.items():
+        dados[f"MEDIÇÕES {year}"] = pd.Series(round2(total))
+    dados["SALDO DO CONTRATO"] = saldo
+
+    # Montar tabela final ordenada (fallback de nomes resolvido uma vez por coluna)
+    out = {}
+    for col in ordered_columns:
+        src = _resolve_output_source(col, dados)
+        out[col] = [""] * n if src is None else dados[src].reset_index(drop=True)
+    df_all = _frame_like_records(out, ordered_columns)
+    return df_all, gestores_faltantes
+
+# Versão do formato do estado incremental; mudar ao alterar a consolidação
+# faz o próximo modo incremental recalcular tudo.
+STATE_VERSION = 2
+
+
+def state_path():
+    """Arquivo com o estado por SEI da última consolidação (ao lado da saída)."""
+    return os.path.splitext(FILE_OUTPUT)[0] + ".estado.pkl"
+
+
+def _global_key(ordered_columns, region_map, contractor_map):
+    # Entradas que afetam todas as linhas: se mudarem, nada é reaproveitado
+    payload = (STATE_VERSION, SEI_FORCA_EXECUCAO, list(ordered_columns),
+               sorted(region_map.items()), contractor_resolver(contractor_map).memo_key())
+    return hashlib.sha256(pickle.dumps(payload, protocol=4)).hexdigest()
+
+
+def sei_input_hashes(df_ana, month_matrix, ordered_columns, comissoes_map, concluidas_sei):
+    """Hash por SEI de tudo que alimenta a linha consolidada daquele contrato.
+
+    Combina a linha do ANALITICA, as medições do BASE nas colunas de mês do
+    modelo, os totais por ano de todos os meses do BASE (MEDIÇÕES <ano> soma
+    também meses que o modelo não lista), o registro de gestor/fiscal e a
+    marcação de concluída.
+    """
+    df_ana = df_ana.reset_index(drop=True)
+    sei = df_ana['SEI_CLEAN']
+    month_cols = sorted({cc for _, cc in _model_month_columns(ordered_columns, month_matrix)})
+    months = pd.DataFrame(month_matrix.take(sei.values, month_cols), columns=month_cols)
+    totals = month_matrix.year_totals(sei.values)
+    years = pd.DataFrame({year: totals[year] for year in sorted(totals)}, index=months.index)
+    info = _comissoes_info(sei, comissoes_map)
+    flags = pd.DataFrame({'concluida': sei.isin(concluidas_sei).values})
+    key_frame = pd.concat([df_ana.astype(object), months, years, info, flags], axis=1, ignore_index=True)
+    hashes = pd.util.hash_pandas_object(key_frame, index=False)
+    return pd.Series(hashes.values, index=sei.values)
+
+
+def consolidate_incremental(df_ana, month_matrix, ordered_columns, comissoes_map, region_map, contractor_map,
+                            concluidas_sei, path=None):
+    """consolidate() que só recalcula os SEIs cujas entradas mudaram desde a última execução.
+
+    As linhas dos demais SEIs vêm do estado salvo em `path` (padrão: state_path()).
+    O resultado é idêntico ao de consolidate(); o estado é regravado ao final.
+    """
+    path = path or state_path()
+    df_ana = df_ana.reset_index(drop=True)
+    sei = df_ana['SEI_CLEAN']
+    global_key = _global_key(ordered_columns, region_map, contractor_map)
+    hashes = sei_input_hashes(df_ana, month_matrix, ordered_columns, comissoes_map, concluidas_sei)
+
+    state = None
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as fh:
+                state = pickle.load(fh)
+        except Exception as e:
+            print(f"  Aviso: estado incremental ilegível ({e}) — recalculando tudo.")
+    if state is None or state.get('global') != global_key:
+        changed = np.ones(len(df_ana), dtype=bool)
+    else:
+        # fill_value mantém o dtype uint64 (reindex com NaN converteria para float)
+        prev = state['hashes']
+        known = sei.isin(prev.index).values
+        changed = ~known | (prev.reindex(sei.values, fill_value=0).values != hashes.values)
+
+    df_new, _ = consolidate(df_ana[changed], month_matrix, ordered_columns, comissoes_map,
+                            region_map, contractor_map, concluidas_sei)
+    df_new.index = sei[changed].values
+    if changed.all():
+        rows = df_new
+    else:
+        rows = pd.concat([state['rows'].loc[sei[~changed].values], df_new]).reindex(sei.values)
+    rows = rows.reset_index(drop=True)
+    df_all = _frame_like_records({c: rows[c] for c in ordered_columns}, ordered_columns)
+    gestores_faltantes = _gestores_faltantes(df_ana, _comissoes_info(sei, comissoes_map))
+    print(f"  Modo incremental: {int(changed.sum())} de {len(df_ana)} SEIs recalculados.")
+
+    snapshot = df_all.copy()
+    snapshot.index = sei.values
+    try:
+        with open(path + ".tmp", "wb") as fh:
+            pickle.dump({'global': global_key, 'hashes': hashes, 'rows': snapshot}, fh,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        print(f"  Aviso: não foi possível salvar o estado incremental: {e}")
+    return df_all, gestores_faltantes
+
+
+def prefetch_inputs(workers=None):
+    """Lê as planilhas de entrada em paralelo (ver leitura_planilhas.prefetch).
+
+    Cada arquivo vai para um processo; as funções de leitura usadas depois em
+    main() recebem o resultado pronto. Sem efeito com workers <= 1.
+    """
+    jobs = [
+        (read_sheet_cached, (FILE_BASE,)),
+        (read_sheet_cached, (FILE_ANALITICA,)),
+        (read_comissoes_workbook, (FILE_COMISSOES,)),
+        (read_sheet_cached, (FILE_AUXILIAR, "AUXILIAR")),
+        (get_model_structure, (model_path(),)),
+    ]
+    if os.path.exists(FILE_CONTROLES):
+        jobs.append((detect_tables, (FILE_CONTROLES, CONTROLES_RELATORIO_SPEC)))
+    prefetch(jobs, workers)
+
+
+def profile_path():
+    """Arquivo JSON lines do --profile, ao lado da saída (ex.: MEDIÇÕES_CONSOLIDADO.perfil.jsonl)."""
+    return os.path.splitext(FILE_OUTPUT)[0] + ".perfil.jsonl"
+
+
+def main(incremental=False, workers=None, profile=None, save_data=None, report=False):
     print("Iniciando...")
-    
+    prof = profiler_from_env(profile, default_output=profile_path(), label=os.path.basename(os.path.dirname(FILE_BASE)))
+
+    # 0. Leitura paralela das entradas (opcional)
+    with prof.stage("leitura_paralela"):
+        prefetch_inputs(workers)
+
     # 1. Obter estrutura do modelo
-    ordered_columns, model_widths, model_header_style = get_model_structure()
+    with prof.stage("modelo") as info:
+        ordered_columns, model_widths, model_header_style = get_model_structure()
+        info['linhas'] = len(ordered_columns)
     
     if not ordered_columns:
         print("ALERTA: Não foi possível ler colunas do modelo. Usando fallback.")
         return 
 
-    # 2. Carregar mapeamentos
-    region_map = get_region_mapping()
-    comissoes_map = get_gestor_fiscal_data() # Agora unificado
-    contractor_map = get_contractor_mapping()
-    concluidas_sei: Any = get_concluidas_sei() # Novos SEIs para mover para PROBLEMAS
+    # 2. Carregar mapeamentos (AUXILIAR.xlsx lido uma única vez)
+    with prof.stage("mapeamentos") as info:
+        df_aux = load_auxiliar()
+        region_map = get_region_mapping(df_aux)
+        comissoes_map = get_gestor_fiscal_data() # Agora unificado
+        comissoes_idx = SeiIndex.from_map(comissoes_map) # consultado por código nas junções
+        contractor_map = ContractorResolver(get_contractor_mapping(df_aux)) # exato + aproximado
+        concluidas_sei: Any = get_concluidas_sei(df_aux) # Novos SEIs para mover para PROBLEMAS
+        info['linhas'] = len(comissoes_map)
 
     # 3. Carregar DADOS
-    df_ana = pd.read_excel(FILE_ANALITICA)
-    df_ana['SEI_CLEAN'] = df_ana['Processo SEI'].apply(clean_sei)
-    df_ana = df_ana.drop_duplicates(subset=['SEI_CLEAN']).copy()
-
-    df_base = pd.read_excel(FILE_BASE)
-    df_base['SEI_CLEAN'] = df_base['Processo SEI'].apply(clean_sei)
-    # Suporte ao novo formato BASE.xlsx (coluna 'Valor') e ao formato antigo ('Valor das medições')
-    if 'Valor' in df_base.columns:
-        df_base['Valor'] = df_base['Valor'].apply(to_numeric)
-    elif 'Valor das medições' in df_base.columns:
-        df_base['Valor'] = df_base['Valor das medições'].apply(to_numeric)
-    else:
-        raise KeyError("Coluna de valor não encontrada no BASE.xlsx. Esperado: 'Valor' ou 'Valor das medições'.")
-
-    # Mapeamento de meses: número inteiro -> abreviação
-    meses_pt = {1: "JAN", 2: "FEV", 3: "MAR", 4: "ABR", 5: "MAI", 6: "JUN",
-                7: "JUL", 8: "AGO", 9: "SET", 10: "OUT", 11: "NOV", 12: "DEZ"}
-    # Mapeamento de nomes completos em português -> abreviação
-    meses_nome_pt = {
-        "JANEIRO": "JAN", "FEVEREIRO": "FEV", "MARÇO": "MAR", "MARCO": "MAR",
-        "ABRIL": "ABR", "MAIO": "MAI", "JUNHO": "JUN", "JULHO": "JUL",
-        "AGOSTO": "AGO", "SETEMBRO": "SET", "OUTUBRO": "OUT",
-        "NOVEMBRO": "NOV", "DEZEMBRO": "DEZ"
-    }
-    def format_mes_ano(r):
-        try:
-            # Garante que 2025.0 ou "2025" vire 2025 e depois suffix "25"
-            ano_val = int(float(str(r['Ano'])))
-            ano_s = str(ano_val)
-        except:
-            ano_s = str(r['Ano']) # type: ignore
-        suffix = ano_s[-2:] if len(ano_s) >= 2 else ano_s # type: ignore
-        mes_raw = r['Mês']
-        mes_str = "JAN"
-        if pd.notna(mes_raw):
-            mes_val_s = str(mes_raw).strip().upper()
-            if mes_val_s in meses_nome_pt:
-                # Nome completo: "Janeiro", "JANEIRO", etc.
-                mes_str = meses_nome_pt[mes_val_s]
-            else:
-                # Fallback numérico: 1, 2, ..., 12
-                try:
-                    mes_str = meses_pt.get(int(float(mes_val_s)), "JAN")
-                except (ValueError, TypeError):
-                    mes_str = "JAN"
-        return f"{mes_str}/{suffix}"
-    df_base['MesAno'] = df_base.apply(format_mes_ano, axis=1)
-
-    df_pivot = df_base.pivot_table(index='SEI_CLEAN', columns='MesAno', values='Valor', aggfunc='sum').fillna(0)
-
-    # 4. Consolidar dados
-    final_rows = []
-    gestores_faltantes = []
-    
-    for _, row in df_ana.iterrows():
-        sei = row['SEI_CLEAN']
-        info = comissoes_map.get(sei, {'gestor': '', 'local': 'CIVIS', 'status_aux': ''})
-        
-        # Dados básicos
-        fase_original = str(row['Fase']).strip().upper() if pd.notna(row.get('Fase')) and str(row['Fase']).strip() else info.get('status_aux', '')
-        
-        # Exceções: Força status "EXECUÇÃO" para o SEI solicitado
-        if sei == "330018/000567/2021":
-            status_final = "EXECUÇÃO"
-        elif sei in concluidas_sei:
-            status_final = "CONCLUÍDA"
-        else:
-            status_final = fase_original
-
-        dados = {
-            "SEI": row['Processo SEI'],
-            "LOCAL": info['local'],
-            "STATUS": status_final,
-            "GESTOR": info['gestor'],
-            "FISCAL": info.get('fiscal', ''),
-            "MUNICIPIO": row['Municipio'],
-            "REGIÃO": region_map.get(str(row['Municipio']).strip().upper(), ""),
-            "CONTRATADA": contractor_map.get(normalize_name(str(row['Contratada'])), str(row['Contratada']).strip())
-        }
-
-        if not dados['GESTOR']:
-            gestores_faltantes.append({'SEI': dados['SEI'], 'CONTRATADA': row['Contratada']})
-
-        # Datas e Prazos
-        dt_ini = pd.to_datetime(row['Ordem de Início'], errors='coerce')
-        dt_fim = pd.to_datetime(row['Prazo Final'], errors='coerce')
-        dados["ORDEM DE INÍCIO"] = dt_ini
-        dados["DATA FINAL"] = dt_fim
-        dados["PRAZO EXECUÇÃO"] = (dt_fim - dt_ini).days if pd.notnull(dt_fim) and pd.notnull(dt_ini) else ""
-
-        # Financeiro
-        vlr_contr = to_numeric(row['Valor contrato (Atual)'])
-        dados["VLR.CONTRATO C/ADITIVO"] = vlr_contr
-        
-        # Novas fontes do ANALITICA.xlsx conforme pedido do usuário
-        # "MEDIÇÕES ACUMULADAS" vem de "Valor contrato (Atual)"
-        # "% EXEC" vem de "Acumulado atual (%)"
-        # "SALDO DO CONTRATO" vem de "Saldo Atual do Contrato"
-        vlr_acum_ana = to_numeric(row['Valor contrato (Atual)'])
-        perc_exec_ana = to_numeric(row['Acumulado atual (%)'])
-        saldo_ana = to_numeric(row['Saldo Atual do Contrato'])
-
-        df_pivot_cols: Any = df_pivot.columns # type: ignore
-        med_acum_calc: float = 0.0 # Valor calculado das mensais para conferência interna
-        med_2025: float = 0.0
-        med_2026: float = 0.0
-        
-        # Preencher meses baseado nas colunas do modelo
-        for col_name in ordered_columns:
-            # Tenta casar com padrão de mês
-            col_clean = str(col_name).replace(" ", "")
-            
-            # Se a coluna existe no pivot, puxa o valor
-            if col_clean in df_pivot_cols:
-                val_raw = df_pivot.loc[sei, col_clean] if sei in df_pivot.index else 0.0 # type: ignore
-                val: float = float(val_raw)
-                dados[col_name] = float(round(val, 2)) # type: ignore
-                med_acum_calc += val
-                if "/25" in str(col_clean):
-                    # Verifica se é coluna de mês para somar no MEDIÇÕES 2025
-                    if re.match(r'^[A-Z]{3}/\d{2}$', str(col_clean)):
-                        med_2025 += val # type: ignore
-                elif "/26" in str(col_clean):
-                    # Verifica se é coluna de mês para somar no MEDIÇÕES 2026
-                    if re.match(r'^[A-Z]{3}/\d{2}$', str(col_clean)):
-                        med_2026 += val # type: ignore
-            elif col_name not in dados:
-                 # Coluna do modelo que não é dado básico e não está no pivot
-                 pass
-
-        # Atribui conforme nova regra (ANALITICA.xlsx)
-        dados["% EXEC."] = perc_exec_ana
-        # Se % EXEC. for zero, não exibir o conteúdo de MEDIÇÕES ACUMULADAS
-        if perc_exec_ana == 0 or perc_exec_ana == 0.0:
-            dados["MEDIÇÕES ACUMULADAS"] = ""
+    with prof.stage("leitura_analitica") as info:
+        df_ana = read_sheet_cached(FILE_ANALITICA)
+        df_ana['SEI_CLEAN'] = clean_sei_series(df_ana['Processo SEI'])
+        df_ana = df_ana.drop_duplicates(subset=['SEI_CLEAN']).copy()
+        info['linhas'] = len(df_ana)
+
+    with prof.stage("leitura_base") as info:
+        df_base = read_sheet_cached(FILE_BASE)
+        df_base['SEI_CLEAN'] = clean_sei_series(df_base['Processo SEI'])
+        # Suporte ao novo formato BASE.xlsx (coluna 'Valor') e ao formato antigo ('Valor das medições')
+        if 'Valor' in df_base.columns:
+            df_base['Valor'] = money_column(df_base, 'Valor', origem='BASE.xlsx')
+        elif 'Valor das medições' in df_base.columns:
+            df_base['Valor'] = money_column(df_base, 'Valor das medições', origem='BASE.xlsx')
         else:
-            dados["MEDIÇÕES ACUMULADAS"] = vlr_acum_ana
-        dados["MEDIÇÕES 2025"] = float(round(med_2025, 2)) # type: ignore
-        dados["MEDIÇÕES 2026"] = float(round(med_2026, 2)) # type: ignore
-        dados["SALDO DO CONTRATO"] = saldo_ana
-
-        # Montar linha final ordenada
-        linha_ordenada = {}
-        for col in ordered_columns:
-            val_out = dados.get(col)
-            
-            # Fallback de Nomes
-            if val_out is None:
-                if "PRAZO" in col and "EXECUÇÃO" in col: val_out = dados.get("PRAZO EXECUÇÃO")
-                elif "ORDEM" in col and "INÍCIO" in col: val_out = dados.get("ORDEM DE INÍCIO")
-                elif "VLR" in col and "CONTRATO" in col: val_out = dados.get("VLR.CONTRATO C/ADITIVO")
-                elif "MEDIÇÕES" in col and "ACUMULADAS" in col: val_out = dados.get("MEDIÇÕES ACUMULADAS")
-                elif "MEDIÇÕES" in col and "2025" in col: val_out = dados.get("MEDIÇÕES 2025")
-                elif "MEDIÇÕES" in col and "2026" in col: val_out = dados.get("MEDIÇÕES 2026")
-                elif "SALDO" in col and "CONTRATO" in col: val_out = dados.get("SALDO DO CONTRATO")
-                elif "%" in col and "EXEC" in col: val_out = dados.get("% EXEC.")
-            
-            linha_ordenada[col] = val_out if val_out is not None else ""
-            
-        final_rows.append(linha_ordenada)
-
-    df_all = pd.DataFrame(final_rows)
-    # Garante a ordem das colunas
-    df_all = df_all[ordered_columns]
-
-    # Separar em EXECUÇÃO e PROBLEMAS
-    df_execucao = prepare_dataframe(df_all, keep_execution=True)
-    df_problemas = prepare_dataframe(df_all, keep_execution=False)
-
-    # REMOVER FISCAL SOMENTE DA ABA MEDIÇÕES
-    if "FISCAL" in df_execucao.columns:
-        df_execucao = df_execucao.drop(columns=["FISCAL"])
-
-    # Escrever
-    with pd.ExcelWriter(FILE_OUTPUT, engine='openpyxl') as writer:
-        df_execucao.to_excel(writer, sheet_name='Medições', index=False)
+            raise KeyError("Coluna de valor não encontrada no BASE.xlsx. Esperado: 'Valor' ou 'Valor das medições'.")
+
+        # Rótulo MMM/AA por linha (ex.: "Janeiro" + 2025 -> "JAN/25")
+        df_base['MesAno'] = month_labels(df_base['Mês'], df_base['Ano'])
+        info['linhas'] = len(df_base)
+
+    # Medições por SEI x mês em matriz esparsa (só os pares com lançamento)
+    with prof.stage("pivot") as info:
+        month_matrix = MonthMatrix.from_frame(df_base, index='SEI_CLEAN', columns='MesAno', values='Valor')
+        info['linhas'] = len(month_matrix)
+        info['colunas'] = len(month_matrix.columns)
+        info['valores'] = month_matrix.nnz
+
+    # 4. Consolidar dados (no modo incremental, só os SEIs com entradas alteradas)
+    with prof.stage("consolidacao") as info:
+        consolidate_fn = consolidate_incremental if incremental else consolidate
+        df_all, gestores_faltantes = consolidate_fn(df_ana, month_matrix, ordered_columns, comissoes_idx,
+                                                    region_map, contractor_map, concluidas_sei)
+
+        # Separar em EXECUÇÃO e PROBLEMAS
+        df_execucao = prepare_dataframe(df_all, keep_execution=True)
+        df_problemas = prepare_dataframe(df_all, keep_execution=False)
+
+        # REMOVER FISCAL SOMENTE DA ABA MEDIÇÕES
+        if "FISCAL" in df_execucao.columns:
+            df_execucao = df_execucao.drop(columns=["FISCAL"])
+
+        # Contratadas sem RESUMIDO no AUXILIAR (nem por aproximação) para revisão
+        contratadas_faltantes = _contratadas_faltantes(df_ana, contractor_map)
+        # ...e as resolvidas por aproximação, para conferência
+        contratadas_aproximadas = _contratadas_aproximadas(df_ana, contractor_map)
+        contractor_map.save_memo()
+        info['linhas'] = len(df_all)
+
+    # Escrever já formatado, numa única passada (sem reabrir o arquivo)
+    with prof.stage("escrita_formatacao") as info:
+        wb = streaming_workbook()
+        write_medicoes_sheet(wb, 'Medições', df_execucao, model_widths, model_header_style)
         if not df_problemas.empty:
-            df_problemas.to_excel(writer, sheet_name='PROBLEMAS', index=False)
+            write_medicoes_sheet(wb, 'PROBLEMAS', df_problemas, model_widths, model_header_style)
         if gestores_faltantes:
-            pd.DataFrame(gestores_faltantes).to_excel(writer, sheet_name='GESTOR_FALTANTES', index=False)
-
-    # Formatar
-    wb = openpyxl.load_workbook(FILE_OUTPUT)
-    
-    # Define colunas por aba
-    cols_medicoes = [c for c in ordered_columns if c != "FISCAL"]
-    cols_problemas = list(ordered_columns)
-
-    sheet_configs = {
-        'Medições': cols_medicoes,
-        'PROBLEMAS': cols_problemas
-    }
-
-    for sheet_name, sheet_cols in sheet_configs.items():
-        if sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            apply_sheet_formatting(ws, 
-                                   col_map={c: i+1 for i, c in enumerate(sheet_cols)}, 
-                                   header=sheet_cols, 
-                                   all_months=[], 
-                                   model_widths=model_widths, 
-                                   model_header_style=model_header_style,
-                                   h_vlr_contr="VLR.CONTRATO C/ADITIVO", 
-                                   h_med_acum="MEDIÇÕES ACUMULADAS", 
-                                   h_saldo="SALDO DO CONTRATO", 
-                                   h_inicio="ORDEM DE INÍCIO")
-
-    wb.save(FILE_OUTPUT)
+            write_frame(wb, 'GESTOR_FALTANTES', pd.DataFrame(gestores_faltantes))
+        if contratadas_faltantes:
+            write_frame(wb, 'CONTRATADA_FALTANTES', pd.DataFrame(contratadas_faltantes))
+        if contratadas_aproximadas:
+            write_frame(wb, 'CONTRATADA_APROXIMADA', pd.DataFrame(contratadas_aproximadas))
+        info['linhas'] = (len(df_execucao) + len(df_problemas) + len(gestores_faltantes)
+                          + len(contratadas_faltantes) + len(contratadas_aproximadas))
+
+    with prof.stage("salvar"):
+        wb.save(FILE_OUTPUT)
+
+    # Cópia tipada para o relatório de gestores, o servidor MCP e análises avulsas
+    snapshot_folder = None
+    if SAVE_SNAPSHOT if save_data is None else save_data:
+        with prof.stage("dados_consolidados") as info:
+            tables = {
+                'df_all': df_all,
+                'df_execucao': df_execucao,
+                'df_problemas': df_problemas,
+                'gestores': gestores_frame(comissoes_idx),
+            }
+            # Registros de CONTROLES (já lidos acima) para o relatório de gestores
+            controles_tables, controles_extra = controles_snapshot(FILE_CONTROLES)
+            tables.update(controles_tables)
+            # Colunas de valor e prazo: numéricas mesmo quando vazias (meses futuros)
+            numeric_columns = [c for c in df_all.columns if is_money_column(str(c)) or c == "PRAZO EXECUÇÃO"]
+            snapshot_folder = save_snapshot(FILE_OUTPUT, tables, controles_extra, numeric_columns)
+            info['linhas'] = sum(len(df) for df in tables.values())
+
+    # Relatório de gestores com os registros de CONTROLES já interpretados neste processo
+    report_file = None
+    if report and os.path.exists(FILE_CONTROLES):
+        with prof.stage("relatorio_gestores") as info:
+            df_controles = load_controles(FILE_CONTROLES)
+            report_file = gera_relatorio_gestores.generate_report(df_controles)
+            info['linhas'] = len(df_controles)
     print(f"Finalizado: {FILE_OUTPUT}")
     print(f"  - Aba 'Medições': {len(df_execucao)} obras em EXECUÇÃO")
     print(f"  - Aba 'PROBLEMAS': {len(df_problemas)} obras com status != EXECUÇÃO")
     if gestores_faltantes:
         print(f"  - Aba 'GESTOR_FALTANTES': {len(gestores_faltantes)} registros sem gestor")
+    if contratadas_faltantes:
+        print(f"  - Aba 'CONTRATADA_FALTANTES': {len(contratadas_faltantes)} registros sem RESUMIDO no AUXILIAR")
+    if contratadas_aproximadas:
+        print(f"  - Aba 'CONTRATADA_APROXIMADA': {len(contratadas_aproximadas)} registros resolvidos por aproximação "
+              f"(limiar {contractor_map.threshold:g})")
+    if snapshot_folder:
+        print(f"  - Dados consolidados: {snapshot_folder}")
+    if report_file:
+        print(f"  - Relatório de gestores: {report_file}")
+    if prof.enabled:
+        print(prof.summary())
+        if prof.output:
+            print(f"  - Perfil por etapa: {prof.output}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Consolida as medições em MEDIÇÕES_CONSOLIDADO.xlsx.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="recalcula só os SEIs cujas entradas mudaram desde a última execução")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processos lendo as planilhas em paralelo (padrão: MEDICOES_WORKERS ou 1)")
+    parser.add_argument("--profile", nargs="?", const=True, default=None, metavar="ARQUIVO",
+                        help="mede tempo, CPU, memória e linhas por etapa; grava JSON lines em ARQUIVO "
+                             "(padrão: <saída>.perfil.jsonl) e imprime um resumo (ou MEDICOES_PROFILE)")
+    parser.add_argument("--dados", action="store_true", default=None,
+                        help="grava df_all, df_execucao, df_problemas, o mapa gestor/fiscal e os registros de "
+                             "CONTROLES em <saída>.dados/ (Parquet com pyarrow, senão pickle; ou MEDICOES_DADOS=1)")
+    parser.add_argument("--relatorio", action="store_true",
+                        help="gera também o relatório de obras por gestores e fiscais, reaproveitando a "
+                             "leitura de CONTROLES desta execução")
+    args = parser.parse_args()
+    main(incremental=args.incremental, workers=args.workers, profile=args.profile, save_data=args.dados,
+         report=args.relatorio)
@@ -0,0 +1,61 @@
+import openpyxl # type: ignore
+import pytest # type: ignore
+
+import gera_relatorio_gestores
+import leitura_planilhas
+from blocos_planilha import CONTROLES_RELATORIO_SPEC, CONTROLES_SPEC, COMISSOES_SPEC, scan_tables
+
+# Aba no formato de CONTROLES: título de região, cabeçalho, dados com uma linha
+# sem SEI no meio, TOTAL e o bloco seguinte.
+CONTROLES_ROWS = [
+    ("BAIXADA", None, None),
+    ("SEI", "GESTOR(A) ATUANTE", "FISCAL NOMEADO"),
+    ("1", "ANA", "BRUNO"),
+    (None, "CARLA", "DIEGO"),
+    ("2", "EDU", "FABIO"),
+    ("TOTAL", None, None),
+    ("SUL", None, None),
+    ("SEI", "GESTOR ATUANTE", "FISCAL"),
+    ("3", "GIL", "HUGO"),
+]
+
+
+@pytest.fixture(autouse=True)
+def sem_cache(monkeypatch):
+    monkeypatch.setattr(leitura_planilhas, "CACHE_ENABLED", False)
+
+
+def _keys(blocks):
+    return [[values[0] for _, values in block.rows] for block in blocks]
+
+
+def test_controles_spec_stops_at_blank_sei():
+    blocks = scan_tables(CONTROLES_ROWS, CONTROLES_SPEC)
+    assert _keys(blocks) == [["1"], ["3"]]
+    assert blocks[0].end == blocks[0].gap == 3
+    assert blocks[1].gap is None
+
+
+def test_relatorio_spec_skips_blank_sei_and_keeps_reading():
+    blocks = scan_tables(CONTROLES_ROWS, CONTROLES_RELATORIO_SPEC)
+    assert _keys(blocks) == [["1", "2"], ["3"]]
+    assert (blocks[0].end, blocks[0].gap) == (6, 3)
+    assert blocks[1].columns == {"SEI": 0, "GESTOR(A) ATUANTE": 1, "FISCAL NOMEADO": 2}
+
+
+def test_comissoes_spec_uses_only_first_header():
+    rows = [("TÍTULO",), ("SEI", "GESTOR"), ("1", "ANA"), (None, None), ("SEI", "GESTOR"), ("2", "BIA")]
+    blocks = scan_tables(rows, COMISSOES_SPEC)
+    assert _keys(blocks) == [["1", "2"]]
+
+
+def test_report_reads_rows_after_a_blank_sei(tmp_path):
+    path = tmp_path / "controles.xlsx"
+    wb = openpyxl.Workbook()
+    for row in CONTROLES_ROWS:
+        wb.active.append(row)
+    wb.save(path)
+
+    df = gera_relatorio_gestores.load_data(str(path))
+    assert df["SEI"].tolist() == ["1", "2", "3"]
+    assert df["REGIÃO"].tolist() == ["BAIXADA", "BAIXADA", "SUL"]
@@ -0,0 +1,53 @@
+import openpyxl # type: ignore
+import pytest # type: ignore
+
+import leitura_planilhas
+from cadastro_controles import cadastro_records, controles_records, controles_snapshot, load_controles
+
+# Uma leitura de CONTROLES, duas regras para a linha sem SEI: o relatório
+# continua o bloco, o cadastro para nela. Anotações à direita do cabeçalho
+# (fora do trecho contíguo) não viram campos.
+ROWS = [
+    ("BAIXADA",),
+    ("SEI", "GESTOR(A) ATUANTE", "FISCAL NOMEADO", None, "STATUS", None, "ANDERSON", 18),
+    ("1", "ANA", "BRUNO", "x", "EXECUÇÃO", None, "nota", 1),
+    (None, "CARLA", "DIEGO"),
+    ("2", "EDU", "FABIO", None, "CONCLUIDA"),
+    ("TOTAL",),
+    ("SUL",),
+    ("SEI", "GESTOR ATUANTE", "FISCAL"),
+    ("3", "GIL", "HUGO"),
+]
+
+
+@pytest.fixture
+def controles(tmp_path, monkeypatch):
+    monkeypatch.setattr(leitura_planilhas, "CACHE_ENABLED", False)
+    path = tmp_path / "controles.xlsx"
+    wb = openpyxl.Workbook()
+    for row in ROWS:
+        wb.active.append(row)
+    wb.save(path)
+    return str(path)
+
+
+def test_report_keeps_reading_and_cadastro_stops_at_blank_sei(controles):
+    assert [r["SEI"] for r in controles_records(controles)] == ["1", "2", "3"]
+    assert [r["SEI"] for r in cadastro_records(controles)] == ["1", "3"]
+    assert [r["REGIÃO"] for r in controles_records(controles)] == ["BAIXADA", "BAIXADA", "SUL"]
+
+
+def test_records_use_only_the_header_span_and_known_columns(controles):
+    first = controles_records(controles)[0]
+    assert first == {'REGIÃO': "BAIXADA", 'SEI': "1", 'GESTOR(A) ATUANTE': "ANA",
+                     'FISCAL NOMEADO': "BRUNO", 'STATUS': "EXECUÇÃO"}
+    tables, extra = controles_snapshot(controles)
+    assert list(tables["controles"].columns) == ['REGIÃO', 'SEI', 'GESTOR(A) ATUANTE', 'FISCAL NOMEADO', 'STATUS']
+    assert extra["controles"]["arquivo"] == "controles.xlsx"
+
+
+def test_load_controles_returns_a_copy(controles):
+    df = load_controles(controles)
+    df.loc[0, "GESTOR(A) ATUANTE"] = "OUTRO"
+    assert load_controles(controles).loc[0, "GESTOR(A) ATUANTE"] == "ANA"
+    assert controles_records(controles)[0]["GESTOR(A) ATUANTE"] == "ANA"
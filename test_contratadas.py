@@ -0,0 +1,68 @@
+import pandas as pd # type: ignore
+import pytest # type: ignore
+
+import leitura_planilhas
+import processa_medicoes as pm
+from contratadas import ContractorResolver
+
+# Resolução aproximada CONTRATADA -> RESUMIDO com nomes do AUXILIAR e grafias
+# encontradas no ANALITICA.
+AUXILIAR = {
+    pm.normalize_name(name): resumido for name, resumido in [
+        ("MONJARDIM CONSTRUCOES LTDA", "MONJARDIM"),
+        ("KROFMAN COMÉRCIO E SERVIÇOS EIRELI", "KROFMAN"),
+        ("DRV ENGENHARIA EIRELI", "DRV ENG."),
+        ("CONSTRUTORA 001 LTDA", "C001"),
+    ]
+}
+
+
+@pytest.fixture(autouse=True)
+def sem_cache(monkeypatch):
+    monkeypatch.setattr(leitura_planilhas, "CACHE_ENABLED", False)
+
+
+def _resolve(resolver, name):
+    return resolver.resolve(pm.normalize_name(name))
+
+
+@pytest.mark.parametrize("name, auxiliar, resumido, score", [
+    ("MONJARDIM CONSTRUÇÕES LTDA", "MONJARDIM CONSTRUCOES LTDA", "MONJARDIM", 1.0),
+    ("KROFMAN COMERCIO SERVIÇO EIRELI ME", "KROFMAN COMÉRCIO E SERVIÇOS EIRELI", "KROFMAN", 1.0),
+    ("KROFMANN COMERCIO E SERVICOS", "KROFMAN COMÉRCIO E SERVIÇOS EIRELI", "KROFMAN", 0.9412),
+])
+def test_spelling_variants_and_typos_resolve(name, auxiliar, resumido, score):
+    resolver = ContractorResolver(AUXILIAR)
+    assert _resolve(resolver, name) == resumido
+    assert resolver.fuzzy_matches() == {pm.normalize_name(name): (resumido, score, auxiliar)}
+
+
+def test_near_miss_is_rejected_even_above_threshold():
+    # 'WTE ENGENHARIA' x 'DRV ENGENHARIA' tem similaridade 0.67: outra empresa
+    resolver = ContractorResolver(AUXILIAR, threshold=0.6)
+    resumido, score, auxiliar = resolver.best_match("WTE ENGENHARIA EIRELI")
+    assert (resumido, auxiliar) == (None, None) and score >= 0.6
+    assert _resolve(resolver, "WTE ENGENHARIA EIRELI") is None
+    assert _resolve(resolver, "CONSTRUTORA 007 LTDA") is None
+
+
+def test_threshold_one_accepts_only_the_same_normalized_name():
+    resolver = ContractorResolver(AUXILIAR, threshold=1.0)
+    assert _resolve(resolver, "DRV ENGENHARIA EIRELI") == "DRV ENG."
+    assert _resolve(resolver, "KROFMAN COMERCIO SERVIÇO EIRELI ME") == "KROFMAN"
+    assert _resolve(resolver, "KROFMANN COMERCIO E SERVICOS") is None
+    assert resolver.fuzzy_matches() == {
+        "KROFMAN COMERCIO SERVIÇO EIRELI ME": ("KROFMAN", 1.0, "KROFMAN COMÉRCIO E SERVIÇOS EIRELI")}
+
+
+def test_unresolved_names_are_listed_as_faltantes():
+    df_ana = pd.DataFrame({
+        'Processo SEI': ["1", "2", "3", "4"],
+        'Contratada': ["MONJARDIM CONSTRUÇÕES LTDA", "WTE ENGENHARIA EIRELI", None, "DRV ENGENHARIA EIRELI"],
+    })
+    resolver = ContractorResolver(AUXILIAR)
+    assert pm._contratadas_faltantes(df_ana, resolver) == [{'SEI': "2", 'CONTRATADA': "WTE ENGENHARIA EIRELI"}]
+    assert pm._contratadas_aproximadas(df_ana, resolver) == [
+        {'SEI': "1", 'CONTRATADA': "MONJARDIM CONSTRUÇÕES LTDA", 'CONTRATADA AUXILIAR': "MONJARDIM CONSTRUCOES LTDA",
+         'RESUMIDO': "MONJARDIM", 'SIMILARIDADE': 1.0},
+    ]
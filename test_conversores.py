@@ -0,0 +1,56 @@
+import datetime
+
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+import pytest # type: ignore
+
+from conversores import clean_sei, clean_sei_series, to_numeric, to_numeric_series
+
+# As versões *_series devem devolver, célula a célula, o mesmo que a escalar.
+
+NUMERIC_INPUTS = [
+    ["R$ 1.234,56", "1,5", "10", " 2.5 ", "nan", "NaN", "inf", "x", "", None, np.nan, 3, 4.257],
+    ["abc", "R$\xa0-", "1_000", "1e3", "-,5"],
+    [1, 2, None],
+    [True, False],
+    [pd.Timestamp("2024-01-01"), "7,25"],
+]
+
+SEI_INPUTS = [
+    pd.Series([" 123 ", None, "ABC", 45, 1.0, np.nan], dtype=object),
+    pd.Series([pd.Timestamp("2024-01-01"), pd.NaT, pd.Timestamp("2024-02-03 10:30")]),
+    pd.Series([pd.NaT, pd.NaT], dtype="datetime64[ns]"),
+    pd.Series([None, np.nan], dtype=object),
+    pd.Series([pd.Timestamp("2024-01-01"), " 12 "], dtype=object),
+    pd.Series([1, 2, 3]),
+    pd.Series([1.5, np.nan]),
+    pd.Series(["a ", None], dtype="string"),
+    pd.Series([], dtype=object),
+]
+
+
+def _same(a, b):
+    return (pd.isna(a) and pd.isna(b)) or a == b
+
+
+@pytest.mark.parametrize("values", NUMERIC_INPUTS)
+def test_to_numeric_series_matches_scalar(values):
+    bulk, _ = to_numeric_series(pd.Series(values, dtype=object))
+    for value, got in zip(values, bulk.tolist()):
+        assert _same(got, to_numeric(value)), value
+
+
+def test_to_numeric_series_nan_text_is_not_a_fallback():
+    _, fallbacks = to_numeric_series(pd.Series(["nan", "NaN", "x"]))
+    assert fallbacks == 1
+
+
+@pytest.mark.parametrize("series", SEI_INPUTS, ids=lambda s: str(s.dtype))
+def test_clean_sei_series_matches_scalar(series):
+    bulk = clean_sei_series(series)
+    assert bulk.tolist() == [clean_sei(v) for v in series]
+
+
+def test_clean_sei_series_formats_datetimes_like_str():
+    series = pd.Series([datetime.datetime(2024, 1, 1)])
+    assert clean_sei_series(series).tolist() == ["2024-01-01 00:00:00"]
@@ -0,0 +1,74 @@
+import pandas as pd # type: ignore
+import pytest # type: ignore
+
+import dados_consolidados
+from dados_consolidados import load_snapshot, save_snapshot, snapshot_manifest, typed_frame
+
+# Ida e volta save_snapshot -> load_snapshot, em Parquet (com pyarrow) e em
+# pickle (sem ele): mesmos tipos e valores da cópia tipada.
+
+
+def _tables():
+    consolidado = pd.DataFrame({
+        "SEI": ["1", "2", "3"],
+        "PRAZO EXECUÇÃO": [120, "", 30],
+        "MEDIÇÕES ACUMULADAS": [1500.5, "", 0.0],
+        "JAN/27": ["", "", ""],
+        "ORDEM DE INÍCIO": [pd.Timestamp("2024-01-02"), "", pd.Timestamp("2024-03-04")],
+        "DATA FINAL": [pd.Timestamp("2025-01-02"), "-", 7],
+        "% EXEC.": [0.5, 0.25, 1.0],
+    })
+    consolidado = consolidado.astype({c: object for c in consolidado.columns if c != "% EXEC."})
+    gestores = pd.DataFrame({"SEI": ["1", "2"], "GESTOR": ["ANA", ""]})
+    return {"df_all": consolidado, "gestores": gestores}
+
+
+NUMERIC = ["PRAZO EXECUÇÃO", "MEDIÇÕES ACUMULADAS", "JAN/27"]
+
+
+def _round_trip(tmp_path):
+    output = str(tmp_path / "MEDIÇÕES_CONSOLIDADO.xlsx")
+    tables = _tables()
+    save_snapshot(output, tables, numeric_columns=NUMERIC)
+    return tables, load_snapshot(output), snapshot_manifest(output)
+
+
+def _check(tables, loaded):
+    assert list(loaded) == list(tables)
+    for name, df in tables.items():
+        expected = typed_frame(df, NUMERIC)
+        # Texto puro (object) pode voltar do Parquet como o dtype de texto do pandas
+        pd.testing.assert_frame_equal(loaded[name], expected, check_dtype=False)
+        for col, dtype in expected.dtypes.items():
+            if dtype != object:
+                assert loaded[name][col].dtype == dtype, col
+
+    df = loaded["df_all"]
+    assert str(df["PRAZO EXECUÇÃO"].dtype) == "Int64"
+    assert df["PRAZO EXECUÇÃO"].isna().tolist() == [False, True, False]
+    assert str(df["MEDIÇÕES ACUMULADAS"].dtype) == "Float64"
+    assert df["MEDIÇÕES ACUMULADAS"][0] == 1500.5
+    assert str(df["JAN/27"].dtype) == "Float64" and df["JAN/27"].isna().all()
+    assert pd.api.types.is_datetime64_any_dtype(df["ORDEM DE INÍCIO"])
+    assert df["DATA FINAL"].tolist() == ["2025-01-02 00:00:00", "-", "7"]
+    assert df["% EXEC."].dtype == float
+
+
+def test_round_trip_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    tables, loaded, manifest = _round_trip(tmp_path)
+    assert {info["formato"] for info in manifest["tabelas"].values()} == {"parquet"}
+    _check(tables, loaded)
+
+
+def test_round_trip_pickle_without_pyarrow(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(dados_consolidados, "HAS_PARQUET", False)
+    tables, loaded, manifest = _round_trip(tmp_path)
+    assert {info["formato"] for info in manifest["tabelas"].values()} == {"pickle"}
+    assert "pyarrow não instalado" in capsys.readouterr().out
+    _check(tables, loaded)
+
+
+def test_load_snapshot_without_data(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_snapshot(str(tmp_path / "MEDIÇÕES_CONSOLIDADO.xlsx"))
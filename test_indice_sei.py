@@ -0,0 +1,46 @@
+import pandas as pd # type: ignore
+
+from indice_sei import SeiIndex
+
+# SeiIndex.lookup deve devolver, SEI a SEI, o mesmo que o dict de dicts
+# consultado com dict.get (registro padrão para SEIs fora do cadastro).
+
+CADASTRO = {
+    "1": {'gestor': 'ANA', 'fiscal': 'BRUNO', 'local': 'CIVIS', 'status_aux': 'EXECUÇÃO'},
+    "2": {'gestor': 'ANA', 'local': 'ESPECIAIS', 'status_aux': ''},  # sem fiscal (só COMISSÕES)
+    "3": {'gestor': '', 'fiscal': 'CARLA', 'local': 'CONTINGENCIA', 'status_aux': 'CONCLUIDA'},
+}
+
+
+def _dict_get(mapping, seis):
+    rows = []
+    for sei in seis:
+        rec = mapping.get(sei)
+        if rec is None:
+            rows.append(dict(SeiIndex.DEFAULTS))
+        else:
+            rows.append({field: rec.get(field, "") for field in SeiIndex.FIELDS})
+    return pd.DataFrame(rows, columns=list(SeiIndex.FIELDS), dtype=object)
+
+
+def test_lookup_matches_dict_get():
+    seis = ["3", "1", "X", "2", "1", "", "4"]
+    idx = SeiIndex.from_map(CADASTRO)
+    pd.testing.assert_frame_equal(idx.lookup(seis), _dict_get(CADASTRO, seis))
+
+
+def test_lookup_unknown_and_empty():
+    idx = SeiIndex.from_map(CADASTRO)
+    assert idx.lookup(["X", "Y"]).to_dict('records') == [SeiIndex.DEFAULTS] * 2
+    assert len(idx.lookup([])) == 0
+    empty = SeiIndex.from_map({})
+    assert empty.lookup(["1"]).to_dict('records') == [SeiIndex.DEFAULTS]
+
+
+def test_positions_and_to_frame():
+    idx = SeiIndex.from_map(CADASTRO)
+    assert idx.positions(["2", "X", "1"]).tolist() == [1, -1, 0]
+    assert "3" in idx and "X" not in idx
+    frame = idx.to_frame()
+    assert frame['SEI'].tolist() == list(CADASTRO)
+    assert frame['fiscal'].tolist() == ['BRUNO', '', 'CARLA']
@@ -0,0 +1,98 @@
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+
+from conversores import parse_month_label
+from matriz_medicoes import MonthMatrix
+
+# A matriz esparsa deve reproduzir o pivot_table(aggfunc='sum').fillna(0)
+# denso que ela substituiu, inclusive para SEIs e meses sem lançamento.
+
+BASE = pd.DataFrame({
+    'SEI_CLEAN': ["B", "A", "B", "A", "C", "B", "A"],
+    'MesAno': ["JAN/25", "FEV/25", "JAN/25", "DEZ/24", "MAR/25", "DEZ/24", "FEV/25"],
+    'Valor': [10.1, 20.2, 0.2, 5.0, 7.77, 1.0, 0.03],
+})
+
+
+def _pivot(df):
+    return df.pivot_table(index='SEI_CLEAN', columns='MesAno', values='Valor', aggfunc='sum').fillna(0)
+
+
+def _take_pivot(pivot, seis, months):
+    return pivot.reindex(index=seis, columns=months).fillna(0).to_numpy()
+
+
+def test_from_frame_matches_pivot_table():
+    matrix = MonthMatrix.from_frame(BASE)
+    pivot = _pivot(BASE)
+    assert list(matrix.index) == list(pivot.index)
+    assert list(matrix.columns) == list(pivot.columns)
+    assert matrix.nnz == 5
+    pd.testing.assert_frame_equal(matrix.to_frame(), pivot, check_names=False,
+                                  check_index_type=False, check_column_type=False)
+
+
+def test_take_matches_pivot_with_unknown_seis_and_months():
+    matrix = MonthMatrix.from_frame(BASE)
+    seis = ["C", "X", "A", "B", "A", ""]
+    months = ["MAR/25", "ABR/25", "JAN/25", "DEZ/24", "FEV/25"]  # ABR/25 sem lançamento
+    got = matrix.take(seis, months)
+    assert got.shape == (len(seis), len(months))
+    np.testing.assert_array_equal(got, _take_pivot(_pivot(BASE), seis, months))
+    assert not got[1].any() and not got[:, 1].any()
+
+
+def test_take_random_frame_is_bit_identical():
+    rng = np.random.default_rng(7)
+    n = 2000
+    df = pd.DataFrame({
+        'SEI_CLEAN': rng.integers(0, 300, n).astype(str),
+        'MesAno': [f"{m}/2{y}" for m, y in zip(rng.choice(["JAN", "FEV", "MAR", "ABR"], n), rng.integers(3, 6, n))],
+        'Valor': rng.random(n) * 1e5,
+    })
+    matrix = MonthMatrix.from_frame(df)
+    seis = list(matrix.index[::3]) + ["999", "nao existe"]
+    months = list(matrix.columns[::-1]) + ["DEZ/29"]
+    np.testing.assert_array_equal(matrix.take(seis, months), _take_pivot(_pivot(df), seis, months))
+
+
+def test_empty_base():
+    matrix = MonthMatrix.from_frame(BASE.iloc[:0])
+    assert len(matrix) == 0 and matrix.nnz == 0
+    assert matrix.take(["A"], ["JAN/25"]).tolist() == [[0.0]]
+
+
+def _dense_year_totals(df):
+    # Referência: pivot denso e soma dos meses de cada ano em ordem cronológica
+    pivot = _pivot(df)
+    order = sorted(pivot.columns, key=parse_month_label)
+    totals = {}
+    for col in order:
+        year = parse_month_label(col)[0]
+        totals[year] = totals.get(year, np.zeros(len(pivot))) + pivot[col].to_numpy()
+    return pivot.index, totals
+
+
+def test_year_totals_match_dense_pivot_sum():
+    rng = np.random.default_rng(11)
+    n = 3000
+    months = ["JAN", "FEV", "MAR", "ABR", "MAI", "JUN", "JUL", "AGO", "SET", "OUT", "NOV", "DEZ"]
+    df = pd.DataFrame({
+        'SEI_CLEAN': rng.integers(0, 400, n).astype(str),
+        'MesAno': [f"{m}/{y}" for m, y in zip(rng.choice(months, n), rng.integers(23, 26, n))],
+        'Valor': np.round(rng.random(n) * 1e6, 2),
+    })
+    matrix = MonthMatrix.from_frame(df)
+    seis, expected = _dense_year_totals(df)
+    got = matrix.year_totals(list(seis))
+    assert sorted(got) == sorted(expected) == [2023, 2024, 2025]
+    for year in expected:
+        np.testing.assert_array_equal(got[year], expected[year])
+
+
+def test_year_totals_unknown_seis_and_undated_columns():
+    df = pd.concat([BASE, pd.DataFrame({'SEI_CLEAN': ["A"], 'MesAno': ["SEM DATA"], 'Valor': [99.0]})])
+    totals = MonthMatrix.from_frame(df).year_totals(["A", "X", "B"])
+    assert sorted(totals) == [2024, 2025]
+    assert totals[2024].tolist() == [5.0, 0.0, 1.0]
+    np.testing.assert_array_equal(totals[2025], [20.2 + 0.03, 0.0, 10.1 + 0.2])
@@ -0,0 +1,167 @@
+import os
+import shutil
+
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+import pytest # type: ignore
+
+import leitura_planilhas
+import processa_medicoes as pm
+from blocos_planilha import CONTROLES_SPEC, cell_at, detect_tables
+from conversores import clean_sei, month_labels, to_numeric
+from indice_sei import SeiIndex
+from leitura_planilhas import load_workbook_ignoring_header_footer_warning as load_workbook
+from matriz_medicoes import MonthMatrix
+
+# Modo incremental de ponta a ponta com as planilhas do repositório: BASE,
+# CONTROLES e o modelo são copiados para tmp_path para poderem ser editados.
+
+
+@pytest.fixture
+def entradas(tmp_path, monkeypatch):
+    for name in ("BASE.xlsx", "MEDIÇÕES.xlsx", "CONTROLES POR COMISSÃO E GESTORES.xlsx"):
+        shutil.copy(os.path.join(pm.CWD, name), tmp_path / name)
+    monkeypatch.setattr(leitura_planilhas, "CACHE_ENABLED", False)
+    monkeypatch.setattr(leitura_planilhas, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(pm, "FILE_BASE", str(tmp_path / "BASE.xlsx"))
+    monkeypatch.setattr(pm, "FILE_CONTROLES", str(tmp_path / "CONTROLES POR COMISSÃO E GESTORES.xlsx"))
+
+    recalculados = []
+    consolidate = pm.consolidate
+
+    def contando(df_ana, *args, **kwargs):
+        recalculados.append(set(df_ana['SEI_CLEAN']))
+        return consolidate(df_ana, *args, **kwargs)
+
+    monkeypatch.setattr(pm, "consolidate", contando)
+    return tmp_path, recalculados
+
+
+def _run(monkeypatch, output, incremental):
+    # Cada execução como um processo novo: nada das planilhas fica em memória
+    leitura_planilhas.clear_sheet_cache()
+    monkeypatch.setattr(pm, "FILE_OUTPUT", str(output))
+    pm.main(incremental=incremental)
+    return pd.read_excel(output, sheet_name=None)
+
+
+def _assert_same_workbook(a, b):
+    assert list(a) == list(b)
+    for sheet in a:
+        pd.testing.assert_frame_equal(a[sheet], b[sheet])
+
+
+def _analitica_seis():
+    return set(pm.read_sheet_cached(pm.FILE_ANALITICA)['Processo SEI'].map(clean_sei))
+
+
+def _bump_base_value(path, seis, months=None):
+    """Soma 1000 a um lançamento do BASE num dos `months` (padrão: meses do modelo); devolve o SEI alterado."""
+    if months is None:
+        months = {str(c).replace(" ", "") for c in pm.get_model_structure()[0]}
+    df = pd.read_excel(path)
+    labels = month_labels(df['Mês'], df['Ano'])
+    i = next(i for i in df.index if labels[i] in months and clean_sei(df.at[i, 'Processo SEI']) in seis)
+    wb = load_workbook(path)
+    cell = wb.worksheets[0].cell(row=i + 2, column=df.columns.get_loc('Valor') + 1)
+    cell.value = to_numeric(cell.value) + 1000
+    wb.save(path)
+    return clean_sei(df.at[i, 'Processo SEI'])
+
+
+def _rename_gestor(path, seis):
+    """Troca o GESTOR(A) ATUANTE de um SEI do CONTROLES; devolve o SEI alterado."""
+    for block in detect_tables(path, CONTROLES_SPEC):
+        sei_idx = block.columns["SEI"]
+        for i, values in block.rows:
+            sei = clean_sei(cell_at(values, sei_idx))
+            if sei in seis:
+                wb = load_workbook(path)
+                wb.worksheets[0].cell(row=i + 1, column=block.columns["GESTOR(A) ATUANTE"] + 1).value = "GESTOR TESTE"
+                wb.save(path)
+                return sei
+    raise AssertionError("nenhum SEI do ANALITICA no CONTROLES")
+
+
+def test_incremental_recomputes_only_changed_seis(entradas, monkeypatch):
+    tmp_path, recalculados = entradas
+    seis = _analitica_seis()
+    out_inc, out_full = tmp_path / "inc.xlsx", tmp_path / "full.xlsx"
+
+    # Sem estado salvo: tudo é calculado
+    first = _run(monkeypatch, out_inc, incremental=True)
+    assert os.path.exists(tmp_path / "inc.estado.pkl")
+    assert recalculados.pop() == seis
+
+    # Nada mudou: nenhum SEI recalculado, mesma saída
+    again = _run(monkeypatch, out_inc, incremental=True)
+    assert recalculados.pop() == set()
+    _assert_same_workbook(again, first)
+
+    # Um lançamento do BASE alterado: só aquele SEI
+    sei = _bump_base_value(pm.FILE_BASE, seis)
+    inc = _run(monkeypatch, out_inc, incremental=True)
+    assert recalculados.pop() == {sei}
+    _assert_same_workbook(inc, _run(monkeypatch, out_full, incremental=False))
+    recalculados.clear()
+
+    # Um gestor do CONTROLES alterado: só aquele SEI
+    sei = _rename_gestor(pm.FILE_CONTROLES, seis)
+    inc = _run(monkeypatch, out_inc, incremental=True)
+    assert recalculados.pop() == {sei}
+    _assert_same_workbook(inc, _run(monkeypatch, out_full, incremental=False))
+
+
+def test_input_hash_covers_year_totals_outside_the_model():
+    # JUN/25 não é coluna do modelo, mas entra em MEDIÇÕES 2025
+    df_ana = pd.DataFrame({'Processo SEI': ["A", "B", "C"], 'SEI_CLEAN': ["A", "B", "C"]})
+    base = pd.DataFrame({
+        'SEI_CLEAN': ["A", "B", "B", "C"],
+        'MesAno': ["JAN/25", "JAN/25", "JUN/25", "JUN/24"],
+        'Valor': [1.0, 2.0, 3.0, 4.0],
+    })
+    columns = ["SEI", "JAN/25", "MEDIÇÕES 2024", "MEDIÇÕES 2025"]
+    cadastro = SeiIndex.from_map({"A": {'gestor': 'ANA'}})
+
+    def hashes(df):
+        return pm.sei_input_hashes(df_ana, MonthMatrix.from_frame(df), columns, cadastro, set())
+
+    before = hashes(base)
+    assert before.equals(hashes(base.copy()))
+    base.loc[2, 'Valor'] = 30.0
+    after = hashes(base)
+    assert (before != after).tolist() == [False, True, False]
+    np.testing.assert_array_equal(before.index, ["A", "B", "C"])
+
+
+def test_incremental_recomputes_year_total_outside_the_model(entradas, monkeypatch):
+    tmp_path, recalculados = entradas
+    seis = _analitica_seis()
+    out_inc, out_full = tmp_path / "inc.xlsx", tmp_path / "full.xlsx"
+
+    # Modelo sem a coluna JUN/25: só MEDIÇÕES 2025 depende desse mês
+    model = pm.get_model_structure
+
+    def sem_junho(path=None):
+        columns, widths, styles = model(path)
+        return [c for c in columns if str(c).replace(" ", "") != "JUN/25"], widths, styles
+
+    monkeypatch.setattr(pm, "get_model_structure", sem_junho)
+    _run(monkeypatch, out_inc, incremental=True)
+    recalculados.clear()
+
+    sei = _bump_base_value(pm.FILE_BASE, seis, months={"JUN/25"})
+    inc = _run(monkeypatch, out_inc, incremental=True)
+    assert recalculados.pop() == {sei}
+    _assert_same_workbook(inc, _run(monkeypatch, out_full, incremental=False))
+
+
+def test_contratadas_sheets(entradas, monkeypatch):
+    tmp_path, _ = entradas
+    out = _run(monkeypatch, tmp_path / "out.xlsx", incremental=False)
+    faltantes = set(out['CONTRATADA_FALTANTES']['CONTRATADA'])
+    assert "WTE ENGENHARIA EIRELI" in faltantes
+    assert not faltantes & {"MONJARDIM CONSTRUÇÕES LTDA", "KROFMAN COMERCIO SERVIÇO EIRELI ME"}
+    aproximada = out['CONTRATADA_APROXIMADA'].set_index('CONTRATADA')['RESUMIDO'].to_dict()
+    assert aproximada["MONJARDIM CONSTRUÇÕES LTDA"] == "MONJARDIM"
+    assert aproximada["KROFMAN COMERCIO SERVIÇO EIRELI ME"] == "KROFMAN"